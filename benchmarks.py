@@ -0,0 +1,376 @@
+"""
+Benchmarks for the analytic hot paths in calculator.py.
+
+All fixtures are synthetic and seeded, so nothing here touches the network.
+
+Usage:
+    python benchmarks.py                  # run every benchmark
+    python benchmarks.py startup --check  # fail if importing calculator got slow/heavy
+    python benchmarks.py micro --json after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import calculator
+
+
+def make_ohlc_panel(num_days: int, num_tickers: int, seed: int = 42):
+    """Random-walk OHLCV panel as T×N arrays (rows are dates, columns are tickers)."""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, (num_days, num_tickers)), axis=0))
+    open_ = close * (1.0 + rng.normal(0.0, 0.005, (num_days, num_tickers)))
+    high = np.maximum(open_, close) * (1.0 + rng.uniform(0.0, 0.01, (num_days, num_tickers)))
+    low = np.minimum(open_, close) * (1.0 - rng.uniform(0.0, 0.01, (num_days, num_tickers)))
+    volume = rng.uniform(2e5, 5e6, (num_days, num_tickers))
+    return open_, high, low, close, volume
+
+
+def panel_to_frames(open_, high, low, close, volume):
+    """Split a T×N panel into the per-ticker DataFrames yang_zhang expects."""
+    index = pd.bdate_range("2024-01-02", periods=open_.shape[0])
+    return [
+        pd.DataFrame({
+            'Open': open_[:, j], 'High': high[:, j], 'Low': low[:, j],
+            'Close': close[:, j], 'Volume': volume[:, j],
+        }, index=index)
+        for j in range(open_.shape[1])
+    ]
+
+
+def best_of(func, repeat: int = 5, number: int = 1) -> float:
+    """Best wall time in seconds per call over `repeat` runs of `number` calls."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# Every timing taken in this run, for --json / --compare
+RESULTS = []
+
+
+def record(name: str, seconds: float, **params) -> float:
+    RESULTS.append({'name': name, 'params': params, 'seconds': seconds})
+    return seconds
+
+
+def report(name: str, seconds: float, **params):
+    """Record a timing and print it on one line."""
+    record(name, seconds, **params)
+    label = " ".join(f"{key}={value}" for key, value in params.items())
+    print(f"{name} {label}: {seconds * 1e6:,.1f} µs")
+
+
+def bench_yang_zhang(num_days: int = 63, num_tickers: int = 500):
+    """Per-ticker yang_zhang loop vs one yang_zhang_batch call over the same universe."""
+    panel = make_ohlc_panel(num_days, num_tickers)
+    frames = panel_to_frames(*panel)
+    open_, high, low, close, _ = panel
+
+    expected = np.array([calculator.yang_zhang(df) for df in frames])
+    actual = calculator.yang_zhang_batch(open_, high, low, close)
+    if not np.allclose(actual, expected, rtol=1e-9, atol=0.0, equal_nan=True):
+        raise AssertionError("yang_zhang_batch does not match yang_zhang")
+
+    per_ticker_s = record('yang_zhang.per_ticker', best_of(lambda: [calculator.yang_zhang(df) for df in frames], repeat=3),
+                          days=num_days, tickers=num_tickers)
+    batch_s = record('yang_zhang.batch', best_of(lambda: calculator.yang_zhang_batch(open_, high, low, close)),
+                     days=num_days, tickers=num_tickers)
+    print(
+        f"yang_zhang T={num_days} N={num_tickers}: per-ticker {per_ticker_s * 1e3:.1f} ms, "
+        f"batch {batch_s * 1e3:.2f} ms ({per_ticker_s / batch_s:.0f}x)"
+    )
+
+
+# Importing calculator must not pull these in, and must stay under the budget
+STARTUP_HEAVY_MODULES = ('FreeSimpleGUI', 'yfinance', 'scipy', 'pandas', 'numpy', 'curl_cffi', 'requests')
+STARTUP_BUDGET_MS = 150.0
+
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import calculator
+elapsed_ms = (time.perf_counter() - start) * 1000.0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"import_ms": elapsed_ms, "heavy_loaded": heavy}}))
+"""
+
+
+def bench_startup(runs: int = 5, check: bool = False):
+    """Cold `import calculator` time, each run in a fresh interpreter."""
+    probe = _STARTUP_PROBE.format(heavy=STARTUP_HEAVY_MODULES)
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    heavy_loaded = set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", probe], cwd=here, check=True, capture_output=True, text=True
+        ).stdout
+        sample = json.loads(out.strip().splitlines()[-1])
+        samples.append(sample['import_ms'])
+        heavy_loaded.update(sample['heavy_loaded'])
+
+    best_ms = min(samples)
+    record('startup.import', best_ms / 1000.0)
+    print(f"startup: import calculator best {best_ms:.1f} ms, median {sorted(samples)[len(samples) // 2]:.1f} ms "
+          f"(budget {STARTUP_BUDGET_MS:.0f} ms); heavy modules loaded: {sorted(heavy_loaded) or 'none'}")
+    if check and (best_ms > STARTUP_BUDGET_MS or heavy_loaded):
+        raise SystemExit("startup regression: import calculator is over budget or eagerly imports heavy modules")
+
+
+def bench_expiries(trials: int = 2000, seed: int = 7):
+    """Chains downloaded and metric agreement for 'minimal' vs 'all' expiry selection."""
+    rng = np.random.default_rng(seed)
+    today = datetime.date(2025, 1, 6)
+    fetched = {'minimal': 0, 'all': 0}
+    for _ in range(trials):
+        # Weeklies inside 45 DTE plus a few monthlies beyond it, as filter_dates returns them
+        dtes = sorted(set(rng.integers(0, 45, rng.integers(1, 9)).tolist()) | set(rng.integers(46, 120, 1).tolist()))
+        exp_dates = [(today + datetime.timedelta(days=int(d))).isoformat() for d in dtes]
+        atm_iv = dict(zip(exp_dates, rng.uniform(0.15, 1.2, len(exp_dates))))
+
+        metrics = {}
+        for mode in fetched:
+            selected = calculator.select_expirations(exp_dates, mode, today=today)
+            fetched[mode] += len(selected)
+            metrics[mode] = calculator.term_structure_metrics({d: atm_iv[d] for d in selected}, today=today)
+        for name, value in metrics['all'].items():
+            if not np.isclose(metrics['minimal'][name], value, rtol=1e-12, atol=0.0, equal_nan=True):
+                raise AssertionError(f"minimal expiry selection changes {name} for DTEs {dtes}")
+
+    print(f"expiries: {trials} term structures, metrics identical; chains per ticker "
+          f"minimal {fetched['minimal'] / trials:.2f} vs all {fetched['all'] / trials:.2f}")
+
+
+CHAIN_COLUMNS = ('contractSymbol', 'lastTradeDate', 'strike', 'lastPrice', 'bid', 'ask', 'change',
+                 'percentChange', 'volume', 'openInterest', 'impliedVolatility', 'inTheMoney',
+                 'contractSize', 'currency')
+
+
+def make_chain_frame(rng, num_strikes: int = 120):
+    """yfinance-shaped calls DataFrame with ascending (sometimes duplicated) half-dollar strikes."""
+    strike = np.sort(rng.integers(100, 100 + num_strikes, num_strikes) / 2.0)
+    bid = rng.uniform(0.0, 20.0, num_strikes)
+    data = {name: np.zeros(num_strikes) for name in CHAIN_COLUMNS}
+    data.update(
+        contractSymbol=[f"XYZ{i:06d}" for i in range(num_strikes)], strike=strike,
+        bid=bid, ask=bid + rng.uniform(0.0, 1.0, num_strikes),
+        impliedVolatility=rng.uniform(0.1, 1.5, num_strikes), contractSize='REGULAR', currency='USD',
+    )
+    return pd.DataFrame(data)
+
+
+def bench_atm(num_chains: int = 500, seed: int = 11):
+    """idxmin ATM lookup on yfinance DataFrames vs ChainSide.atm_index on the compact form."""
+    rng = np.random.default_rng(seed)
+    frames = [make_chain_frame(rng) for _ in range(num_chains)]
+    # Exact strikes and half-way points exercise the tie-breaking; the rest land anywhere incl. off the ends
+    prices = [float(rng.choice(df['strike'])) + rng.choice([0.0, 0.25, rng.uniform(-40, 40)]) for df in frames]
+    sides = [calculator.ChainSide.from_frame(df) for df in frames]
+
+    def frame_lookup():
+        return [(df['strike'] - p).abs().idxmin() for df, p in zip(frames, prices)]
+
+    def compact_lookup():
+        return [side.atm_index(p) for side, p in zip(sides, prices)]
+
+    for df, side, p, idx, pos in zip(frames, sides, prices, frame_lookup(), compact_lookup()):
+        row = df.loc[idx]
+        if (row['strike'], row['impliedVolatility'], row['bid'], row['ask']) != \
+                (side.strike[pos], side.iv[pos], side.bid[pos], side.ask[pos]):
+            raise AssertionError(f"ChainSide.atm_index disagrees with idxmin at price {p}")
+
+    frame_s = record('atm.idxmin', best_of(frame_lookup, repeat=3), chains=num_chains)
+    compact_s = record('atm.searchsorted', best_of(compact_lookup), chains=num_chains)
+    frame_kb = sum(len(pickle.dumps(df)) for df in frames) / num_chains / 1024
+    compact_kb = sum(len(pickle.dumps(side)) for side in sides) / num_chains / 1024
+    print(f"atm: {num_chains} chains, idxmin {frame_s * 1e3:.1f} ms vs searchsorted {compact_s * 1e3:.2f} ms "
+          f"({frame_s / compact_s:.0f}x); pickled {frame_kb:.1f} KiB vs {compact_kb:.1f} KiB per side")
+
+
+# Sizes the micro benchmarks sweep: history length, expiries per ticker, strikes per chain side, universe
+MICRO_HISTORY_DAYS = (63, 252, 1260)
+MICRO_EXPIRY_COUNTS = (4, 9, 16)
+MICRO_CHAIN_STRIKES = (50, 200, 1000)
+MICRO_UNIVERSE_SIZES = (100, 500, 5000)
+
+
+def bench_micro(seed: int = 3):
+    """Per-call timings of the per-ticker analytics at several universe and chain sizes."""
+    rng = np.random.default_rng(seed)
+    today = datetime.date.today()
+
+    for num_days in MICRO_HISTORY_DAYS:
+        frame = panel_to_frames(*make_ohlc_panel(num_days, 1, seed=seed))[0]
+        for last_only in (True, False):
+            report('yang_zhang', best_of(lambda: calculator.yang_zhang(frame, return_last_only=last_only), number=20),
+                   days=num_days, return_last_only=last_only)
+
+    for num_expiries in MICRO_EXPIRY_COUNTS:
+        dtes = np.sort(rng.choice(np.arange(1, 120), num_expiries, replace=False))
+        ivs = rng.uniform(0.15, 1.2, num_expiries)
+
+        def term_structure():
+            spline = calculator.build_term_structure(dtes, ivs)
+            return spline(30), spline(45), spline(dtes[0])
+
+        report('build_term_structure', best_of(term_structure, number=50), expiries=num_expiries)
+
+    for num_dates in (10, 50, 200):
+        offsets = rng.choice(np.arange(1, 800), num_dates - 1, replace=False).tolist() + [60]
+        dates = [(today + datetime.timedelta(days=int(d))).isoformat() for d in offsets]
+        report('filter_dates', best_of(lambda: calculator.filter_dates(dates), number=100), dates=num_dates)
+
+    for num_strikes in MICRO_CHAIN_STRIKES:
+        frame = make_chain_frame(rng, num_strikes)
+        report('chain_from_frame', best_of(lambda: calculator.ChainSide.from_frame(frame), number=20), strikes=num_strikes)
+        # make_chain_frame strikes span 50 .. 50 + num_strikes / 2; price the underlying mid-chain
+        price = 50.0 + num_strikes / 4.0 + 0.1
+        for num_expiries in MICRO_EXPIRY_COUNTS:
+            chains = {
+                (today + datetime.timedelta(days=7 * (i + 1))).isoformat(): calculator.OptionChain(
+                    calculator.ChainSide.from_frame(make_chain_frame(rng, num_strikes)),
+                    calculator.ChainSide.from_frame(make_chain_frame(rng, num_strikes)),
+                )
+                for i in range(num_expiries)
+            }
+            report('extract_atm_iv', best_of(lambda: calculator.extract_atm_iv(chains, price), number=20),
+                   expiries=num_expiries, strikes=num_strikes)
+
+    for num_results in MICRO_UNIVERSE_SIZES:
+        results = [
+            {'ticker': f"T{i:04d}", 'status': 'success' if rng.random() > 0.1 else 'error',
+             'score': int(rng.integers(0, 4)), 'result': {}}
+            for i in range(num_results)
+        ]
+
+        def rank():
+            ranking = calculator.LiveRanking()
+            for i, result in enumerate(results):
+                ranking.add(result, i)
+            return ranking.ranked()
+
+        report('ranking', best_of(rank), results=num_results)
+
+        table = pd.DataFrame({
+            'avg_volume': rng.lognormal(14.0, 1.0, num_results),
+            'iv30': rng.uniform(0.15, 1.2, num_results),
+            'iv30_rv30': rng.uniform(0.5, 2.0, num_results),
+            'ts_slope_0_45': rng.normal(-0.004, 0.004, num_results),
+            'expected_move': rng.uniform(1.0, 15.0, num_results),
+        }, index=[f"T{i:04d}" for i in range(num_results)])
+        report('apply_rules', best_of(lambda: calculator.apply_rules(table), number=10), rows=num_results)
+
+
+def bench_backtest(num_days: int = 252 * 5, num_tickers: int = 500):
+    """Full-history backtest of a whole universe: panel build, scores and bucket statistics."""
+    frames = panel_to_frames(*make_ohlc_panel(num_days, num_tickers))
+    histories = {f"T{j:03d}": frame for j, frame in enumerate(frames)}
+
+    def backtest():
+        panel = calculator.backtest_panel(histories)
+        score = calculator.backtest_signals(panel)
+        return calculator.backtest_stats(panel, score)
+
+    seconds = record('backtest', best_of(backtest, repeat=3), days=num_days, tickers=num_tickers)
+    print(f"backtest T={num_days} N={num_tickers}: {seconds:.2f} s")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str):
+    payload = {
+        'meta': {
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': RESULTS,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    print(f"wrote {len(RESULTS)} timings to {path}")
+
+
+def _result_key(result):
+    return result['name'], tuple(sorted(result['params'].items()))
+
+
+def compare_results(baseline_path: str, max_regression: float):
+    """Print current/baseline ratios for matching timings; returns the ones slower than `max_regression`."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    base_seconds = {_result_key(r): r['seconds'] for r in baseline['results']}
+    print(f"compared with {baseline_path} (revision {baseline['meta'].get('revision')}):")
+    regressions = []
+    for result in RESULTS:
+        before = base_seconds.get(_result_key(result))
+        if not before:
+            continue
+        ratio = result['seconds'] / before
+        label = " ".join(f"{key}={value}" for key, value in result['params'].items())
+        flag = "  <-- slower" if ratio > max_regression else ""
+        print(f"  {result['name']} {label}: {ratio:.2f}x{flag}")
+        if ratio > max_regression:
+            regressions.append(result)
+    return regressions
+
+
+BENCHMARKS = {
+    'yang_zhang': lambda args: (bench_yang_zhang(), bench_yang_zhang(num_days=252 * 5, num_tickers=500)),
+    'expiries': lambda args: bench_expiries(),
+    'atm': lambda args: bench_atm(),
+    'micro': lambda args: bench_micro(),
+    'backtest': lambda args: bench_backtest(),
+    'startup': lambda args: bench_startup(check=args.check),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for calculator.py")
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--check', action='store_true', help="exit non-zero when a regression guard trips")
+    parser.add_argument('--json', metavar='PATH', help="write every timing to PATH as JSON")
+    parser.add_argument('--compare', metavar='PATH', help="compare timings with an earlier --json file")
+    parser.add_argument('--max-regression', type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression for --compare --check (default: 1.25)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    for name in args.names or list(BENCHMARKS):
+        BENCHMARKS[name](args)
+    if args.json:
+        write_results(args.json)
+    if args.compare:
+        regressions = compare_results(args.compare, args.max_regression)
+        if args.check and regressions:
+            raise SystemExit(f"{len(regressions)} benchmark(s) regressed by more than {args.max_regression:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,17 +12,68 @@ __version__ = "1.0.9"
 __version_info__ = (1, 0, 9)
 VERSION = __version__
 
-import FreeSimpleGUI as sg
-import yfinance as yf
+import importlib
 from datetime import datetime, timedelta
-from scipy.interpolate import interp1d
-import numpy as np
+from collections import namedtuple, OrderedDict
+from zoneinfo import ZoneInfo
 import threading
-import requests
-from curl_cffi import requests as cfr
-import pandas as pd
+import multiprocessing
+import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import time
 import random
+import os
+import pickle
+import sqlite3
+import json
+import hashlib
+import re
+import sys
+import bisect
+import heapq
+import csv
+import argparse
+import contextlib
+from io import StringIO
+from email.utils import parsedate_to_datetime
+
+
+class _LazyModule:
+    """Module proxy that performs the real import on first attribute access.
+
+    Keeps `import calculator` cheap for headless jobs and tests; resolved
+    attributes are cached on the proxy so hot paths pay the lookup only once.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+# Heavy dependencies are imported on first use
+sg = _LazyModule('FreeSimpleGUI')
+yf = _LazyModule('yfinance')
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+requests = _LazyModule('requests')
+cfr = _LazyModule('curl_cffi.requests')
+scipy_interpolate = _LazyModule('scipy.interpolate')
 
 # List of popular stocks to analyze (S&P 500 top stocks + some popular tech stocks)
 POPULAR_STOCKS = [
@@ -30,7 +81,7 @@ POPULAR_STOCKS = [
     'JPM', 'V', 'PG', 'HD', 'MA', 'PFE', 'ABBV', 'AVGO', 'KO', 'PEP', 'TMO', 'COST',
     'DHR', 'MRK', 'ACN', 'VZ', 'ADBE', 'CRM', 'NFLX', 'PYPL', 'INTC', 'QCOM', 'AMD',
     'ORCL', 'IBM', 'CSCO', 'TXN', 'INTU', 'AMAT', 'MU', 'KLAC', 'LRCX', 'ADI', 'SNPS',
-    'CDNS', 'MCHP', 'AVGO', 'SWKS', 'QRVO', 'CRUS', 'SLAB', 'MXL', 'SMTC', 'DIOD',
+    'CDNS', 'MCHP', 'SWKS', 'QRVO', 'CRUS', 'SLAB', 'MXL', 'SMTC', 'DIOD',
     'ON', 'STM', 'NXP', 'ASML', 'TSM', 'UMC', 'SMIC', 'GFS', 'AMBA', 'LSCC', 'XLNX'
 ]
 
@@ -44,56 +95,151 @@ def normalize_symbol_for_yahoo(symbol: str) -> str:
     # Known special cases can be adjusted here if needed
     return symbol
 
-def get_sp500_stocks(limit: int | None = None):
-    """Get S&P 500 stocks from Wikipedia using pandas and normalize for Yahoo."""
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+# FIAT_SP500_URL points the constituent refresh elsewhere (e.g. fake_yahoo.py)
+SP500_URL = os.environ.get("FIAT_SP500_URL") or "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+# How long a stored constituent list is trusted before it is revalidated in the background
+SP500_REFRESH_SECONDS = 7 * 24 * 3600
+# Snapshot shipped with the program (bundled next to it when frozen); the list until the first download
+SP500_SNAPSHOT_PATH = os.path.join(getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__))),
+                                   "sp500_snapshot.json")
+
+_SP500_REFRESH_LOCK = threading.Lock()
+
+
+def _dedupe_symbols(symbols):
+    """Normalize for Yahoo and deduplicate while preserving order."""
+    seen = set()
+    cleaned = []
+    for s in symbols:
+        s = normalize_symbol_for_yahoo(s)
+        if s and s not in seen:
+            seen.add(s)
+            cleaned.append(s)
+    return cleaned
+
+
+def _parse_sp500_html(content: str):
+    """Extract constituent symbols from the Wikipedia page HTML."""
     try:
         # Use pandas to read tables robustly
-        tables = pd.read_html(url, flavor='lxml')
-        table = None
-        for t in tables:
+        for t in pd.read_html(StringIO(content), flavor='lxml'):
             if 'Symbol' in t.columns:
-                table = t
-                break
-        if table is not None:
-            symbols = [normalize_symbol_for_yahoo(s) for s in table['Symbol'].astype(str).tolist()]
-            # Deduplicate while preserving order
-            seen = set()
-            cleaned = []
-            for s in symbols:
-                if s and s not in seen:
-                    seen.add(s)
-                    cleaned.append(s)
-            if limit is not None:
-                cleaned = cleaned[:limit]
-            if cleaned:
-                return cleaned
+                cleaned = _dedupe_symbols(t['Symbol'].astype(str).tolist())
+                if cleaned:
+                    return cleaned
     except Exception as e:
         print(f"CLI: Warning: pandas read_html failed: {e}")
-    
-    # Fallback: requests + simple regex, then normalize
+
+    # Fallback: simple regex, then normalize
+    tickers = re.findall(r'<td><a[^>]*>([A-Za-z0-9.\-]{1,10})</a></td>', content)
+    return _dedupe_symbols(tickers)
+
+
+def _sp500_store_path() -> str:
+    return os.path.join(CACHE_DIR, "sp500_constituents.json")
+
+
+def _load_constituents(path: str):
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            import re
-            content = response.text
-            tickers = re.findall(r'<td><a[^>]*>([A-Za-z0-9.\-]{1,10})</a></td>', content)
-            symbols = [normalize_symbol_for_yahoo(s) for s in tickers]
-            seen = set()
-            cleaned = []
-            for s in symbols:
-                if s and s not in seen:
-                    seen.add(s)
-                    cleaned.append(s)
-            if limit is not None:
-                cleaned = cleaned[:limit]
-            if cleaned:
-                return cleaned
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get('symbols'):
+            return record
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        print(f"CLI: Warning: fallback regex scrape failed: {e}")
-    
-    # Final fallback to predefined list
-    return POPULAR_STOCKS
+        print(f"CLI: Warning: could not read constituent list {path}: {e}")
+    return None
+
+
+def _save_constituents(path: str, record: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def refresh_sp500_constituents(force: bool = False):
+    """Revalidate the stored S&P 500 list against Wikipedia (ETag / Last-Modified).
+
+    Returns the stored record, bumping its version only when the symbols change.
+    """
+    path = _sp500_store_path()
+    with _SP500_REFRESH_LOCK:
+        record = _load_constituents(path)
+        headers = {"User-Agent": f"FiatTradeCalculator/{__version__}"}
+        if record and not force:
+            if record.get('etag'):
+                headers["If-None-Match"] = record['etag']
+            if record.get('last_modified'):
+                headers["If-Modified-Since"] = record['last_modified']
+
+        response = requests.get(SP500_URL, headers=headers, timeout=10)
+        now = time.time()
+        if response.status_code == 304 and record:
+            record['checked_at'] = now
+            _save_constituents(path, record)
+            print("CLI: S&P 500 list unchanged (not modified)")
+            return record
+        response.raise_for_status()
+
+        symbols = _parse_sp500_html(response.text)
+        if not symbols:
+            raise ValueError("No symbols found in S&P 500 page")
+        version = (record or {}).get('version', 0)
+        if not record or record.get('symbols') != symbols:
+            version += 1
+        record = {
+            'version': version,
+            'symbols': symbols,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': now,
+            'checked_at': now,
+            'source': SP500_URL,
+        }
+        _save_constituents(path, record)
+        print(f"CLI: Stored S&P 500 list v{version} ({len(symbols)} symbols)")
+        return record
+
+
+def _refresh_sp500_quietly():
+    try:
+        refresh_sp500_constituents()
+    except Exception as e:
+        print(f"CLI: Warning: S&P 500 list refresh failed: {e}")
+
+
+def get_sp500_stocks(limit: int | None = None, refresh: bool = False):
+    """Get S&P 500 stocks from the locally stored list, revalidating it when stale.
+
+    A stale list is still used immediately while it is refreshed in the background;
+    Without a stored list the bundled snapshot of the same source is used the
+    same way, so only a first run without either waits on the network.
+    """
+    record = _load_constituents(_sp500_store_path())
+    if record is None:
+        snapshot = _load_constituents(SP500_SNAPSHOT_PATH)
+        # The snapshot copies the Wikipedia list; another FIAT_SP500_URL (e.g. fake_yahoo.py) is fetched instead
+        if snapshot and snapshot.get('source') == SP500_URL:
+            record = snapshot
+
+    is_stale = record is None or time.time() - record.get('checked_at', 0) > SP500_REFRESH_SECONDS
+    if (refresh or is_stale) and not CACHE_OFFLINE:
+        if record is None or refresh:
+            try:
+                record = refresh_sp500_constituents()
+            except Exception as e:
+                print(f"CLI: Warning: S&P 500 list download failed: {e}")
+        else:
+            threading.Thread(target=_refresh_sp500_quietly, daemon=True).start()
+
+    # Final fallback to predefined list; a ticker listed twice would be analyzed twice
+    symbols = list(dict.fromkeys(record['symbols'] if record else POPULAR_STOCKS))
+    if limit is not None:
+        symbols = symbols[:limit]
+    return symbols
 
 def filter_dates(dates):
     today = datetime.today().date()
@@ -133,22 +279,581 @@ def create_yf_session():
     })
     return session
 
-# Session pool for rotation
-YF_SESSIONS = [create_yf_session() for _ in range(3)]
-YF_SESSION_INDEX = 0
+# Scan telemetry: histogram bucket bounds (seconds) shared by every stage
+METRIC_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus-style cumulative export)."""
+
+    def __init__(self, bounds=METRIC_BUCKETS_S):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, snapshot: dict):
+        """Add another histogram's snapshot (same bounds) to this one."""
+        cumulative = [snapshot['buckets'][str(bound)] for bound in self.bounds] + [snapshot['count']]
+        for i, n in enumerate(cumulative):
+            self.counts[i] += n - (cumulative[i - 1] if i else 0)
+        self.count += snapshot['count']
+        self.sum += snapshot['sum_s']
+        self.max = max(self.max, snapshot['max_s'])
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        cumulative, seen = {}, 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            cumulative[str(bound)] = seen
+        cumulative['+Inf'] = self.count
+        return {
+            'count': self.count, 'sum_s': self.sum, 'max_s': self.max,
+            'p50_s': self.quantile(0.5), 'p95_s': self.quantile(0.95), 'p99_s': self.quantile(0.99),
+            'buckets': cumulative,
+        }
+
+
+class ScanMetrics:
+    """Per-run stage timings and counters, exportable as JSON or Prometheus text.
+
+    Stages: options, option_chain, price, history (per-ticker network fetches,
+    retries included), history_batch, atm_iv, analytics (term structure, volatility
+    and volume from the fetched data), ticker (a whole ticker),
+    http_request (one HTTP round trip), rate_limit_wait and backoff_sleep (time
+    blocked on the rate controller / sleeping between retries). Counters:
+    requests, throttled_responses, server_errors, retries, rate_limit_hits,
+    session_resets, cache_hits, cache_misses, memory_hits, memory_misses,
+    coalesced_requests, tickers_analyzed, tickers_skipped, tickers_prescreened.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = {}
+            self.counters = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, counter: str, n: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def merge(self, snapshot: dict):
+        """Add the counters and stage timings of another process's snapshot() to this run."""
+        with self._lock:
+            for counter, n in snapshot['counters'].items():
+                self.counters[counter] = self.counters.get(counter, 0) + n
+            for stage, h in snapshot['stages'].items():
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    histogram = self.stages[stage] = Histogram()
+                histogram.merge(h)
+
+    @contextlib.contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'elapsed_s': time.time() - self.started_at,
+                'counters': dict(sorted(self.counters.items())),
+                'stages': {name: h.snapshot() for name, h in sorted(self.stages.items())},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+        for name, value in snap['counters'].items():
+            lines += [f"# TYPE fiat_{name}_total counter", f"fiat_{name}_total {value}"]
+        lines += ["# HELP fiat_stage_seconds Time spent per scan stage.", "# TYPE fiat_stage_seconds histogram"]
+        for stage, h in snap['stages'].items():
+            for le, n in h['buckets'].items():
+                lines.append(f'fiat_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {n}')
+            lines.append(f'fiat_stage_seconds_sum{{stage="{stage}"}} {h["sum_s"]}')
+            lines.append(f'fiat_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Two-line human summary: counters, then where the time went."""
+        snap = self.snapshot()
+        c = snap['counters']
+        counts = (f"{c.get('requests', 0)} requests ({c.get('throttled_responses', 0)} throttled, "
+                  f"{c.get('server_errors', 0)} server errors), {c.get('retries', 0)} retries, "
+                  f"{c.get('rate_limit_hits', 0)} rate-limit hits, {c.get('session_resets', 0)} session resets; "
+                  f"tickers {c.get('tickers_analyzed', 0)} analyzed / {c.get('tickers_skipped', 0)} skipped; "
+                  f"memory cache {c.get('memory_hits', 0)} hits / {c.get('memory_misses', 0)} misses / "
+                  f"{c.get('coalesced_requests', 0)} coalesced")
+        times = ", ".join(
+            f"{stage} {h['sum_s']:.1f}s (n={h['count']}, p95 {h['p95_s']:.2f}s)"
+            for stage, h in snap['stages'].items()
+        )
+        return f"{counts}\nTime (summed over threads): {times or 'none'}"
+
+    def write(self, path: str, fmt: str | None = None):
+        """Write to `path`; `fmt` 'json' or 'prometheus' (default: by extension, .prom/.txt = Prometheus)."""
+        fmt = fmt or ('prometheus' if path.endswith(('.prom', '.txt')) else 'json')
+        text = self.to_prometheus() if fmt == 'prometheus' else self.to_json()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+METRICS = ScanMetrics()
+
+
+# Yahoo session pool: size and the health limits that get a single session replaced
+YF_SESSION_POOL_SIZE = int(os.environ.get("FIAT_SESSION_POOL_SIZE", "3"))
+SESSION_EVICT_CONSECUTIVE_FAILURES = 3
+SESSION_EVICT_LATENCY_S = 8.0
+SESSION_LATENCY_EWMA_ALPHA = 0.2
+
+
+class PooledSession:
+    """One curl_cffi session in the pool plus its health statistics."""
+
+    def __init__(self, session, slot: int):
+        self.session = session
+        self.slot = slot
+        self.created_at = time.time()
+        self.active_leases = 0
+        self.last_leased_at = 0.0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttles = 0
+        self.consecutive_failures = 0
+        self.latency_ewma = None
+        self.evicted = False
+
+    def unhealthy_reason(self) -> str | None:
+        """Why the session should be replaced: transport errors or 5xx in a row, or slow answers."""
+        if self.consecutive_failures >= SESSION_EVICT_CONSECUTIVE_FAILURES:
+            return f"{self.consecutive_failures} consecutive failures"
+        if self.requests >= 5 and self.latency_ewma is not None and self.latency_ewma > SESSION_EVICT_LATENCY_S:
+            return f"latency {self.latency_ewma:.1f}s"
+        return None
+
+    def stats(self) -> dict:
+        return {
+            'slot': self.slot,
+            'age_s': round(time.time() - self.created_at, 1),
+            'active_leases': self.active_leases,
+            'requests': self.requests,
+            'successes': self.successes,
+            'failures': self.failures,
+            'throttles': self.throttles,
+            'latency_ewma_s': None if self.latency_ewma is None else round(self.latency_ewma, 3),
+        }
+
+
+def _close_session_quietly(session):
+    try:
+        session.close()
+    except Exception:
+        pass
+
+
+class YahooSessionPool:
+    """Thread-safe pool of Yahoo sessions with lease/return semantics.
+
+    Each request leases the least busy session; outcomes are recorded per
+    session, and only a session that turns unhealthy is evicted and replaced,
+    so the others keep their warm connections.
+    """
+
+    def __init__(self, size: int = YF_SESSION_POOL_SIZE, factory=create_yf_session):
+        self.size = max(1, int(size))
+        self.factory = factory
+        self.evictions = 0
+        self._entries = []
+        self._next_slot = 0
+        self._router = None
+        self._lock = threading.Lock()
+
+    def _new_entry_locked(self) -> PooledSession:
+        entry = PooledSession(self.factory(), self._next_slot)
+        self._next_slot += 1
+        return entry
+
+    def _fill_locked(self):
+        while len(self._entries) < self.size:
+            self._entries.append(self._new_entry_locked())
+
+    def acquire(self) -> PooledSession:
+        """Lease the session with the fewest active leases (then least recently used)."""
+        with self._lock:
+            self._fill_locked()
+            entry = min(self._entries, key=lambda e: (e.active_leases, e.last_leased_at))
+            entry.active_leases += 1
+            entry.last_leased_at = time.monotonic()
+            return entry
+
+    def release(self, entry: PooledSession):
+        with self._lock:
+            entry.active_leases -= 1
+            close = entry.evicted and entry.active_leases == 0
+        if close:
+            _close_session_quietly(entry.session)
+
+    @contextlib.contextmanager
+    def lease(self):
+        entry = self.acquire()
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def record(self, entry: PooledSession, latency_s: float, ok: bool = True, throttled: bool = False):
+        """Record one request outcome and evict the session if it became unhealthy."""
+        with self._lock:
+            entry.requests += 1
+            if entry.latency_ewma is None:
+                entry.latency_ewma = latency_s
+            else:
+                entry.latency_ewma += SESSION_LATENCY_EWMA_ALPHA * (latency_s - entry.latency_ewma)
+            # A 429/403 is an account-wide rate limit, not a broken session; the rate controller handles it
+            if throttled:
+                entry.throttles += 1
+            elif ok:
+                entry.successes += 1
+                entry.consecutive_failures = 0
+            else:
+                entry.failures += 1
+                entry.consecutive_failures += 1
+            reason = entry.unhealthy_reason()
+            if reason and not entry.evicted:
+                self._evict_locked(entry, reason)
+
+    def _evict_locked(self, entry: PooledSession, reason: str):
+        try:
+            position = self._entries.index(entry)
+        except ValueError:
+            return
+        replacement = self._new_entry_locked()
+        self._entries[position] = replacement
+        entry.evicted = True
+        self.evictions += 1
+        METRICS.inc('session_resets')
+        print(f"CLI: Replacing Yahoo session #{entry.slot} with #{replacement.slot} ({reason})")
+        if entry.active_leases == 0:
+            _close_session_quietly(entry.session)
+
+    def evict_unhealthy(self) -> int:
+        """Replace every session that is currently unhealthy; returns how many were replaced."""
+        with self._lock:
+            doomed = [(e, e.unhealthy_reason()) for e in self._entries]
+            doomed = [(e, reason) for e, reason in doomed if reason]
+            for entry, reason in doomed:
+                self._evict_locked(entry, reason)
+        return len(doomed)
+
+    def resize(self, size: int):
+        with self._lock:
+            self.size = max(1, int(size))
+            while len(self._entries) > self.size:
+                entry = self._entries.pop()
+                entry.evicted = True
+                if entry.active_leases == 0:
+                    _close_session_quietly(entry.session)
+
+    def stats(self) -> list:
+        with self._lock:
+            return [entry.stats() for entry in self._entries]
+
+    @property
+    def router(self):
+        """Single session object handed to yfinance; it routes every request through the pool."""
+        with self._lock:
+            if self._router is None:
+                self._router = _routed_session_class()(self)
+            return self._router
+
+
+_ROUTED_SESSION_CLASS = None
+
+def _routed_session_class():
+    """curl_cffi Session subclass that sends each request through a leased pool session.
+
+    yfinance keeps one process-wide session and crumb, so it gets this router;
+    cookies live on the router and are shared by every pooled session, while
+    TLS and keep-alive state stay with each pooled session. Built on first use
+    so importing this module does not import curl_cffi.
+    """
+    global _ROUTED_SESSION_CLASS
+    if _ROUTED_SESSION_CLASS is None:
+        class RoutedYahooSession(cfr.Session):
+            def __init__(self, pool: YahooSessionPool):
+                super().__init__(impersonate="chrome124")
+                self.pool = pool
+
+            def request(self, method, url, *args, **kwargs):
+                url = rewrite_yahoo_url(url)
+                if kwargs.get('cookies') is None:
+                    kwargs['cookies'] = self.cookies
+                METRICS.inc('requests')
+                with self.pool.lease() as entry:
+                    start = time.perf_counter()
+                    try:
+                        response = entry.session.request(method, url, *args, **kwargs)
+                    except Exception:
+                        self.pool.record(entry, time.perf_counter() - start, ok=False)
+                        raise
+                    finally:
+                        METRICS.observe('http_request', time.perf_counter() - start)
+                    status = response.status_code
+                    throttled = status in (403, 429)
+                    if throttled:
+                        METRICS.inc('throttled_responses')
+                        # yfinance's exceptions drop the response, so Retry-After is only visible here
+                        YF_RATE_LIMITER.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                        _THROTTLE_REPORTED.seen = True
+                    elif status >= 500:
+                        METRICS.inc('server_errors')
+                    self.pool.record(entry, time.perf_counter() - start,
+                                     ok=status < 500 and not throttled, throttled=throttled)
+                self.cookies.update(response.cookies)
+                return response
+
+        _ROUTED_SESSION_CLASS = RoutedYahooSession
+    return _ROUTED_SESSION_CLASS
+
+
+YF_SESSION_POOL = YahooSessionPool()
 
 def get_yf_session():
-    """Get next session from the pool for rotation"""
-    global YF_SESSION_INDEX
-    session = YF_SESSIONS[YF_SESSION_INDEX]
-    YF_SESSION_INDEX = (YF_SESSION_INDEX + 1) % len(YF_SESSIONS)
-    return session
+    """Session to hand to yfinance; requests made through it are spread over YF_SESSION_POOL."""
+    return YF_SESSION_POOL.router
+
+def configure_session_pool(size: int):
+    """Change the number of pooled Yahoo sessions."""
+    YF_SESSION_POOL.resize(size)
+
+
+# Send every Yahoo request to another scheme://host[:port] instead (FIAT_YAHOO_BASE_URL), e.g. fake_yahoo.py
+YAHOO_BASE_URL = os.environ.get("FIAT_YAHOO_BASE_URL") or None
+_YAHOO_ORIGIN_RE = re.compile(r'^https?://[A-Za-z0-9.-]*yahoo\.com(?::\d+)?')
+
+
+def rewrite_yahoo_url(url):
+    """Replace the Yahoo origin of `url` with YAHOO_BASE_URL, keeping path and query."""
+    if YAHOO_BASE_URL and isinstance(url, str):
+        return _YAHOO_ORIGIN_RE.sub(YAHOO_BASE_URL.rstrip('/'), url, count=1)
+    return url
+
+
+def configure_endpoints(yahoo_base_url: str | None = None, sp500_url: str | None = None):
+    """Point the Yahoo and S&P 500 list requests at other servers (None keeps the current one)."""
+    global YAHOO_BASE_URL, SP500_URL
+    if yahoo_base_url is not None:
+        YAHOO_BASE_URL = yahoo_base_url or None
+    if sp500_url is not None:
+        SP500_URL = sp500_url
+
+
+# Concurrent scanning: worker count and the global request budget shared by all workers
+DEFAULT_SCAN_WORKERS = 1
+MAX_SCAN_WORKERS = 16
+# GUI results table: rows per page, and the minimum seconds between live redraws during a scan
+RESULTS_PAGE_SIZE = 100
+RESULTS_REFRESH_S = 0.5
+# Screening thresholds
+AVG_VOLUME_THRESHOLD = 1500000
+IV30_RV30_THRESHOLD = 1.25
+TS_SLOPE_THRESHOLD = -0.00406
+# Which option chains compute_recommendation downloads: 'minimal' (only what the metrics need) or 'all'
+EXPIRY_SELECTION_MODE = 'minimal'
+# Per-ticker cap on concurrent option-chain / price / history fetches
+TICKER_FETCH_CONCURRENCY = 4
+# Universe-wide history pre-stage: symbols per yf.download call and its internal threads
+HISTORY_BATCH_SIZE = 100
+HISTORY_DOWNLOAD_THREADS = 8
+# Adaptive request rate (AIMD): start rate, bounds, per-success increase and per-throttle decrease
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+MIN_REQUESTS_PER_SECOND = 0.2
+MAX_REQUESTS_PER_SECOND = 10.0
+RATE_ADDITIVE_INCREASE = 0.05
+RATE_MULTIPLICATIVE_DECREASE = 0.5
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second across all workers."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float, capacity: float | None = None):
+        """Change the refill rate (and optionally the burst capacity) in place."""
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available and consume them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_seconds = (tokens - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+class AdaptiveRateController(TokenBucket):
+    """Token bucket whose rate adapts to Yahoo's responses (AIMD).
+
+    Each successful request adds `increase` req/s up to `max_rate`; a 429/403
+    multiplies the rate by `decrease` (at most once per cooldown, so a burst of
+    throttled in-flight requests counts once) and drains the bucket. A
+    Retry-After value blocks every caller until it has elapsed.
+    """
+
+    def __init__(self, rate: float, min_rate: float = MIN_REQUESTS_PER_SECOND,
+                 max_rate: float = MAX_REQUESTS_PER_SECOND,
+                 increase: float = RATE_ADDITIVE_INCREASE,
+                 decrease: float = RATE_MULTIPLICATIVE_DECREASE):
+        super().__init__(rate, capacity=1.0)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.successes = 0
+        self.throttles = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+
+    def set_rate(self, rate: float, capacity: float | None = None):
+        clamped = min(self.max_rate, max(self.min_rate, float(rate)))
+        if clamped != float(rate):
+            print(f"CLI: Warning: {float(rate):g} req/s is outside {self.min_rate:g}-{self.max_rate:g} req/s; using {clamped:g} req/s")
+        super().set_rate(clamped, capacity if capacity is not None else 1.0)
+
+    def acquire(self, tokens: float = 1.0):
+        start = time.perf_counter()
+        while True:
+            with self._lock:
+                blocked_for = self._blocked_until - time.monotonic()
+            if blocked_for <= 0:
+                break
+            time.sleep(blocked_for)
+        super().acquire(tokens)
+        METRICS.observe('rate_limit_wait', time.perf_counter() - start)
+
+    def on_success(self, n: int = 1):
+        """Count `n` successful requests, raising the rate by `increase` for each."""
+        with self._lock:
+            self.successes += n
+            self.rate = min(self.max_rate, self.rate + self.increase * n)
+
+    def on_throttle(self, retry_after: float | None = None):
+        """Back off after a 429/403, honouring Retry-After (seconds) when given."""
+        with self._lock:
+            now = time.monotonic()
+            self.throttles += 1
+            # One decrease per round of in-flight requests
+            if now - self._last_decrease >= 1.0 / self.rate:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._tokens = 0.0
+            self._last_refill = now
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            rate = self.rate
+        suffix = f", retry after {retry_after:.0f}s" if retry_after else ""
+        print(f"CLI: Throttled by Yahoo; request rate lowered to {rate:.2f} req/s{suffix}")
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'rate': round(self.rate, 3),
+                'min_rate': self.min_rate,
+                'max_rate': self.max_rate,
+                'successes': self.successes,
+                'throttles': self.throttles,
+                'blocked_for_s': round(max(0.0, self._blocked_until - time.monotonic()), 1),
+            }
+
 
-def reset_yf_sessions():
-    """Reset all sessions to handle rate limiting"""
-    global YF_SESSIONS
-    YF_SESSIONS = [create_yf_session() for _ in range(3)]
-    print("CLI: Reset Yahoo Finance sessions due to rate limiting")
+# Every Yahoo request is paced by this controller (see retry_with_backoff)
+YF_RATE_LIMITER = AdaptiveRateController(DEFAULT_REQUESTS_PER_SECOND)
+# Set when the session router has already reported a throttled response on this thread
+_THROTTLE_REPORTED = threading.local()
+
+
+def _response_status(err):
+    response = getattr(err, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_throttle_error(err) -> bool:
+    """True when Yahoo rejected a request for rate limiting (HTTP 429/403 or equivalent message)."""
+    if _response_status(err) in (429, 403):
+        return True
+    error_str = str(err).lower()
+    return any(phrase in error_str for phrase in ['rate limit', 'too many requests', '429', 'quota exceeded'])
+
+
+def parse_retry_after(value) -> float | None:
+    """Seconds to wait from a Retry-After header value (delta-seconds or HTTP date), if any."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(tz=ZoneInfo("UTC"))).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(err) -> float | None:
+    """Retry-After of the response attached to an exception, if any (fallback for non-routed requests)."""
+    headers = getattr(getattr(err, 'response', None), 'headers', None)
+    return parse_retry_after(headers.get('Retry-After')) if headers else None
 
 
 def retry_with_backoff(operation, *, retries=3, base_delay_seconds=1.0, max_delay_seconds=8.0, exceptions=(Exception,), description="operation"):
@@ -158,18 +863,27 @@ def retry_with_backoff(operation, *, retries=3, base_delay_seconds=1.0, max_dela
     
     while attempt_index < retries:
         try:
-            return operation()
+            YF_RATE_LIMITER.acquire()
+            _THROTTLE_REPORTED.seen = False
+            result = operation()
+            YF_RATE_LIMITER.on_success()
+            return result
         except Exception as err:
             last_error = err
             attempt_index += 1
             
-            # Check if this is a rate limit error
-            error_str = str(err).lower()
-            if any(phrase in error_str for phrase in ['rate limit', 'too many requests', '429', 'quota exceeded']):
-                print(f"CLI: Rate limit detected for {description}, rotating sessions...")
-                reset_yf_sessions()
-                # Longer delay for rate limits
-                time.sleep(random.uniform(2.0, 5.0))
+            # Rate limits are paced by the shared controller instead of a local sleep
+            if is_throttle_error(err):
+                METRICS.inc('rate_limit_hits')
+                print(f"CLI: Rate limit detected for {description}")
+                # The session router already reported the 429/403 with its Retry-After
+                if not getattr(_THROTTLE_REPORTED, 'seen', False):
+                    YF_RATE_LIMITER.on_throttle(retry_after_seconds(err))
+                if attempt_index >= retries:
+                    break
+                print(f"CLI: Retry {attempt_index}/{retries} for {description} at {YF_RATE_LIMITER.rate:.2f} req/s...")
+                METRICS.inc('retries')
+                continue
             
             if attempt_index >= retries:
                 break
@@ -180,11 +894,391 @@ def retry_with_backoff(operation, *, retries=3, base_delay_seconds=1.0, max_dela
             sleep_seconds = backoff + jitter
             
             print(f"CLI: Retry {attempt_index}/{retries} for {description} in {sleep_seconds:.1f}s...")
-            time.sleep(sleep_seconds)
+            METRICS.inc('retries')
+            with METRICS.time('backoff_sleep'):
+                time.sleep(sleep_seconds)
     
     raise last_error if last_error else RuntimeError(f"{description} failed with unknown error")
 
 
+# Persistent on-disk cache for Yahoo responses (options list, option chains, price history)
+CACHE_DIR = os.environ.get("FIAT_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "fiat_stock_analyzer")
+CACHE_ENABLED = os.environ.get("FIAT_CACHE", "1") != "0"
+CACHE_OFFLINE = os.environ.get("FIAT_OFFLINE", "0") == "1"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Seconds an entry stays fresh while the US market is open; entries written while it is
+# closed stay valid until the next open, and entries never outlive the session close.
+CACHE_TTL_MARKET_OPEN = {
+    'options': 3600,
+    'option_chain': 300,
+    'history': 900,
+}
+MARKET_TIMEZONE = "America/New_York"
+MARKET_OPEN_TIME = (9, 30)
+MARKET_CLOSE_TIME = (16, 0)
+
+# Picklable stand-in for yfinance's per-call Options namedtuple
+OptionChain = namedtuple('OptionChain', ['calls', 'puts'])
+
+
+class ChainSide:
+    """One side (calls or puts) of an option chain, reduced to the columns the screen reads.
+
+    Rows are sorted by strike; the sort is stable, so duplicate strikes keep
+    yfinance's order. `bid`/`ask` are None when yfinance returned no such column.
+    """
+
+    __slots__ = ('strike', 'iv', 'bid', 'ask')
+
+    def __init__(self, strike, iv, bid=None, ask=None):
+        self.strike = strike
+        self.iv = iv
+        self.bid = bid
+        self.ask = ask
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Compact a yfinance calls/puts DataFrame; returns None when it has no strikes."""
+        if frame is None or isinstance(frame, cls):
+            return frame
+        if frame.empty or 'strike' not in frame:
+            return None
+        strike = frame['strike'].to_numpy(dtype=float)
+        keep = ~np.isnan(strike)
+        order = np.argsort(strike[keep], kind='stable')
+
+        def column(name):
+            if name not in frame:
+                return None
+            return np.ascontiguousarray(frame[name].to_numpy(dtype=float)[keep][order])
+
+        iv = column('impliedVolatility')
+        if iv is None:
+            iv = np.full(len(order), np.nan)
+        return cls(np.ascontiguousarray(strike[keep][order]), iv, column('bid'), column('ask'))
+
+    def __len__(self):
+        return len(self.strike)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.strike) == 0
+
+    def atm_index(self, price: float) -> int:
+        """Row of the strike nearest `price`; a tie goes to the lower strike, as idxmin does on yfinance's chains."""
+        strikes = self.strike
+        pos = int(np.searchsorted(strikes, price))
+        if pos == len(strikes) or (pos > 0 and price - strikes[pos - 1] <= strikes[pos] - price):
+            pos -= 1
+        # First row of that strike, matching idxmin on duplicates
+        return int(np.searchsorted(strikes, strikes[pos]))
+
+    def mid(self, index: int):
+        if self.bid is None or self.ask is None:
+            return None
+        return (self.bid[index] + self.ask[index]) / 2.0
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a requested response is not cached."""
+
+
+def _market_now(now: datetime | None = None) -> datetime:
+    tz = ZoneInfo(MARKET_TIMEZONE)
+    if now is None:
+        return datetime.now(tz)
+    if now.tzinfo is None:
+        return now.replace(tzinfo=tz)
+    return now.astimezone(tz)
+
+
+def _session_bounds(day: datetime):
+    open_dt = day.replace(hour=MARKET_OPEN_TIME[0], minute=MARKET_OPEN_TIME[1], second=0, microsecond=0)
+    close_dt = day.replace(hour=MARKET_CLOSE_TIME[0], minute=MARKET_CLOSE_TIME[1], second=0, microsecond=0)
+    return open_dt, close_dt
+
+
+def is_market_open(now: datetime | None = None) -> bool:
+    """Regular US equity session (weekdays 9:30–16:00 ET; exchange holidays are not modelled)."""
+    now = _market_now(now)
+    if now.weekday() >= 5:
+        return False
+    open_dt, close_dt = _session_bounds(now)
+    return open_dt <= now < close_dt
+
+
+def next_market_open(now: datetime | None = None) -> datetime:
+    """Start of the next regular session strictly after `now`."""
+    now = _market_now(now)
+    day = now
+    while True:
+        open_dt, _ = _session_bounds(day)
+        if day.weekday() < 5 and open_dt > now:
+            return open_dt
+        day = (day + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# Upper bound on market-hours TTLs for fetches made by the current thread (see cache_ttl_cap)
+_CACHE_TTL_CAP = threading.local()
+
+
+@contextlib.contextmanager
+def cache_ttl_cap(seconds: float):
+    """Within the block, this thread's cache entries stay fresh for at most `seconds` during market hours."""
+    previous = getattr(_CACHE_TTL_CAP, 'seconds', None)
+    _CACHE_TTL_CAP.seconds = seconds if previous is None else min(previous, seconds)
+    try:
+        yield
+    finally:
+        _CACHE_TTL_CAP.seconds = previous
+
+
+def cache_expiry(endpoint: str, fetched_at: datetime | None = None) -> float:
+    """Epoch seconds until which a response fetched at `fetched_at` is considered fresh."""
+    fetched_at = _market_now(fetched_at)
+    if is_market_open(fetched_at):
+        _, close_dt = _session_bounds(fetched_at)
+        ttl = CACHE_TTL_MARKET_OPEN.get(endpoint, 300)
+        cap = getattr(_CACHE_TTL_CAP, 'seconds', None)
+        if cap is not None:
+            ttl = min(ttl, cap)
+        return min(fetched_at.timestamp() + ttl, close_dt.timestamp())
+    return next_market_open(fetched_at).timestamp()
+
+
+class DiskCache:
+    """SQLite-backed cache keyed by (ticker, endpoint, key) with size-based LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES, offline: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " ticker TEXT NOT NULL, endpoint TEXT NOT NULL, key TEXT NOT NULL,"
+            " value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (ticker, endpoint, key))"
+        )
+        self._conn.commit()
+
+    def get(self, ticker: str, endpoint: str, key: str = "", allow_stale: bool = False):
+        """Return (hit, value); expired entries only count as hits when allow_stale is set."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE ticker=? AND endpoint=? AND key=?",
+                (ticker, endpoint, key),
+            ).fetchone()
+            if row is None or (row[1] <= now and not allow_stale):
+                return False, None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at=? WHERE ticker=? AND endpoint=? AND key=?",
+                (now, ticker, endpoint, key),
+            )
+            self._conn.commit()
+        return True, pickle.loads(row[0])
+
+    def put(self, ticker: str, endpoint: str, key: str, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (ticker, endpoint, key, blob, len(blob), now, cache_expiry(endpoint), now),
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT rowid, size FROM entries ORDER BY accessed_at").fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if total <= target:
+                break
+            doomed.append((rowid,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE rowid=?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+
+YF_DISK_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def configure_cache(enabled: bool = True, path: str | None = None, max_bytes: int | None = None, offline: bool = False):
+    """(Re)configure the on-disk response cache; offline=True serves only cached data."""
+    global YF_DISK_CACHE, CACHE_ENABLED, CACHE_OFFLINE
+    with _CACHE_LOCK:
+        CACHE_ENABLED = enabled
+        CACHE_OFFLINE = offline
+        YF_DISK_CACHE = None
+        MEMORY_CACHE.configure(MEMORY_CACHE_MAX_ENTRIES if enabled else 0)
+        if enabled:
+            YF_DISK_CACHE = DiskCache(
+                path or os.path.join(CACHE_DIR, "yahoo_cache.sqlite"),
+                max_bytes=max_bytes or CACHE_MAX_BYTES,
+                offline=offline,
+            )
+    return YF_DISK_CACHE
+
+
+def get_disk_cache():
+    """Return the shared DiskCache, opening it on first use (None when disabled)."""
+    if YF_DISK_CACHE is None and CACHE_ENABLED:
+        try:
+            configure_cache(enabled=True, offline=CACHE_OFFLINE)
+        except Exception as e:
+            print(f"CLI: Warning: disk cache unavailable: {e}")
+            configure_cache(enabled=False)
+    return YF_DISK_CACHE
+
+
+def _is_cacheable(value) -> bool:
+    # Empty answers are usually a symptom of throttling, never persist them
+    if value is None:
+        return False
+    if isinstance(value, pd.DataFrame):
+        return not value.empty
+    if isinstance(value, OptionChain):
+        return not (value.calls is None or value.puts is None or value.calls.empty or value.puts.empty)
+    try:
+        return len(value) > 0
+    except TypeError:
+        return True
+
+
+# In-process LRU in front of the disk cache (entries; 0 keeps only the coalescing of concurrent requests)
+MEMORY_CACHE_MAX_ENTRIES = int(os.environ.get("FIAT_MEMORY_CACHE_ENTRIES", "4096"))
+
+
+class _InFlight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MemoryCache:
+    """Size-bounded in-process LRU with single-flight fetches.
+
+    Entries expire like disk cache entries (cache_expiry). Concurrent
+    get_or_fetch calls for a key that is not cached share one fetch: the
+    first caller runs it, the others wait for its value or its exception.
+    """
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+
+    def configure(self, max_entries: int):
+        with self._lock:
+            self.max_entries = max_entries
+            self._entries.clear()
+
+    def get_or_fetch(self, key, fetch, endpoint: str):
+        """Cached value of `key`, else the result of one `fetch()` shared by every concurrent caller."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    METRICS.inc('memory_hits')
+                    return entry[1]
+                del self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            METRICS.inc('coalesced_requests')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        METRICS.inc('memory_misses')
+        try:
+            flight.value = fetch()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None and self.max_entries > 0 and _is_cacheable(flight.value):
+                    self._entries[key] = (cache_expiry(endpoint), flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            flight.done.set()
+        return flight.value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'hits': self.hits,
+                    'misses': self.misses, 'coalesced': self.coalesced, 'evictions': self.evictions}
+
+
+MEMORY_CACHE = MemoryCache(MEMORY_CACHE_MAX_ENTRIES if CACHE_ENABLED else 0)
+
+
+def cached_fetch(ticker: str, endpoint: str, fetch, key: str = "", stage: str | None = None):
+    """Serve `fetch()` through MEMORY_CACHE and the disk cache; in offline mode a miss raises CacheMiss.
+
+    Concurrent calls for the same (ticker, endpoint, key) share one fetch.
+    Network fetches are timed in METRICS under `stage` (default: the endpoint).
+    """
+    return MEMORY_CACHE.get_or_fetch(
+        (ticker, endpoint, key), lambda: _disk_cached_fetch(ticker, endpoint, fetch, key, stage), endpoint)
+
+
+def _disk_cached_fetch(ticker: str, endpoint: str, fetch, key: str, stage: str | None):
+    cache = get_disk_cache()
+    if cache is None:
+        with METRICS.time(stage or endpoint):
+            return fetch()
+    hit, value = cache.get(ticker, endpoint, key, allow_stale=cache.offline)
+    if hit:
+        METRICS.inc('cache_hits')
+        return value
+    METRICS.inc('cache_misses')
+    if cache.offline:
+        label = f"{endpoint}({key})" if key else endpoint
+        raise CacheMiss(f"Offline mode: no cached {label} for {ticker}")
+    with METRICS.time(stage or endpoint):
+        value = fetch()
+    if _is_cacheable(value):
+        try:
+            cache.put(ticker, endpoint, key, value)
+        except Exception as e:
+            print(f"CLI: Warning: failed to cache {endpoint} for {ticker}: {e}")
+    return value
+
+
 def yang_zhang(price_data, window=30, trading_periods=252, return_last_only=True):
     log_ho = (price_data['High'] / price_data['Open']).apply(np.log)
     log_lo = (price_data['Low'] / price_data['Open']).apply(np.log)
@@ -222,6 +1316,72 @@ def yang_zhang(price_data, window=30, trading_periods=252, return_last_only=True
         return result.dropna()
     
 
+def _rolling_sum(values, window):
+    """Trailing rolling sum along axis 0 using cumulative sums.
+
+    Matches pandas `rolling(window).sum()`: the first window-1 rows and any
+    window containing a NaN come out as NaN.
+    """
+    nan_mask = np.isnan(values)
+    csum = np.cumsum(np.where(nan_mask, 0.0, values), axis=0)
+    nan_count = np.cumsum(nan_mask, axis=0)
+
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return out
+    sums = csum[window - 1:].copy()
+    sums[1:] -= csum[:-window]
+    nans = nan_count[window - 1:].copy()
+    nans[1:] -= nan_count[:-window]
+    sums[nans > 0] = np.nan
+    out[window - 1:] = sums
+    return out
+
+
+def yang_zhang_batch(open_, high, low, close, window=30, trading_periods=252, return_last_only=True):
+    """Vectorized Yang-Zhang volatility for many tickers at once.
+
+    Inputs are aligned T×N arrays (rows are dates, columns are tickers; 1-D
+    inputs are treated as a single ticker). Returns the last value per ticker
+    (shape N) or the full T×N rolling series with NaN where `yang_zhang`
+    would have dropped rows.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    single = open_.ndim == 1
+    if single:
+        open_, high, low, close = (a[:, None] for a in (open_, high, low, close))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_ho = np.log(high / open_)
+        log_lo = np.log(low / open_)
+        log_co = np.log(close / open_)
+
+        prev_close = np.empty_like(close)
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+        log_oc_sq = np.log(open_ / prev_close) ** 2
+        log_cc_sq = np.log(close / prev_close) ** 2
+
+        rs = log_ho * (log_ho - log_co) + log_lo * (log_lo - log_co)
+
+        scale = 1.0 / (window - 1.0)
+        close_vol = _rolling_sum(log_cc_sq, window) * scale
+        open_vol = _rolling_sum(log_oc_sq, window) * scale
+        window_rs = _rolling_sum(rs, window) * scale
+
+        k = 0.34 / (1.34 + ((window + 1) / (window - 1)))
+        result = np.sqrt(open_vol + k * close_vol + (1 - k) * window_rs) * np.sqrt(trading_periods)
+
+    if single:
+        result = result[:, 0]
+    if return_last_only:
+        return result[-1]
+    return result
+
+
 def build_term_structure(days, ivs):
     days = np.array(days)
     ivs = np.array(ivs)
@@ -231,7 +1391,7 @@ def build_term_structure(days, ivs):
     ivs = ivs[sort_idx]
 
 
-    spline = interp1d(days, ivs, kind='linear', fill_value="extrapolate")
+    spline = scipy_interpolate.interp1d(days, ivs, kind='linear', fill_value="extrapolate")
 
     def term_spline(dte):
         if dte < days[0]:  
@@ -244,18 +1404,562 @@ def build_term_structure(days, ivs):
     return term_spline
 
 def get_current_price(ticker):
-    todays_data = retry_with_backoff(
-        lambda: ticker.history(period='1d'),
-        retries=3,
-        base_delay_seconds=0.75,
-        description="get_current_price: history(period='1d')",
-        exceptions=(Exception,)
-    )
+    todays_data = fetch_price_history(ticker, '1d')
     if 'Close' not in todays_data or todays_data.empty:
         raise ValueError("No Close data in today's history")
     return todays_data['Close'].iloc[0]
 
-def compute_recommendation(ticker):
+def latest_close(price_history):
+    """Most recent close in a daily history frame (today's bar while the market is open)."""
+    closes = price_history['Close'].dropna() if 'Close' in price_history else None
+    if closes is None or closes.empty:
+        raise ValueError("No Close data in price history")
+    return closes.iloc[-1]
+
+def fetch_price_history(stock, period='3mo'):
+    """Daily OHLCV for one yfinance Ticker, through the OHLCV store (daily bars) or the disk cache and retries."""
+    store = get_ohlcv_store() if period != '1d' else None
+    if store is not None:
+        frame = MEMORY_CACHE.get_or_fetch(
+            (stock.ticker, 'history', period),
+            lambda: store.sync([stock.ticker], period, offline=CACHE_OFFLINE).get(stock.ticker),
+            'history',
+        )
+        if frame is not None:
+            return frame
+    return cached_fetch(
+        stock.ticker,
+        'history',
+        lambda: retry_with_backoff(
+            lambda: stock.history(period=period),
+            retries=3,
+            base_delay_seconds=0.75,
+            description=f"history(period='{period}')",
+            exceptions=(Exception,)
+        ),
+        key=period,
+        stage='price' if period == '1d' else 'history',
+    )
+
+def _download_history_batch(batch, **window):
+    """One batched yf.download (window: period= or start=); returns {ticker: frame}, empty on failure."""
+    def download():
+        # yf.download issues one chart request per symbol; charge them all to the shared budget
+        for _ in batch[1:]:
+            YF_RATE_LIMITER.acquire()
+        return yf.download(
+            batch, interval='1d', group_by='ticker', auto_adjust=True,
+            actions=False, threads=min(len(batch), HISTORY_DOWNLOAD_THREADS), progress=False,
+            session=get_yf_session(), **window,
+        )
+
+    try:
+        with METRICS.time('history_batch'):
+            data = retry_with_backoff(download, retries=3, base_delay_seconds=1.0,
+                                      description=f"download history batch of {len(batch)}")
+    except Exception as e:
+        print(f"CLI: Warning: batched history download failed: {e}")
+        return {}
+    if data is None or data.empty:
+        return {}
+
+    frames = {}
+    for t in batch:
+        try:
+            frame = data[t] if isinstance(data.columns, pd.MultiIndex) else data
+        except KeyError:
+            continue
+        frame = frame.dropna(how='all')
+        if not frame.empty:
+            frames[t] = frame
+    # Every returned symbol was one successful chart request; retry_with_backoff reported the first
+    if len(frames) > 1:
+        YF_RATE_LIMITER.on_success(len(frames) - 1)
+    return frames
+
+def download_universe_history(tickers, period='3mo', batch_size=None):
+    """Daily OHLCV for a whole universe via batched yf.download calls.
+
+    With the OHLCV store enabled the bars come from it (see OHLCVStore.sync).
+    Otherwise tickers already in the disk cache are served from it and the rest
+    are downloaded `batch_size` symbols per call. Returns {ticker: DataFrame};
+    tickers whose download failed are simply missing (callers fall back to
+    per-ticker history).
+    """
+    batch_size = batch_size or HISTORY_BATCH_SIZE
+    store = get_ohlcv_store()
+    if store is not None:
+        return store.sync(tickers, period, batch_size=batch_size, offline=CACHE_OFFLINE)
+
+    histories = {}
+    cache = get_disk_cache()
+    pending = []
+    for t in dict.fromkeys(tickers):
+        hit, value = cache.get(t, 'history', period, allow_stale=cache.offline) if cache else (False, None)
+        if hit:
+            histories[t] = value
+        elif not (cache and cache.offline):
+            pending.append(t)
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        print(f"CLI: Downloading {period} history for {len(batch)} tickers "
+              f"({start + len(batch)}/{len(pending)})")
+        for t, frame in _download_history_batch(batch, period=period).items():
+            histories[t] = frame
+            if cache:
+                try:
+                    cache.put(t, 'history', period, frame)
+                except Exception as e:
+                    print(f"CLI: Warning: failed to cache history for {t}: {e}")
+    return histories
+
+
+# Local OHLCV store: append-only daily bars per ticker under CACHE_DIR/ohlcv. Updates refetch from this many
+# calendar days before the last stored bar, so a split/dividend re-adjustment shows up as changed old bars.
+OHLCV_STORE_ENABLED = os.environ.get("FIAT_OHLCV_STORE", "1") != "0"
+OHLCV_OVERLAP_DAYS = 3
+OHLCV_MATCH_RTOL = 1e-6
+OHLCV_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+_OHLCV_DTYPE = None
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def _ohlcv_dtype():
+    global _OHLCV_DTYPE
+    if _OHLCV_DTYPE is None:
+        _OHLCV_DTYPE = np.dtype([('date', '<M8[D]')] + [(c, '<f8') for c in OHLCV_COLUMNS])
+    return _OHLCV_DTYPE
+
+
+def period_start(period: str, today=None):
+    """First calendar day covered by a yfinance period ('3mo', '5y', ...); None for 'max'."""
+    if period == 'max':
+        return None
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Unsupported history period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    today = today or datetime.now(ZoneInfo(MARKET_TIMEZONE)).date()
+    offset = {'d': pd.DateOffset(days=n), 'wk': pd.DateOffset(weeks=n),
+              'mo': pd.DateOffset(months=n), 'y': pd.DateOffset(years=n)}[unit]
+    return (pd.Timestamp(today) - offset).date()
+
+
+def ohlcv_records(frame):
+    """Daily bars of a yfinance history frame as a date-sorted record array (one row per date, last wins)."""
+    records = np.empty(len(frame), dtype=_ohlcv_dtype())
+    records['date'] = _date_index(frame.index).to_numpy().astype('datetime64[D]')
+    for c in OHLCV_COLUMNS:
+        records[c] = frame[c].to_numpy(dtype=float) if c in frame else np.nan
+    # yfinance can repeat today's bar; keep the last row of every date
+    _, last = np.unique(records['date'][::-1], return_index=True)
+    return records[len(records) - 1 - last]
+
+
+class OHLCVStore:
+    """Daily OHLCV per ticker in append-only files of fixed-size records, read through np.memmap.
+
+    Frames handed out are zero-copy views of the mapping. New bars are
+    appended; when Yahoo revises stored bars (today's unfinished bar, or a
+    split/dividend re-adjustment) the bars are written to a new generation
+    file (<ticker>.<generation>.bars) instead of replacing a file that may be
+    mapped, which Windows refuses. Older generations are deleted once nothing
+    maps them any more (on POSIX right away, as open mappings keep their
+    data). A small JSON sidecar per ticker records the current generation,
+    the covered window and the last sync time.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or os.path.join(CACHE_DIR, 'ohlcv')
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str, suffix: str = '.json') -> str:
+        return os.path.join(self.directory, ticker.replace('/', '_') + suffix)
+
+    def _bars_path(self, ticker: str, generation: int | None = None) -> str:
+        if generation is None:
+            generation = self.meta(ticker).get('generation', 0)
+        return self._path(ticker, f'.{generation}.bars')
+
+    def bars(self, ticker: str):
+        """Memory-mapped record array of the stored bars (None when nothing is stored)."""
+        path = self._bars_path(ticker)
+        try:
+            count = os.path.getsize(path) // _ohlcv_dtype().itemsize
+        except OSError:
+            return None
+        if not count:
+            return None
+        # An append racing this read leaves a partial record at the end; map whole records only
+        return np.memmap(path, dtype=_ohlcv_dtype(), mode='r', shape=(count,))
+
+    def meta(self, ticker: str) -> dict:
+        try:
+            with open(self._path(ticker), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, ticker: str, meta: dict):
+        path = self._path(ticker)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def frame(self, ticker: str, start=None):
+        """Stored bars from `start` on as a DataFrame whose columns view the mapping (no copy)."""
+        bars = self.bars(ticker)
+        if bars is None:
+            return None
+        if start is not None:
+            bars = bars[int(np.searchsorted(bars['date'], np.datetime64(start, 'D'))):]
+        index = pd.DatetimeIndex(bars['date'], name='Date')
+        return pd.DataFrame({c: bars[c] for c in OHLCV_COLUMNS}, index=index, copy=False)
+
+    def _rewrite(self, ticker: str, records):
+        """Write `records` as the ticker's next generation and make it current."""
+        meta = self.meta(ticker)
+        generation = meta.get('generation', 0) + 1
+        path = self._bars_path(ticker, generation)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        np.asarray(records).tofile(tmp)
+        os.replace(tmp, path)
+        meta['generation'] = generation
+        self._write_meta(ticker, meta)
+        self._remove_old_generations(ticker, generation)
+
+    def _remove_old_generations(self, ticker: str, current: int):
+        # The previous generation stays for readers that looked up the generation just before the swap
+        prefix = ticker.replace('/', '_') + '.'
+        for name in os.listdir(self.directory):
+            middle = name[len(prefix):-len('.bars')]
+            if not (name.startswith(prefix) and name.endswith('.bars') and middle.isdigit()):
+                continue
+            if int(middle) < current - 1:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass  # still mapped (Windows); retried after the next rewrite
+
+    def merge(self, ticker: str, records, full: bool = False) -> str:
+        """Fold downloaded bars into the ticker's file; returns 'append', 'rewrite', 'stale' or 'unchanged'.
+
+        'stale' means Yahoo changed bars before the last stored one (history
+        was re-adjusted): nothing is written and the ticker needs a full refetch.
+        """
+        with self._lock:
+            existing = None if full else self.bars(ticker)
+            if existing is None:
+                self._rewrite(ticker, records)
+                return 'rewrite'
+            if not len(records):
+                return 'unchanged'
+            first = int(np.searchsorted(existing['date'], records['date'][0]))
+            old = existing[first:]
+            pos = np.minimum(np.searchsorted(records['date'], old['date']), len(records) - 1)
+            new = records[pos]
+            if not (new['date'] == old['date']).all():
+                return 'stale'
+            same = np.ones(len(old), dtype=bool)
+            for c in OHLCV_COLUMNS:
+                same &= np.isclose(old[c], new[c], rtol=OHLCV_MATCH_RTOL, atol=0.0, equal_nan=True)
+            if not same[:-1].all():
+                return 'stale'
+            if len(old) and not same[-1]:
+                # Only the latest bar moved (it was still forming): swap in prefix + fresh bars
+                self._rewrite(ticker, np.concatenate([existing[:first], records]))
+                return 'rewrite'
+            tail = records[records['date'] > existing['date'][-1]]
+            if not len(tail):
+                return 'unchanged'
+            with open(self._bars_path(ticker), 'ab') as f:
+                f.write(tail.tobytes())
+            return 'append'
+
+    def sync(self, tickers, period: str = '3mo', batch_size: int | None = None, offline: bool = False):
+        """Update `tickers` and return {ticker: frame of the last `period`} read from the store.
+
+        Tickers synced within the history cache TTL (cache_expiry) are not
+        fetched. The others download only the bars from OHLCV_OVERLAP_DAYS
+        before their last stored bar, or their whole window when nothing (or a
+        shorter window) is stored or the overlap shows re-adjusted history.
+        Tickers whose bars could not be stored are left out of the result, so
+        callers download them directly instead of reading outdated bars.
+        """
+        batch_size = batch_size or HISTORY_BATCH_SIZE
+        start = period_start(period)
+        tickers = list(dict.fromkeys(tickers))
+        jobs = {}  # (fetch from, full) -> tickers
+        failed = set()
+        now = time.time()
+        for t in ([] if offline else tickers):
+            meta = self.meta(t)
+            bars = self.bars(t)
+            covered = meta.get('covered_from')
+            if bars is None or not covered or not (meta.get('since_inception') or (start and covered <= start.isoformat())):
+                jobs.setdefault((start, True), []).append(t)
+            elif now >= cache_expiry('history', datetime.fromtimestamp(meta.get('synced_at', 0), ZoneInfo(MARKET_TIMEZONE))):
+                last = bars['date'][-1].astype(object)
+                jobs.setdefault((last - timedelta(days=OHLCV_OVERLAP_DAYS), False), []).append(t)
+            else:
+                METRICS.inc('history_store_hits')
+
+        while jobs:
+            (fetch_from, full), group = jobs.popitem()
+            for i in range(0, len(group), batch_size):
+                batch = group[i:i + batch_size]
+                window = {'start': fetch_from.isoformat()} if fetch_from else {'period': 'max'}
+                print(f"CLI: Updating stored history of {len(batch)} tickers from {fetch_from or 'the start'}"
+                      f"{' (full)' if full else ''}")
+                for t, frame in _download_history_batch(batch, **window).items():
+                    records = ohlcv_records(frame)
+                    METRICS.inc('history_bars_downloaded', len(records))
+                    try:
+                        status = self.merge(t, records, full=full)
+                    except OSError as e:
+                        print(f"CLI: Warning: failed to store history for {t}: {e}")
+                        failed.add(t)
+                        continue
+                    with self._lock:
+                        meta = self.meta(t)
+                        if status == 'stale':
+                            covered = meta.get('covered_from')
+                            refetch = min(filter(None, (start, covered and datetime.strptime(covered, "%Y-%m-%d").date())),
+                                          default=None)
+                            jobs.setdefault((refetch, True), []).append(t)
+                            continue
+                        if full and len(records):
+                            # A 'max' download starts at the first bar Yahoo has, so it covers any window
+                            first_bar = records['date'][0].astype(object).isoformat()
+                            meta['since_inception'] = fetch_from is None or bool(
+                                meta.get('since_inception') and fetch_from.isoformat() <= meta.get('covered_from', ''))
+                            meta['covered_from'] = fetch_from.isoformat() if fetch_from else first_bar
+                        meta['synced_at'] = time.time()
+                        self._write_meta(t, meta)
+
+        histories = {}
+        for t in tickers:
+            frame = None if t in failed else self.frame(t, start)
+            if frame is not None and not frame.empty:
+                histories[t] = frame
+        return histories
+
+
+OHLCV_STORE = None
+
+
+def get_ohlcv_store():
+    """Shared OHLCVStore under CACHE_DIR/ohlcv (None when the store or the cache is disabled)."""
+    global OHLCV_STORE
+    if not (OHLCV_STORE_ENABLED and CACHE_ENABLED):
+        return None
+    with _CACHE_LOCK:
+        if OHLCV_STORE is None:
+            try:
+                OHLCV_STORE = OHLCVStore()
+            except OSError as e:
+                print(f"CLI: Warning: OHLCV store unavailable: {e}")
+                return None
+    return OHLCV_STORE
+
+def average_volume_30d(price_history):
+    """Mean volume over the last complete 30-bar window."""
+    return price_history['Volume'].rolling(30).mean().dropna().iloc[-1]
+
+def _stack_trailing(histories, tickers, column, length):
+    """T×N array of each ticker's last `length` values of `column`, right-aligned.
+
+    Aligning by position (not by date) keeps every column's rolling windows
+    identical to the per-ticker computation.
+    """
+    panel = np.full((length, len(tickers)), np.nan)
+    for j, t in enumerate(tickers):
+        values = histories[t][column].to_numpy(dtype=float)[-length:]
+        if len(values):
+            panel[length - len(values):, j] = values
+    return panel
+
+def _last_valid(panel):
+    """Last non-NaN value of every column (NaN when a column has none)."""
+    valid = ~np.isnan(panel)
+    last_idx = panel.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    values = panel[last_idx, np.arange(panel.shape[1])]
+    values[~valid.any(axis=0)] = np.nan
+    return values
+
+def prescreen_universe(histories, window=30):
+    """Cheap universe-wide stage computed from price history alone.
+
+    Returns a DataFrame indexed by ticker with the 30-day average volume,
+    30-day Yang-Zhang realized volatility, whether the volume criterion passes
+    and the best score the ticker can still reach (volume + the two
+    option-based criteria).
+    """
+    tickers = [t for t, h in histories.items() if h is not None and not h.empty]
+    if not tickers:
+        return pd.DataFrame(columns=['avg_volume', 'rv30', 'volume_ok', 'max_score'])
+    length = max(len(histories[t]) for t in tickers)
+    fields = {c: _stack_trailing(histories, tickers, c, length) for c in ('Open', 'High', 'Low', 'Close', 'Volume')}
+
+    avg_volume = _last_valid(_rolling_sum(fields['Volume'], window) / window)
+    rv30 = yang_zhang_batch(fields['Open'], fields['High'], fields['Low'], fields['Close'], window=window)
+    volume_ok = avg_volume >= AVG_VOLUME_THRESHOLD
+    return pd.DataFrame({
+        'avg_volume': avg_volume,
+        'rv30': rv30,
+        'volume_ok': volume_ok,
+        'max_score': volume_ok.astype(int) + 2,
+    }, index=tickers)
+
+def plan_scan_order(tickers, screen, min_score: int | None, policy: str = 'skip'):
+    """Order in which to fetch option chains given a pre-screen.
+
+    Tickers whose best reachable score is below `min_score` are dropped
+    (policy 'skip') or moved to the end of the queue (policy 'defer').
+    Returns (ordered universe positions, skipped tickers).
+    """
+    if policy not in ('skip', 'defer'):
+        raise ValueError(f"Unknown pre-screen policy: {policy}")
+    order = list(range(len(tickers)))
+    if not min_score or screen is None or screen.empty:
+        return order, []
+    max_scores = screen['max_score'].to_dict()
+    # Tickers without history are unknown, never filter them
+    hopeless = {i for i, t in enumerate(tickers) if max_scores.get(t, 3) < min_score}
+    kept = [i for i in order if i not in hopeless]
+    skipped = [tickers[i] for i in order if i in hopeless]
+    if policy == 'defer':
+        return kept + [i for i in order if i in hopeless], []
+    return kept, skipped
+
+def select_expirations(exp_dates, mode: str | None = None, today=None):
+    """Expiries whose option chains the screen needs.
+
+    'all' keeps every expiry returned by filter_dates. 'minimal' keeps the
+    nearest expiry (straddle and the short end of the slope) plus the expiries
+    bracketing 30 and 45 DTE, which is all the linear term structure needs to
+    evaluate iv30 and the 0–45 slope exactly.
+    """
+    mode = mode or EXPIRY_SELECTION_MODE
+    if mode == 'all':
+        return list(exp_dates)
+    if mode != 'minimal':
+        raise ValueError(f"Unknown expiry selection mode: {mode}")
+    if not exp_dates:
+        return []
+    today = today or datetime.today().date()
+    dtes = [(d, (datetime.strptime(d, "%Y-%m-%d").date() - today).days) for d in exp_dates]
+    keep = {exp_dates[0]}
+    for target in (30, 45):
+        below = [d for d, dte in dtes if dte <= target]
+        above = [d for d, dte in dtes if dte >= target]
+        if below:
+            keep.add(below[-1])
+        if above:
+            keep.add(above[0])
+    return [d for d in exp_dates if d in keep]
+
+def extract_atm_iv(options_chains, underlying_price):
+    """ATM IV per expiry (mean of call and put IV at the strike nearest the price).
+
+    Returns (atm_iv, straddle) where straddle is the ATM call+put mid of the
+    first expiry with a usable ATM IV, or None.
+    """
+    atm_iv = {}
+    straddle = None
+    i = 0
+    for exp_date, chain in options_chains.items():
+        # from_frame passes compact sides through and converts DataFrames from older cache entries
+        calls = ChainSide.from_frame(getattr(chain, 'calls', None))
+        puts = ChainSide.from_frame(getattr(chain, 'puts', None))
+
+        if calls is None or puts is None or calls.empty or puts.empty:
+            continue
+
+        call_idx = calls.atm_index(underlying_price)
+        call_iv = calls.iv[call_idx]
+
+        put_idx = puts.atm_index(underlying_price)
+        put_iv = puts.iv[put_idx]
+
+        if np.isnan(call_iv) or np.isnan(put_iv):
+            continue
+
+        atm_iv_value = (call_iv + put_iv) / 2.0
+        atm_iv[exp_date] = atm_iv_value
+
+        if i == 0:
+            call_mid = calls.mid(call_idx)
+            put_mid = puts.mid(put_idx)
+
+            if call_mid is not None and put_mid is not None:
+                straddle = (call_mid + put_mid)
+
+        i += 1
+    return atm_iv, straddle
+
+def term_structure_metrics(atm_iv, today=None):
+    """Term-structure inputs of the screen from {expiry: ATM IV}: nearest DTE, iv30 and the 0–45 slope."""
+    today = today or datetime.today().date()
+    dtes = []
+    ivs = []
+    for exp_date, iv in atm_iv.items():
+        exp_date_obj = datetime.strptime(exp_date, "%Y-%m-%d").date()
+        days_to_expiry = (exp_date_obj - today).days
+        dtes.append(days_to_expiry)
+        ivs.append(iv)
+
+    term_spline = build_term_structure(dtes, ivs)
+
+    return {
+        'dte0': dtes[0],
+        'iv30': term_spline(30),
+        'ts_slope_0_45': (term_spline(45) - term_spline(dtes[0])) / (45 - dtes[0]),
+    }
+
+def _submit_chain_fetches(executor, stock, ticker, exp_dates):
+    """Submit one cached, retried option_chain fetch per expiry; returns {expiry: future}."""
+    return {
+        exp_date: executor.submit(
+            cached_fetch,
+            ticker,
+            'option_chain',
+            lambda d=exp_date: retry_with_backoff(
+                lambda: _fetch_option_chain(stock, d),
+                retries=3,
+                base_delay_seconds=0.75,
+                description=f"fetch option_chain({d})",
+                exceptions=(Exception,)
+            ),
+            key=exp_date,
+        )
+        for exp_date in exp_dates
+    }
+
+def _collect_chains(chain_futures):
+    options_chains = {}
+    for exp_date, future in chain_futures.items():
+        try:
+            options_chains[exp_date] = future.result()
+        except Exception:
+            # Skip this expiration if it fails after retries
+            continue
+    return options_chains
+
+def _fetch_option_chain(stock, exp_date):
+    chain = stock.option_chain(exp_date)
+    return OptionChain(ChainSide.from_frame(getattr(chain, 'calls', None)),
+                       ChainSide.from_frame(getattr(chain, 'puts', None)))
+
+def compute_recommendation(ticker, price_history=None, expiry_mode: str | None = None):
+    """Screen one ticker.
+
+    `price_history` (3mo daily OHLCV) skips both per-ticker history calls;
+    `expiry_mode` picks which option chains are downloaded (see select_expirations).
+    """
     try:
         ticker = ticker.strip().upper()
         if not ticker:
@@ -265,12 +1969,16 @@ def compute_recommendation(ticker):
         stock = yf.Ticker(ticker, session=get_yf_session())
 
         try:
-            stock_options = retry_with_backoff(
-                lambda: list(stock.options),
-                retries=3,
-                base_delay_seconds=0.75,
-                description="fetch options list",
-                exceptions=(Exception,)
+            stock_options = cached_fetch(
+                ticker,
+                'options',
+                lambda: retry_with_backoff(
+                    lambda: list(stock.options),
+                    retries=3,
+                    base_delay_seconds=0.75,
+                    description="fetch options list",
+                    exceptions=(Exception,)
+                ),
             )
             if len(stock_options) == 0:
                 return f"Error: No options found for stock symbol '{ticker}'."
@@ -282,112 +1990,79 @@ def compute_recommendation(ticker):
         except Exception:
             return "Error: Not enough option data."
 
-        options_chains = {}
-        for exp_date in exp_dates:
-            try:
-                chain = retry_with_backoff(
-                    lambda d=exp_date: stock.option_chain(d),
-                    retries=3,
-                    base_delay_seconds=0.75,
-                    description=f"fetch option_chain({exp_date})",
-                    exceptions=(Exception,)
-                )
-                options_chains[exp_date] = chain
-            except Exception:
-                # Skip this expiration if it fails after retries
-                continue
+        selected_dates = select_expirations(exp_dates, expiry_mode)
 
+        # Chains, current price and 3mo history are independent, so fetch them concurrently.
+        # Price and history go first so they are not queued behind the chains.
+        executor = ThreadPoolExecutor(max_workers=TICKER_FETCH_CONCURRENCY, thread_name_prefix=f"fetch-{ticker}")
         try:
-            underlying_price = get_current_price(stock)
-            if underlying_price is None:
-                raise ValueError("No market price found.")
-        except Exception as price_err:
-            return f"Error: Unable to retrieve underlying stock price: {price_err}"
-
-        atm_iv = {}
-        straddle = None
-        i = 0
-        for exp_date, chain in options_chains.items():
-            calls = getattr(chain, 'calls', None)
-            puts = getattr(chain, 'puts', None)
-
-            if calls is None or puts is None or calls.empty or puts.empty:
-                continue
-
-            if 'strike' not in calls or 'strike' not in puts:
-                continue
-
-            call_diffs = (calls['strike'] - underlying_price).abs()
-            call_idx = call_diffs.idxmin()
-            call_iv = calls.loc[call_idx].get('impliedVolatility', np.nan)
-
-            put_diffs = (puts['strike'] - underlying_price).abs()
-            put_idx = put_diffs.idxmin()
-            put_iv = puts.loc[put_idx].get('impliedVolatility', np.nan)
-
-            if np.isnan(call_iv) or np.isnan(put_iv):
-                continue
-
-            atm_iv_value = (call_iv + put_iv) / 2.0
-            atm_iv[exp_date] = atm_iv_value
-
-            if i == 0:
-                call_bid = calls.loc[call_idx].get('bid')
-                call_ask = calls.loc[call_idx].get('ask')
-                put_bid = puts.loc[put_idx].get('bid')
-                put_ask = puts.loc[put_idx].get('ask')
-
-                call_mid = ((call_bid + call_ask) / 2.0) if call_bid is not None and call_ask is not None else None
-                put_mid = ((put_bid + put_ask) / 2.0) if put_bid is not None and put_ask is not None else None
-
-                if call_mid is not None and put_mid is not None:
-                    straddle = (call_mid + put_mid)
+            if price_history is None:
+                price_future = executor.submit(get_current_price, stock)
+                history_future = executor.submit(fetch_price_history, stock, '3mo')
+            else:
+                # Underlying price and volatility inputs come from the pre-downloaded universe history
+                price_future = history_future = None
+            chain_futures = _submit_chain_fetches(executor, stock, ticker, selected_dates)
+            options_chains = _collect_chains(chain_futures)
 
-            i += 1
+            try:
+                if price_future is not None:
+                    underlying_price = price_future.result()
+                else:
+                    underlying_price = latest_close(price_history)
+                if underlying_price is None:
+                    raise ValueError("No market price found.")
+            except Exception as price_err:
+                return f"Error: Unable to retrieve underlying stock price: {price_err}"
+
+            with METRICS.time('atm_iv'):
+                atm_iv, straddle = extract_atm_iv(options_chains, underlying_price)
+            if len(selected_dates) < len(exp_dates) and set(selected_dates) - set(atm_iv):
+                # A needed expiry gave no ATM IV: fetch the rest so the metrics match the full term structure
+                remaining = [d for d in exp_dates if d not in selected_dates]
+                options_chains.update(_collect_chains(_submit_chain_fetches(executor, stock, ticker, remaining)))
+                options_chains = {d: options_chains[d] for d in exp_dates if d in options_chains}
+                atm_iv, straddle = extract_atm_iv(options_chains, underlying_price)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
         if not atm_iv:
             return "Error: Could not determine ATM IV for any expiration dates."
 
-        today = datetime.today().date()
-        dtes = []
-        ivs = []
-        for exp_date, iv in atm_iv.items():
-            exp_date_obj = datetime.strptime(exp_date, "%Y-%m-%d").date()
-            days_to_expiry = (exp_date_obj - today).days
-            dtes.append(days_to_expiry)
-            ivs.append(iv)
-
-        term_spline = build_term_structure(dtes, ivs)
+        if history_future is not None:
+            price_history = history_future.result()
 
-        ts_slope_0_45 = (term_spline(45) - term_spline(dtes[0])) / (45 - dtes[0])
-
-        price_history = retry_with_backoff(
-            lambda: stock.history(period='3mo'),
-            retries=3,
-            base_delay_seconds=0.75,
-            description="history(period='3mo')",
-            exceptions=(Exception,)
-        )
+        with METRICS.time('analytics'):
+            term_metrics = term_structure_metrics(atm_iv)
+            ts_slope_0_45 = term_metrics['ts_slope_0_45']
 
-        iv30_rv30 = term_spline(30) / yang_zhang(price_history)
+            iv30_rv30 = term_metrics['iv30'] / yang_zhang(price_history)
 
-        avg_volume = price_history['Volume'].rolling(30).mean().dropna().iloc[-1]
+            avg_volume = average_volume_30d(price_history)
 
-        expected_move = str(round(straddle / underlying_price * 100, 2)) + "%" if straddle else None
+            expected_move = str(round(straddle / underlying_price * 100, 2)) + "%" if straddle else None
 
         return {
-            'avg_volume': avg_volume >= 1500000,
-            'iv30_rv30': iv30_rv30 >= 1.25,
-            'ts_slope_0_45': ts_slope_0_45 <= -0.00406,
-            'expected_move': expected_move
+            'avg_volume': avg_volume >= AVG_VOLUME_THRESHOLD,
+            'iv30_rv30': iv30_rv30 >= IV30_RV30_THRESHOLD,
+            'ts_slope_0_45': ts_slope_0_45 <= TS_SLOPE_THRESHOLD,
+            'expected_move': expected_move,
+            # Raw values behind the three checks, for consumers that care how close a ticker is to a threshold
+            'metrics': {
+                'avg_volume': avg_volume,
+                'iv30': term_metrics['iv30'],
+                'iv30_rv30': iv30_rv30,
+                'expected_move': straddle / underlying_price * 100 if straddle else None,
+                'ts_slope_0_45': ts_slope_0_45,
+            },
         }
     except Exception as e:
         return f"Error: {e}"
         
-def analyze_stock_auto(ticker):
+def analyze_stock_auto(ticker, price_history=None, expiry_mode: str | None = None):
     """Analyze a single stock and return results with ticker info"""
     try:
-        result = compute_recommendation(ticker)
+        result = compute_recommendation(ticker, price_history=price_history, expiry_mode=expiry_mode)
         if isinstance(result, dict):
             # Calculate score for ranking
             score = 0
@@ -412,120 +2087,1088 @@ def analyze_stock_auto(ticker):
         print(f"CLI: Exception analyzing {ticker}: {e}")
         return None
 
-def auto_analyze_stocks(progress_callback=None, list_limit: int | None = None):
-    """Automatically analyze multiple stocks and return ranked results (include errors)."""
+class ScanState:
+    """Failure tracking shared by every worker of a single scan run.
+
+    Request pacing lives in YF_RATE_LIMITER; this only decides when a streak
+    of failed tickers warrants checking the session pool for unhealthy sessions.
+    """
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        """Register a skipped/failed ticker and evict unhealthy sessions if failures pile up."""
+        with self._lock:
+            self.consecutive_failures += 1
+            check_sessions = self.consecutive_failures >= 5
+            if check_sessions:
+                self.consecutive_failures = 0  # Reset counter after the health check
+        if check_sessions:
+            replaced = YF_SESSION_POOL.evict_unhealthy()
+            print(f"CLI: Too many consecutive failures, replaced {replaced} unhealthy session(s)")
+
+
+def _scan_ticker(ticker, state: ScanState, price_history=None, expiry_mode: str | None = None):
+    """Analyze one ticker for a scan, updating the shared backoff state."""
+    try:
+        with METRICS.time('ticker'):
+            result = analyze_stock_auto(ticker, price_history=price_history, expiry_mode=expiry_mode)
+    except Exception as e:
+        print(f"CLI: ❌ {ticker} exception={e}")
+        METRICS.inc('tickers_skipped')
+        state.record_failure()
+        return None
+
+    if result is not None:
+        METRICS.inc('tickers_analyzed')
+        state.record_success()
+        if result.get('status') == 'success':
+            data = result.get('result', {})
+            print(
+                f"CLI: ✅ {ticker} score={result.get('score')} "
+                f"vol={data.get('avg_volume')} ivrv={data.get('iv30_rv30')} "
+                f"slope={data.get('ts_slope_0_45')} move={data.get('expected_move')}"
+            )
+        else:
+            print(f"CLI: ❌ {ticker} error={result.get('result')}")
+    else:
+        print(f"CLI: ⏭️ Skipping {ticker}: No listed options on Yahoo Finance or data fetch failed (rate limit)")
+        METRICS.inc('tickers_skipped')
+        state.record_failure()
+    return result
+
+
+def _result_sort_key(item):
+    """Successes first by score desc, then errors."""
+    is_error = 1 if item.get('status') != 'success' else 0
+    score_value = item.get('score', 0)
+    return (is_error, -score_value)
+
+
+class LiveRanking:
+    """Ranking of scan results maintained incrementally while a scan runs.
+
+    Entries are kept in final sort order (see _result_sort_key, ties broken by
+    universe position), so `ranked()` at the end equals the serial ranking.
+    """
+
+    def __init__(self, top_k: int | None = None):
+        self.top_k = top_k
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def add(self, result, order: int):
+        with self._lock:
+            bisect.insort(self._entries, (_result_sort_key(result), order, result), key=lambda e: e[:2])
+
+    def top(self, k: int | None = None):
+        """Current best `k` results (defaults to top_k, or all)."""
+        k = k if k is not None else self.top_k
+        with self._lock:
+            entries = self._entries if k is None else self._entries[:k]
+            return [entry[2] for entry in entries]
+
+    def ranked(self):
+        return self.top(len(self))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Scan checkpoint journals live under CACHE_DIR/scans and are pruned after this many days
+SCAN_JOURNAL_MAX_AGE_DAYS = 7
+
+
+def scan_run_id(params: dict, day=None) -> str:
+    """Default run ID: the scan parameters plus the date, so a same-day rerun finds the interrupted journal."""
+    day = day or _market_now().date()
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+    return f"scan-{day:%Y%m%d}-{digest}"
+
+
+class ScanJournal:
+    """Append-only JSON-lines checkpoint of one scan run.
+
+    The first line holds the run ID and parameters; every analyzed ticker
+    (including ones that were skipped) appends one line with its result, so a
+    resumed run only has to analyze the tickers that are not in the journal.
+    A torn last line left by a crash is ignored on load.
+    """
+
+    def __init__(self, run_id: str, params: dict, directory: str | None = None):
+        self.run_id = run_id
+        self.params = params
+        self.directory = directory or os.path.join(CACHE_DIR, 'scans')
+        self.path = os.path.join(self.directory, f"{run_id}.jsonl")
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """{ticker: result or None} of an earlier run with this ID; {} when there is none."""
+        completed = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return completed
+        for n, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if n == 0:
+                if entry.get('params') != self.params:
+                    raise ValueError(f"Scan journal {self.run_id} was written with different parameters")
+                continue
+            completed[entry['ticker']] = entry.get('result')
+        return completed
+
+    def open(self, resume: bool):
+        """Start appending; without `resume` an existing journal for this run is replaced."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._prune()
+        fresh = not resume or not os.path.exists(self.path)
+        self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+        if fresh:
+            self._write({'run_id': self.run_id, 'params': self.params, 'started': _market_now().isoformat()})
+        return self
+
+    def record(self, ticker: str, result):
+        self._write({'ticker': ticker, 'result': _to_builtin_tree(result)})
+
+    def _write(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            # Flush every line: the point is surviving a crash mid-scan
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _prune(self):
+        cutoff = time.time() - SCAN_JOURNAL_MAX_AGE_DAYS * 86400
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith('.jsonl') and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _to_builtin_tree(value):
+    """_to_builtin applied through nested dicts/lists, for JSON."""
+    if isinstance(value, dict):
+        return {k: _to_builtin_tree(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin_tree(v) for v in value]
+    return _to_builtin(value)
+
+
+def iter_analyze_stocks(progress_callback=None, list_limit: int | None = None,
+                        max_workers: int = DEFAULT_SCAN_WORKERS,
+                        requests_per_second: float | None = None,
+                        bulk_history: bool = True,
+                        ranking: LiveRanking | None = None,
+                        prescreen_min_score: int | None = None,
+                        prescreen_policy: str = 'skip',
+                        expiry_mode: str | None = None,
+                        resume: bool = False,
+                        run_id: str | None = None,
+                        checkpoint: bool = True):
+    """Analyze the universe and yield each result as soon as it is computed.
+
+    With max_workers > 1 tickers are analyzed concurrently (results arrive in
+    completion order); all workers share YF_RATE_LIMITER. Pass a LiveRanking
+    to have every result added to it before it is yielded. With bulk_history
+    the 3mo OHLCV for the whole universe is downloaded up front and supplies
+    each ticker's price, volatility and volume inputs. With prescreen_min_score
+    that history first feeds prescreen_universe, and tickers that cannot reach
+    the score are skipped or deferred (prescreen_policy) before any option
+    chain is fetched; only the volume criterion is known at that point, so
+    only a minimum score of 3 can exclude anything. `expiry_mode` is passed to compute_recommendation.
+
+    With checkpoint every analyzed ticker is appended to a ScanJournal keyed
+    by `run_id` (default: scan_run_id of the parameters). With resume the
+    tickers already in that journal are not analyzed again; their stored
+    results are yielded first.
+
+    Stage timings and counters for the run are collected in METRICS (reset at
+    the start) and summarized when the scan finishes.
+    """
     stocks_to_analyze = get_sp500_stocks(limit=list_limit)
     
-    results = []
     total_stocks = len(stocks_to_analyze)
     analysis_start_ts = time.perf_counter()
+    # METRICS describes one run at a time
+    METRICS.reset()
+    max_workers = max(1, int(max_workers or 1))
+    if requests_per_second:
+        YF_RATE_LIMITER.set_rate(requests_per_second)
     
-    # Track consecutive failures for adaptive rate limiting
-    consecutive_failures = 0
-    base_delay = 1.0
-    
-    for i, ticker in enumerate(stocks_to_analyze):
-        try:
+    # Failure tracking for adaptive rate limiting is shared by all workers of this run
+    state = ScanState()
+
+    histories = {}
+    if bulk_history or prescreen_min_score:
+        if progress_callback:
+            progress_callback(0, f"Downloading price history for {total_stocks} tickers...")
+        histories = download_universe_history(stocks_to_analyze, period='3mo')
+        print(f"CLI: Price history ready for {len(histories)}/{total_stocks} tickers")
+
+    order = list(range(total_stocks))
+    if prescreen_min_score:
+        screen = prescreen_universe(histories)
+        order, skipped = plan_scan_order(stocks_to_analyze, screen, prescreen_min_score, prescreen_policy)
+        deferred = int((screen['max_score'] < prescreen_min_score).sum()) if prescreen_policy == 'defer' else 0
+        print(f"CLI: Pre-screen (min score {prescreen_min_score}): {len(skipped)} skipped, {deferred} deferred")
+        METRICS.inc('tickers_prescreened', len(skipped))
+        for ticker in skipped:
+            print(f"CLI: ⏭️ Skipping {ticker}: cannot reach score {prescreen_min_score} (low volume)")
+        total_stocks = len(order)
+
+    finished = []
+    journal = None
+    if checkpoint or resume:
+        params = {'list_limit': list_limit, 'expiry_mode': expiry_mode or EXPIRY_SELECTION_MODE,
+                  'bulk_history': bulk_history,
+                  'prescreen_min_score': prescreen_min_score, 'prescreen_policy': prescreen_policy}
+        journal = ScanJournal(run_id or scan_run_id(params), params)
+        completed = journal.load() if resume else {}
+        journal.open(resume)
+        if completed:
+            pending = []
+            for i in order:
+                ticker = stocks_to_analyze[i]
+                if ticker not in completed:
+                    pending.append(i)
+                elif completed[ticker] is not None:
+                    if ranking is not None:
+                        ranking.add(completed[ticker], i)
+                    finished.append(completed[ticker])
+                    yield completed[ticker]
+            print(f"CLI: Resuming {journal.run_id}: {len(order) - len(pending)} tickers restored from the journal, "
+                  f"{len(pending)} left")
+            order = pending
+            total_stocks = len(order)
+        else:
+            print(f"CLI: Checkpointing scan to {journal.path}")
+
+    try:
+        for result in _run_scan(stocks_to_analyze, order, histories, state, ranking, journal,
+                                progress_callback, max_workers, expiry_mode):
+            finished.append(result)
+            yield result
+    finally:
+        if journal is not None:
+            journal.close()
+    record_metrics_table(finished, stocks_to_analyze)
+
+    elapsed_s = time.perf_counter() - analysis_start_ts
+    print(f"CLI: Analysis finished in {elapsed_s:.1f}s. Rate controller: {YF_RATE_LIMITER.status()}")
+    for line in METRICS.summary().splitlines():
+        print(f"CLI: Metrics: {line}")
+
+
+def _run_scan(stocks_to_analyze, order, histories, state: ScanState, ranking, journal,
+              progress_callback, max_workers: int, expiry_mode):
+    """Analyze `order` (indices into stocks_to_analyze), serially or on a thread pool, yielding results."""
+    total_stocks = len(order)
+    result_count = 0
+    if max_workers == 1:
+        for n, i in enumerate(order):
+            ticker = stocks_to_analyze[i]
             # Update progress
             if progress_callback:
-                progress = int((i / total_stocks) * 100)
-                progress_callback(progress, f"Analyzing {ticker}... ({i+1}/{total_stocks})")
-            print(f"CLI: Analyzing {ticker} ({i+1}/{total_stocks})")
-            
-            # Adaptive delay based on consecutive failures
-            if i > 0:
-                if consecutive_failures > 2:
-                    # Increase delay if we're hitting rate limits
-                    base_delay = min(5.0, base_delay * 1.5)
-                    delay = base_delay + random.uniform(0.5, 2.0)
-                    print(f"CLI: Increased delay to {delay:.1f}s due to consecutive failures")
-                else:
-                    delay = base_delay + random.uniform(0.2, 0.8)
-                
-                time.sleep(delay)
+                progress = int((n / total_stocks) * 100)
+                progress_callback(progress, f"Analyzing {ticker}... ({n+1}/{total_stocks})")
+            print(f"CLI: Analyzing {ticker} ({n+1}/{total_stocks}) @ {YF_RATE_LIMITER.rate:.2f} req/s")
             
-            result = analyze_stock_auto(ticker)
+            result = _scan_ticker(ticker, state, histories.get(ticker), expiry_mode)
+            if journal is not None:
+                journal.record(ticker, result)
             if result is not None:
-                results.append(result)
-                consecutive_failures = 0  # Reset on success
-                if result.get('status') == 'success':
-                    data = result.get('result', {})
-                    print(
-                        f"CLI: ✅ {ticker} score={result.get('score')} "
-                        f"vol={data.get('avg_volume')} ivrv={data.get('iv30_rv30')} "
-                        f"slope={data.get('ts_slope_0_45')} move={data.get('expected_move')}"
-                    )
-                else:
-                    print(f"CLI: ❌ {ticker} error={result.get('result')}")
-            else:
-                consecutive_failures += 1
-                print(f"CLI: ⏭️ Skipping {ticker}: No listed options on Yahoo Finance or data fetch failed (rate limit)")
-                
-                # If we're hitting rate limits, add extra delay
-                if consecutive_failures > 1:
-                    extra_delay = handle_rate_limit_delay(consecutive_failures)
-                    print(f"CLI: Adding extra delay of {extra_delay:.1f}s due to rate limiting...")
-                    time.sleep(extra_delay)
-                    
-                    # Reset sessions if we're getting too many failures
-                    if consecutive_failures >= 5:
-                        print("CLI: Too many consecutive failures, resetting sessions...")
-                        reset_yf_sessions()
-                        consecutive_failures = 0  # Reset counter after session reset
-            
+                result_count += 1
+                if ranking is not None:
+                    ranking.add(result, i)
+                yield result
+    else:
+        print(f"CLI: Scanning {total_stocks} tickers with {max_workers} workers "
+              f"at {YF_RATE_LIMITER.rate:.1f} req/s")
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan")
+        try:
+            futures = {
+                executor.submit(_scan_ticker, stocks_to_analyze[i], state,
+                                histories.get(stocks_to_analyze[i]), expiry_mode): i
+                for i in order
+            }
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                result = future.result()
+                ticker = stocks_to_analyze[i]
+                if progress_callback:
+                    progress = int((done_count / total_stocks) * 100)
+                    progress_callback(progress, f"Analyzed {ticker}... ({done_count}/{total_stocks})")
+                print(f"CLI: Analyzed {ticker} ({done_count}/{total_stocks}) @ {YF_RATE_LIMITER.rate:.2f} req/s")
+                if journal is not None:
+                    journal.record(ticker, result)
+                if result is not None:
+                    result_count += 1
+                    if ranking is not None:
+                        ranking.add(result, i)
+                    yield result
+        finally:
+            # Also reached when the consumer stops iterating early
+            executor.shutdown(wait=False, cancel_futures=True)
+    print(f"CLI: Analyzed {total_stocks} tickers, {result_count} results")
+
+
+def auto_analyze_stocks(progress_callback=None, list_limit: int | None = None,
+                        result_callback=None, processes: int = 1, **scan_options):
+    """Automatically analyze multiple stocks and return ranked results (include errors).
+
+    Thin wrapper over iter_analyze_stocks, or iter_sharded_scan when
+    processes > 1 (`scan_options` are passed through); `result_callback(result)`
+    is invoked for every analyzed ticker as soon as its result is ready. The
+    ranking is identical for serial, concurrent and sharded runs.
+    """
+    ranking = LiveRanking()
+    if processes > 1:
+        results = iter_sharded_scan(progress_callback, list_limit, processes=processes, ranking=ranking, **scan_options)
+    else:
+        results = iter_analyze_stocks(progress_callback, list_limit, ranking=ranking, **scan_options)
+    for result in results:
+        if result_callback:
+            result_callback(result)
+    return ranking.ranked()
+
+# Watch mode: rescan intervals, and how close (relative distance) to a threshold counts as "near"
+WATCH_MIN_INTERVAL_S = 120
+WATCH_MAX_INTERVAL_S = 3600
+WATCH_NEAR_BAND = 0.25
+
+
+def threshold_distance(metrics: dict) -> float | None:
+    """Relative distance of the nearer of iv30_rv30 / ts_slope_0_45 to its threshold (0 = on it)."""
+    distances = []
+    iv_ratio = metrics.get('iv30_rv30')
+    if iv_ratio is not None and np.isfinite(iv_ratio) and iv_ratio > 0:
+        distances.append(abs(np.log(iv_ratio / IV30_RV30_THRESHOLD)))
+    slope = metrics.get('ts_slope_0_45')
+    if slope is not None and np.isfinite(slope):
+        distances.append(abs(slope - TS_SLOPE_THRESHOLD) / abs(TS_SLOPE_THRESHOLD))
+    return float(min(distances)) if distances else None
+
+
+def rescan_interval(result, previous_score=None,
+                    min_interval_s: float = WATCH_MIN_INTERVAL_S,
+                    max_interval_s: float = WATCH_MAX_INTERVAL_S) -> float:
+    """Seconds until a ticker is due again.
+
+    A changed score means the minimum interval; otherwise the interval grows
+    linearly with the distance to the nearest threshold and reaches the maximum
+    at WATCH_NEAR_BAND. Failed tickers wait the maximum.
+    """
+    if result is None or result.get('status') != 'success':
+        return max_interval_s
+    if previous_score is not None and result.get('score') != previous_score:
+        return min_interval_s
+    distance = threshold_distance(result['result'].get('metrics') or {})
+    if distance is None:
+        return max_interval_s
+    return min_interval_s + (max_interval_s - min_interval_s) * min(distance / WATCH_NEAR_BAND, 1.0)
+
+
+class WatchScheduler:
+    """Long-running scanner that keeps the latest result per ticker fresh.
+
+    Tickers sit in a heap ordered by when they are next due (see
+    rescan_interval); up to `max_workers` due tickers are analyzed at a time,
+    all paced by YF_RATE_LIMITER, which is the request budget. Cached
+    responses fetched by a rescan stay fresh for at most `min_interval_s`, so a
+    rescan never just returns the previous answer. Every finished scan is
+    published to `on_update(update)` from the thread calling run().
+    """
+
+    def __init__(self, tickers, max_workers: int = DEFAULT_SCAN_WORKERS, on_update=None,
+                 expiry_mode: str | None = None,
+                 min_interval_s: float = WATCH_MIN_INTERVAL_S,
+                 max_interval_s: float = WATCH_MAX_INTERVAL_S,
+                 clock=time.monotonic):
+        self.tickers = list(tickers)
+        self.max_workers = max(1, int(max_workers or 1))
+        self.on_update = on_update
+        self.expiry_mode = expiry_mode
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.clock = clock
+        self.latest = {}
+        self.scans = 0
+        self._state = ScanState()
+        self._seq = 0
+        self._due = []
+        self._stop = threading.Event()
+        now = clock()
+        for ticker in self.tickers:
+            self._schedule(ticker, now)
+
+    def _schedule(self, ticker: str, due_at: float):
+        self._seq += 1
+        heapq.heappush(self._due, (due_at, self._seq, ticker))
+
+    def stop(self):
+        self._stop.set()
+
+    def ranked(self):
+        """Latest results in ranking order."""
+        ranking = LiveRanking()
+        for i, ticker in enumerate(self.tickers):
+            result = self.latest.get(ticker)
+            if result is not None:
+                ranking.add(result, i)
+        return ranking.ranked()
+
+    def run(self, max_scans: int | None = None):
+        """Scan until stop() is called (or `max_scans` tickers have been analyzed)."""
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="watch")
+        running = {}
+        try:
+            while not self._stop.is_set():
+                now = self.clock()
+                started = self.scans + len(running)
+                while (self._due and self._due[0][0] <= now and len(running) < self.max_workers
+                       and (max_scans is None or started < max_scans)):
+                    _, _, ticker = heapq.heappop(self._due)
+                    running[executor.submit(self._scan, ticker)] = ticker
+                    started += 1
+                if not running:
+                    if max_scans is not None and self.scans >= max_scans:
+                        break
+                    # Nothing in flight: sleep until the next ticker is due (re-checking stop regularly)
+                    wait_s = self._due[0][0] - now if self._due else 1.0
+                    self._stop.wait(min(max(wait_s, 0.0), 1.0))
+                    continue
+                done, _ = wait(running, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(running.pop(future), future)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _scan(self, ticker: str):
+        with cache_ttl_cap(self.min_interval_s):
+            return _scan_ticker(ticker, self._state, None, self.expiry_mode)
+
+    def _finish(self, ticker: str, future):
+        try:
+            result = future.result()
         except Exception as e:
-            consecutive_failures += 1
             print(f"CLI: ❌ {ticker} exception={e}")
-            
-            # Check if this is a rate limit error
-            if is_rate_limited_error(str(e)):
-                extra_delay = handle_rate_limit_delay(consecutive_failures)
-                print(f"CLI: Rate limit detected, adding delay of {extra_delay:.1f}s...")
-                time.sleep(extra_delay)
-                
-                # Reset sessions if we're getting too many failures
-                if consecutive_failures >= 5:
-                    print("CLI: Too many consecutive failures, resetting sessions...")
-                    reset_yf_sessions()
-                    consecutive_failures = 0  # Reset counter after session reset
-    
-    # Sort results: successes first by score desc, then errors
-    def sort_key(item):
-        is_error = 1 if item.get('status') != 'success' else 0
-        score_value = item.get('score', 0)
-        return (is_error, -score_value)
+            result = None
+        previous = self.latest.get(ticker)
+        previous_score = previous.get('score') if previous is not None else None
+        interval_s = rescan_interval(result, previous_score, self.min_interval_s, self.max_interval_s)
+        if result is not None:
+            self.latest[ticker] = result
+        self.scans += 1
+        self._schedule(ticker, self.clock() + interval_s)
+        if self.on_update:
+            self.on_update({
+                'ticker': ticker,
+                'result': result,
+                'previous_score': previous_score,
+                'changed': result is not None and previous_score is not None and result.get('score') != previous_score,
+                'next_scan_s': interval_s,
+            })
+
+
+# Sharded scans: tickers leased per queue round trip, how long a lease lasts before another
+# worker may take the tickers over, and how often the coordinating process polls for results
+QUEUE_LEASE_BATCH = 25
+QUEUE_LEASE_SECONDS = 900
+QUEUE_POLL_SECONDS = 1.0
+
+
+class ScanQueue:
+    """SQLite work queue holding one scan's tickers, shared by worker processes or hosts.
+
+    Task positions are universe positions, so the merged ranking is the one a
+    single-process scan produces. Leases expire, so tickers held by a worker
+    that died are handed out again. The default rollback journal is kept (no
+    WAL) so the file can also sit on a filesystem shared between hosts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Autocommit; writes that must be atomic use an explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " position INTEGER PRIMARY KEY, ticker TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', worker TEXT, leased_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, result TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS worker_metrics (worker TEXT PRIMARY KEY, snapshot TEXT NOT NULL)")
+
+    @classmethod
+    def create(cls, path: str, tickers, params: dict):
+        if os.path.exists(path):
+            raise FileExistsError(f"Scan queue already exists: {path}")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        queue = cls(path)
+        with queue._transaction():
+            queue._conn.execute("INSERT INTO meta VALUES ('params', ?)", (json.dumps(params),))
+            queue._conn.executemany("INSERT INTO tasks (position, ticker) VALUES (?, ?)", enumerate(tickers))
+        return queue
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    @property
+    def params(self) -> dict:
+        row = self._conn.execute("SELECT value FROM meta WHERE key='params'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def lease(self, worker: str, n: int = QUEUE_LEASE_BATCH, lease_seconds: float = QUEUE_LEASE_SECONDS):
+        """Claim up to `n` pending (or expired) tasks; returns [(position, ticker)]."""
+        now = time.time()
+        with self._transaction():
+            rows = self._conn.execute(
+                "SELECT position, ticker FROM tasks"
+                " WHERE state='pending' OR (state='leased' AND leased_at < ?)"
+                " ORDER BY position LIMIT ?",
+                (now - lease_seconds, n),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE tasks SET state='leased', worker=?, leased_at=?, attempts=attempts+1 WHERE position=?",
+                [(worker, now, position) for position, _ in rows],
+            )
+        return rows
 
-    results.sort(key=sort_key)
-    elapsed_s = time.perf_counter() - analysis_start_ts
-    print(f"CLI: Analysis finished in {elapsed_s:.1f}s. {len(results)} results.")
-    return results
-
-def is_rate_limited_error(error_msg):
-    """Check if an error message indicates rate limiting"""
-    error_lower = error_msg.lower()
-    rate_limit_indicators = [
-        'rate limit', 'too many requests', '429', 'quota exceeded',
-        'throttled', 'temporary block', 'access denied', 'forbidden',
-        'no listed options', 'data fetch failed'
-    ]
-    return any(indicator in error_lower for indicator in rate_limit_indicators)
-
-def handle_rate_limit_delay(consecutive_failures):
-    """Handle rate limiting with adaptive delays"""
-    if consecutive_failures <= 1:
-        return random.uniform(1.0, 2.0)
-    elif consecutive_failures <= 3:
-        return random.uniform(2.0, 4.0)
-    elif consecutive_failures <= 5:
-        return random.uniform(4.0, 8.0)
+    def complete(self, position: int, result, worker: str):
+        """Store a task's result (None for a skipped ticker)."""
+        self._conn.execute(
+            "UPDATE tasks SET state='done', worker=?, result=? WHERE position=?",
+            (worker, json.dumps(_to_builtin_tree(result)), position),
+        )
+
+    def progress(self) -> dict:
+        counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+        counts = {state: counts.get(state, 0) for state in ('pending', 'leased', 'done')}
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def results(self):
+        """[(position, result or None)] of finished tasks, in universe order."""
+        rows = self._conn.execute("SELECT position, result FROM tasks WHERE state='done' ORDER BY position")
+        return [(position, json.loads(result)) for position, result in rows]
+
+    def record_metrics(self, worker: str, snapshot: dict):
+        """Store a worker's METRICS snapshot so the coordinating process can merge it."""
+        self._conn.execute("INSERT OR REPLACE INTO worker_metrics VALUES (?, ?)", (worker, json.dumps(snapshot)))
+
+    def worker_metrics(self, workers) -> list:
+        """Stored METRICS snapshots of `workers` (workers that have not finished are missing)."""
+        rows = self._conn.execute("SELECT worker, snapshot FROM worker_metrics").fetchall()
+        return [json.loads(snapshot) for worker, snapshot in rows if worker in set(workers)]
+
+    def ranking(self) -> LiveRanking:
+        """Merged ranking of every finished ticker (same order as auto_analyze_stocks)."""
+        ranking = LiveRanking()
+        for position, result in self.results():
+            if result is not None:
+                ranking.add(result, position)
+        return ranking
+
+    def close(self):
+        self._conn.close()
+
+
+def run_queue_worker(queue_path: str, worker_id: str | None = None,
+                     max_workers: int = DEFAULT_SCAN_WORKERS,
+                     requests_per_second: float | None = None,
+                     sessions: int | None = None,
+                     lease_batch: int = QUEUE_LEASE_BATCH) -> int:
+    """Analyze leased tickers from a ScanQueue until it is drained; returns how many this worker finished.
+
+    Each worker process has its own session pool and rate budget. The scan
+    parameters (expiry mode, bulk history, pre-screen) come from the queue.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = ScanQueue(queue_path)
+    params = queue.params
+    if sessions:
+        configure_session_pool(sessions)
+    if requests_per_second:
+        YF_RATE_LIMITER.set_rate(requests_per_second)
+    min_score = params.get('prescreen_min_score')
+    state = ScanState()
+    finished = 0
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers or 1)), thread_name_prefix="queue")
+    try:
+        while True:
+            leased = queue.lease(worker_id, lease_batch)
+            if not leased:
+                break
+            tickers = [ticker for _, ticker in leased]
+            histories = {}
+            if params.get('bulk_history', True) or min_score:
+                histories = download_universe_history(tickers, period='3mo')
+            skipped = set()
+            if min_score and params.get('prescreen_policy', 'skip') == 'skip':
+                _, dropped = plan_scan_order(tickers, prescreen_universe(histories), min_score, 'skip')
+                skipped = set(dropped)
+                METRICS.inc('tickers_prescreened', len(skipped))
+            futures = {}
+            for position, ticker in leased:
+                if ticker in skipped:
+                    queue.complete(position, None, worker_id)
+                else:
+                    futures[executor.submit(_scan_ticker, ticker, state, histories.get(ticker),
+                                            params.get('expiry_mode'))] = position
+            # Results are written from this thread only; the connection is not shared with the pool
+            for future in as_completed(futures):
+                queue.complete(futures[future], future.result(), worker_id)
+            finished += len(leased)
+            print(f"CLI: Worker {worker_id} finished {finished} tickers; queue {queue.progress()}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            queue.record_metrics(worker_id, METRICS.snapshot())
+        finally:
+            queue.close()
+    for line in METRICS.summary().splitlines():
+        print(f"CLI: Metrics ({worker_id}): {line}")
+    return finished
+
+
+def _queue_worker_process(queue_path: str, options: dict):
+    """Entry point of a local worker process; its console chatter goes to stderr like the parent's."""
+    if options.pop('offline', False):
+        configure_cache(enabled=True, offline=True)
+    with contextlib.redirect_stdout(sys.stderr):
+        run_queue_worker(queue_path, **options)
+
+
+def iter_sharded_scan(progress_callback=None, list_limit: int | None = None,
+                      processes: int = 2,
+                      max_workers: int = DEFAULT_SCAN_WORKERS,
+                      requests_per_second: float | None = None,
+                      sessions: int | None = None,
+                      bulk_history: bool = True,
+                      ranking: LiveRanking | None = None,
+                      prescreen_min_score: int | None = None,
+                      prescreen_policy: str = 'skip',
+                      expiry_mode: str | None = None,
+                      queue_path: str | None = None):
+    """Like iter_analyze_stocks, but the universe is split across `processes` local worker processes.
+
+    The workers share a ScanQueue (a new one under CACHE_DIR/queues unless
+    `queue_path` names one; an existing queue is resumed). Each process runs
+    `max_workers` threads with its own sessions and `requests_per_second`
+    budget. Results are yielded as workers finish them, and the ranking equals
+    a single-process scan of the same universe. When the workers exit, their
+    METRICS are merged into this process's METRICS.
+    """
+    METRICS.reset()
+    tickers = get_sp500_stocks(limit=list_limit)
+    params = {'expiry_mode': expiry_mode or EXPIRY_SELECTION_MODE, 'bulk_history': bulk_history,
+              'prescreen_min_score': prescreen_min_score, 'prescreen_policy': prescreen_policy}
+    if queue_path and os.path.exists(queue_path):
+        queue = ScanQueue(queue_path)
     else:
-        return random.uniform(8.0, 15.0)
+        queue_path = queue_path or os.path.join(CACHE_DIR, 'queues', f"scan-{os.getpid()}-{int(time.time())}.sqlite")
+        queue = ScanQueue.create(queue_path, tickers, params)
+    cache = get_disk_cache()
+    processes = max(1, int(processes))
+    # Several leases per process so a slow shard does not hold the tail of the scan
+    lease_batch = max(1, min(QUEUE_LEASE_BATCH, len(tickers) // (processes * 4)))
+    options = {'max_workers': max_workers, 'requests_per_second': requests_per_second, 'sessions': sessions,
+               'lease_batch': lease_batch, 'offline': bool(cache and cache.offline)}
+    context = multiprocessing.get_context('spawn')
+    worker_ids = [f"{socket.gethostname()}:{os.getpid()}/{n}" for n in range(processes)]
+    workers = [
+        context.Process(target=_queue_worker_process, name=f"scan-shard-{n}", daemon=True,
+                        args=(queue_path, dict(options, worker_id=worker_id)))
+        for n, worker_id in enumerate(worker_ids)
+    ]
+    print(f"CLI: Sharded scan of {len(tickers)} tickers over {len(workers)} processes (queue {queue_path})")
+    for worker in workers:
+        worker.start()
+
+    seen = set()
+    try:
+        while True:
+            running = any(worker.is_alive() for worker in workers)
+            for position, result in queue.results():
+                if position in seen:
+                    continue
+                seen.add(position)
+                if result is not None:
+                    if ranking is not None:
+                        ranking.add(result, position)
+                    yield result
+            progress = queue.progress()
+            if progress_callback and progress['total']:
+                progress_callback(int(progress['done'] / progress['total'] * 100),
+                                  f"Analyzed {progress['done']}/{progress['total']} tickers in {len(workers)} processes")
+            if not running:
+                break
+            time.sleep(QUEUE_POLL_SECONDS)
+        record_metrics_table([result for _, result in queue.results() if result is not None], tickers)
+        for snapshot in queue.worker_metrics(worker_ids):
+            METRICS.merge(snapshot)
+        for line in METRICS.summary().splitlines():
+            print(f"CLI: Metrics: {line}")
+        progress = queue.progress()
+        if progress['done'] < progress['total']:
+            print(f"CLI: Warning: workers exited with {progress['total'] - progress['done']} tickers unfinished; "
+                  f"rerun with the same queue ({queue_path}) to finish them")
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        queue.close()
+
+
+# Screening rules: boolean expressions over the metrics table, weighted into a score. The defaults
+# reproduce the built-in screen (analyze_stock_auto's 0-3 score).
+METRIC_COLUMNS = ['avg_volume', 'iv30', 'iv30_rv30', 'ts_slope_0_45', 'expected_move']
+DEFAULT_RULES = [
+    {'name': 'volume_ok', 'expr': f"avg_volume >= {AVG_VOLUME_THRESHOLD!r}", 'weight': 1.0},
+    {'name': 'iv_rv_ok', 'expr': f"iv30_rv30 >= {IV30_RV30_THRESHOLD!r}", 'weight': 1.0},
+    {'name': 'slope_ok', 'expr': f"ts_slope_0_45 <= {TS_SLOPE_THRESHOLD!r}", 'weight': 1.0},
+]
+
+
+def metrics_table_path() -> str:
+    return os.path.join(CACHE_DIR, "metrics_table.csv")
+
+
+def metrics_table(results, updated_at: str | None = None):
+    """Universe-wide DataFrame of the raw metrics of successful results, indexed by ticker."""
+    updated_at = updated_at or datetime.now().isoformat(timespec='seconds')
+    rows = {}
+    for result in results:
+        data = result.get('result') if result.get('status') == 'success' else None
+        metrics = data.get('metrics') if isinstance(data, dict) else None
+        if metrics:
+            rows[result['ticker']] = {**{c: _to_builtin(metrics.get(c)) for c in METRIC_COLUMNS},
+                                      'updated_at': updated_at}
+    table = pd.DataFrame.from_dict(rows, orient='index', columns=METRIC_COLUMNS + ['updated_at'])
+    table.index.name = 'ticker'
+    return table.astype({c: float for c in METRIC_COLUMNS})
+
 
-def _format_eta_text(num_tickers: int) -> str:
+def load_metrics_table(path: str | None = None):
+    """The cached metrics table (empty when no scan has written one yet)."""
+    path = path or metrics_table_path()
+    if not os.path.exists(path):
+        return metrics_table([])
+    return pd.read_csv(path, index_col='ticker', dtype={c: float for c in METRIC_COLUMNS})
+
+
+def record_metrics_table(results, universe=None, path: str | None = None):
+    """Upsert the metrics of a finished scan into the cached table (rows keep universe order).
+
+    Skipped when the cache is disabled; a failure only prints a warning.
+    """
+    if not CACHE_ENABLED or CACHE_OFFLINE:
+        return None
+    path = path or metrics_table_path()
+    try:
+        if universe is not None:
+            position = {t: i for i, t in enumerate(universe)}
+            results = sorted(results, key=lambda r: position.get(r.get('ticker'), len(position)))
+        fresh = metrics_table(results)
+        table = load_metrics_table(path)
+        order = list(table.index) + [t for t in fresh.index if t not in table.index]
+        table = pd.concat([table.drop(fresh.index, errors='ignore'), fresh]).reindex(order)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        table.to_csv(tmp)
+        os.replace(tmp, path)
+        return table
+    except Exception as e:
+        print(f"CLI: Warning: failed to update the metrics table: {e}")
+        return None
+
+
+def load_rules(path: str) -> dict:
+    """Read a rules file: {"rules": [{"name", "expr", "weight"}], "where": expr, "min_score": number}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {'rules': spec}
+    rules = spec.get('rules') or DEFAULT_RULES
+    for rule in rules:
+        name = rule.get('name')
+        if not isinstance(name, str) or not name.isidentifier() or name in METRIC_COLUMNS + ['score', 'updated_at']:
+            raise ValueError(f"Invalid rule name: {name!r}")
+        if not isinstance(rule.get('expr'), str):
+            raise ValueError(f"Rule {name} has no expression")
+        rule.setdefault('weight', 1.0)
+    return {'rules': rules, 'where': spec.get('where'), 'min_score': spec.get('min_score')}
+
+
+def apply_rules(table, rules=None, where: str | None = None, min_score: float | None = None):
+    """Evaluate weighted rules over the metrics table; returns it ranked by score with one column per rule.
+
+    Every rule is one vectorized DataFrame.eval over the whole table; a
+    missing metric fails its rule. `where` (which may use rule names and
+    `score`) and `min_score` filter the ranked table. Ties keep table order.
+    """
+    rules = rules or DEFAULT_RULES
+    score = np.zeros(len(table))
+    flags = {}
+    for rule in rules:
+        try:
+            passed = table.eval(rule['expr'])
+        except Exception as e:
+            raise ValueError(f"Rule {rule['name']}: {e}") from e
+        if getattr(passed, 'dtype', None) != bool:
+            raise ValueError(f"Rule {rule['name']} is not a boolean expression: {rule['expr']}")
+        flags[rule['name']] = passed
+        score += float(rule.get('weight', 1.0)) * passed.to_numpy()
+    screened = table.assign(**flags, score=score)
+    if where:
+        try:
+            screened = screened[screened.eval(where).astype(bool)]
+        except Exception as e:
+            raise ValueError(f"where: {e}") from e
+    if min_score is not None:
+        screened = screened[screened['score'] >= min_score]
+    return screened.sort_values('score', ascending=False, kind='stable')
+
+
+# Backtest: stored history window, forward-return horizons (trading days) and IV history columns
+BACKTEST_PERIOD = '5y'
+BACKTEST_HORIZONS = (1, 5, 21)
+IV_HISTORY_FIELDS = ['date', 'ticker', 'iv30', 'ts_slope_0_45']
+
+
+def append_iv_history(path: str, results, day=None):
+    """Append today's iv30 / ts_slope_0_45 of every successful result to an IV history CSV.
+
+    Yahoo only serves the current option chains, so the implied-vol side of a
+    backtest can only come from observations recorded by earlier scans.
+    """
+    day = (day or datetime.today().date()).isoformat()
+    rows = []
+    for result in results:
+        data = result.get('result') if result.get('status') == 'success' else None
+        metrics = data.get('metrics') if isinstance(data, dict) else None
+        if metrics and metrics.get('iv30') is not None:
+            rows.append({'date': day, 'ticker': result.get('ticker'),
+                         'iv30': _to_builtin(metrics['iv30']),
+                         'ts_slope_0_45': _to_builtin(metrics.get('ts_slope_0_45'))})
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=IV_HISTORY_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def _date_index(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def backtest_panel(histories, iv_history=None, window=30):
+    """Date-aligned T×N signal inputs for every ticker and trading day.
+
+    Each metric is computed for the whole panel in one vectorized pass:
+    closes, 30-day average volume and Yang-Zhang rv30 from OHLCV, plus iv30,
+    iv30_rv30 and ts_slope_0_45 from `iv_history` (a DataFrame with
+    IV_HISTORY_FIELDS; NaN on days without an observation).
+    """
+    tickers = [t for t, h in histories.items() if h is not None and not h.empty]
+    if not tickers:
+        raise ValueError("No price history to backtest")
+    frames = {t: histories[t].set_axis(_date_index(histories[t].index)) for t in tickers}
+    dates = frames[tickers[0]].index
+    for frame in list(frames.values())[1:]:
+        dates = dates.union(frame.index)
+
+    def stack(column):
+        return np.column_stack([frames[t][column].reindex(dates).to_numpy(dtype=float) for t in tickers])
+
+    fields = {c: stack(c) for c in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    panel = {
+        'dates': dates,
+        'tickers': tickers,
+        'close': fields['Close'],
+        'avg_volume': _rolling_sum(fields['Volume'], window) / window,
+        'rv30': yang_zhang_batch(fields['Open'], fields['High'], fields['Low'], fields['Close'],
+                                 window=window, return_last_only=False),
+    }
+    iv30 = np.full(panel['close'].shape, np.nan)
+    slope = np.full(panel['close'].shape, np.nan)
+    if iv_history is not None and not iv_history.empty:
+        # An observation belongs to the last trading day on or before its date (scans also run on weekends)
+        positions = dates.searchsorted(_date_index(pd.to_datetime(iv_history['date'])), side='right') - 1
+        observations = iv_history.assign(date=dates[np.maximum(positions, 0)])[positions >= 0]
+        for name, target in (('iv30', iv30), ('ts_slope_0_45', slope)):
+            if name in observations:
+                table = observations.pivot_table(index='date', columns='ticker', values=name, aggfunc='last')
+                target[:] = table.reindex(index=dates, columns=tickers).to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        panel['iv30_rv30'] = iv30 / panel['rv30']
+    panel['iv30'] = iv30
+    panel['ts_slope_0_45'] = slope
+    return panel
+
+
+def backtest_signals(panel, volume_threshold=AVG_VOLUME_THRESHOLD,
+                     iv_rv_threshold=IV30_RV30_THRESHOLD, slope_threshold=TS_SLOPE_THRESHOLD):
+    """T×N score (0-3, NaN where there is no volume/rv30 history) from the three screening signals.
+
+    Signals without data on a day (no IV observation) count as not passing,
+    as they would if the scan had failed to fetch the chains.
+    """
+    with np.errstate(invalid='ignore'):
+        volume_ok = panel['avg_volume'] >= volume_threshold
+        iv_ok = panel['iv30_rv30'] >= iv_rv_threshold
+        slope_ok = panel['ts_slope_0_45'] <= slope_threshold
+    score = volume_ok.astype(float) + iv_ok + slope_ok
+    score[np.isnan(panel['avg_volume']) | np.isnan(panel['rv30'])] = np.nan
+    return score
+
+
+def forward_returns(close, horizon: int):
+    """Close-to-close return from each day to `horizon` trading days later (NaN at the end)."""
+    out = np.full(close.shape, np.nan)
+    if horizon < close.shape[0]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:-horizon] = close[horizon:] / close[:-horizon] - 1.0
+    return out
+
+
+def _expected_move(panel, horizon: int):
+    """One-sigma move over `horizon` days implied by iv30 (rv30 on days without IV)."""
+    vol = np.where(np.isnan(panel['iv30']), panel['rv30'], panel['iv30'])
+    return vol * np.sqrt(horizon / 252.0)
+
+
+def _bucket_stats(keys, fwd, hit):
+    """Per-key count, hit rate and forward-return statistics of flattened samples."""
+    rows = []
+    order = np.argsort(keys, kind='stable')
+    keys, fwd, hit = keys[order], fwd[order], hit[order]
+    values, starts = np.unique(keys, return_index=True)
+    for value, chunk_fwd, chunk_hit in zip(values, np.split(fwd, starts[1:]), np.split(hit, starts[1:])):
+        abs_fwd = np.abs(chunk_fwd)
+        rows.append({
+            'key': value,
+            'samples': int(len(chunk_fwd)),
+            'hit_rate': float(chunk_hit.mean()),
+            'mean_return': float(chunk_fwd.mean()),
+            'mean_abs_return': float(abs_fwd.mean()),
+            'median_abs_return': float(np.median(abs_fwd)),
+        })
+    return rows
+
+
+def backtest_stats(panel, score, horizons=BACKTEST_HORIZONS):
+    """Hit rate and forward returns per score bucket and horizon.
+
+    A hit is a day on which the move over the horizon stayed within the
+    one-sigma move implied by iv30 (rv30 without an IV observation): the
+    outcome a short-volatility trade on the signal wants.
+    """
+    rows = []
+    for horizon in horizons:
+        fwd = forward_returns(panel['close'], horizon)
+        expected = _expected_move(panel, horizon)
+        valid = ~(np.isnan(score) | np.isnan(fwd) | np.isnan(expected))
+        hit = np.abs(fwd[valid]) <= expected[valid]
+        for row in _bucket_stats(score[valid].astype(int), fwd[valid], hit):
+            rows.append({'horizon': horizon, 'score': int(row.pop('key')), **row})
+    return rows
+
+
+def threshold_sweep(panel, metric: str, thresholds, horizon: int = 5):
+    """Signal-on statistics for each candidate threshold of one metric ('avg_volume', 'iv30_rv30', 'ts_slope_0_45')."""
+    if metric not in ('avg_volume', 'iv30_rv30', 'ts_slope_0_45'):
+        raise ValueError(f"Unknown metric: {metric}")
+    values = panel[metric]
+    fwd = forward_returns(panel['close'], horizon)
+    expected = _expected_move(panel, horizon)
+    valid = ~(np.isnan(values) | np.isnan(fwd) | np.isnan(expected))
+    values, fwd = values[valid], fwd[valid]
+    hit = np.abs(fwd) <= expected[valid]
+    rows = []
+    for threshold in thresholds:
+        on = values <= threshold if metric == 'ts_slope_0_45' else values >= threshold
+        row = {'metric': metric, 'threshold': float(threshold), 'horizon': horizon,
+               'samples': int(on.sum()), 'hit_rate': None, 'mean_abs_return': None,
+               'hit_rate_off': float(hit[~on].mean()) if (~on).any() else None}
+        if on.any():
+            row['hit_rate'] = float(hit[on].mean())
+            row['mean_abs_return'] = float(np.abs(fwd[on]).mean())
+        rows.append(row)
+    return rows
+
+
+def run_backtest(tickers, period: str = BACKTEST_PERIOD, iv_history=None,
+                 horizons=BACKTEST_HORIZONS, sweeps=None, **thresholds) -> dict:
+    """Backtest the screen over stored history; returns a JSON-ready report.
+
+    `sweeps` maps a metric to candidate thresholds (see threshold_sweep,
+    evaluated at the middle horizon); `thresholds` override the screen's
+    volume / iv_rv / slope thresholds for the score buckets.
+    """
+    histories = download_universe_history(tickers, period=period)
+    start = time.perf_counter()
+    panel = backtest_panel(histories, iv_history)
+    score = backtest_signals(panel, **thresholds)
+    report = {
+        'tickers': len(panel['tickers']),
+        'days': len(panel['dates']),
+        'start': panel['dates'][0].date().isoformat(),
+        'end': panel['dates'][-1].date().isoformat(),
+        'iv_observations': int((~np.isnan(panel['iv30'])).sum()),
+        'thresholds': {'volume_threshold': thresholds.get('volume_threshold', AVG_VOLUME_THRESHOLD),
+                       'iv_rv_threshold': thresholds.get('iv_rv_threshold', IV30_RV30_THRESHOLD),
+                       'slope_threshold': thresholds.get('slope_threshold', TS_SLOPE_THRESHOLD)},
+        'buckets': backtest_stats(panel, score, horizons),
+        'sweeps': [],
+    }
+    sweep_horizon = sorted(horizons)[len(horizons) // 2]
+    for metric, values in (sweeps or {}).items():
+        report['sweeps'].extend(threshold_sweep(panel, metric, values, sweep_horizon))
+    report['compute_seconds'] = round(time.perf_counter() - start, 3)
+    if not report['iv_observations']:
+        print("CLI: Warning: no IV history; only the volume signal can pass (see scan --iv-history)")
+    return report
+
+
+def _format_eta_text(num_tickers: int, workers: int = 1) -> str:
     num = max(1, min(500, int(num_tickers)))
-    # Rough estimate: 1–3 seconds per ticker depending on data/connection
-    min_s = int(num * 1.0 + 5)
-    max_s = int(num * 3.0 + 15)
+    workers = max(1, min(MAX_SCAN_WORKERS, int(workers)))
+    # Rough estimate: 1–3 seconds per ticker depending on data/connection, split across workers
+    min_s = int(num * 1.0 / workers + 5)
+    max_s = int(num * 3.0 / workers + 15)
 
     def fmt(sec: int) -> str:
         if sec < 60:
@@ -537,6 +3180,154 @@ def _format_eta_text(num_tickers: int) -> str:
 
     return f"⏱️ Estimated time: ~{fmt(min_s)} – {fmt(max_s)} (depends on hardware/network)"
 
+def _parse_workers(values) -> int:
+    try:
+        workers = int(values.get('num_workers') or DEFAULT_SCAN_WORKERS)
+    except Exception:
+        workers = DEFAULT_SCAN_WORKERS
+    return max(1, min(MAX_SCAN_WORKERS, workers))
+
+
+RESULT_TABLE_HEADINGS = ['#', 'Ticker', 'Score', 'Recommendation', 'Volume', 'IV/RV', 'Slope', 'Move', 'Error']
+RESULT_TABLE_WIDTHS = [4, 7, 5, 15, 7, 6, 6, 7, 30]
+RESULT_STATUS_FILTERS = ['All', 'Successes', 'Score ≥ 2', 'Score 3', 'Errors']
+RECOMMENDATIONS = {3: "🔥 STRONG BUY", 2: "✅ BUY", 1: "⚠️ CONSIDER", 0: "❌ AVOID"}
+
+
+def _result_table_row(rank: int, result):
+    """(sort keys, display row, score or None for errors) of one result."""
+    ticker = result.get('ticker', 'N/A')
+    data = result.get('result')
+    if result.get('status') != 'success' or not isinstance(data, dict):
+        error = str(data if data is not None else 'Unknown error')
+        return (rank, ticker, -1, -1, -1, -1, -1, -1.0, error), [rank, ticker, 0, "❌ Error", "", "", "", "", error], None
+    score = result.get('score', 0)
+    flags = [bool(data.get(name)) for name in ('avg_volume', 'iv30_rv30', 'ts_slope_0_45')]
+    move = data.get('expected_move') or ""
+    try:
+        move_value = float(str(move).rstrip('%'))
+    except ValueError:
+        move_value = -1.0
+    keys = (rank, ticker, score, score, *flags, move_value, "")
+    row = [rank, ticker, f"{score}/3", RECOMMENDATIONS.get(score, ""), *("✓" if f else "✗" for f in flags), move, ""]
+    return keys, row, score
+
+
+class ResultsTable:
+    """Sort, filter and page state behind the GUI results table.
+
+    Only the current page is handed to sg.Table, so redraws stay cheap for the
+    whole universe. Rows are built once per result and reused across redraws.
+    """
+
+    def __init__(self, page_size: int = RESULTS_PAGE_SIZE):
+        self.page_size = page_size
+        self.sort_column = 0
+        self.descending = False
+        self.query = ""
+        self.status = RESULT_STATUS_FILTERS[0]
+        self.page = 0
+        self._rows = []
+        self._built = {}
+
+    def set_results(self, ranked):
+        """Replace the rows with a ranked result list (rank = list position)."""
+        rows = []
+        for rank, result in enumerate(ranked, start=1):
+            cached = self._built.get(id(result))
+            if cached is None or cached[0] is not result or cached[1][0][0] != rank:
+                cached = (result, _result_table_row(rank, result))
+                self._built[id(result)] = cached
+            rows.append(cached[1])
+        self._rows = rows
+
+    def sort_by(self, column: int):
+        """Sort on `column`; choosing the same column again reverses the order."""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column, self.descending = column, column in (2, 3, 7)
+        self.page = 0
+
+    def _matches(self, score) -> bool:
+        if self.status == 'Successes':
+            return score is not None
+        if self.status == 'Score ≥ 2':
+            return score is not None and score >= 2
+        if self.status == 'Score 3':
+            return score == 3
+        if self.status == 'Errors':
+            return score is None
+        return True
+
+    def view(self):
+        """(rows of the current page, row colors, caption)."""
+        query = self.query.strip().upper()
+        rows = [r for r in self._rows if self._matches(r[2]) and (not query or query in str(r[1][1]).upper())]
+        # Ties keep rank order, in either direction
+        rows.sort(key=lambda r: (r[0][self.sort_column], -r[0][0] if self.descending else r[0][0]),
+                  reverse=self.descending)
+        pages = max(1, -(-len(rows) // self.page_size))
+        self.page = max(0, min(self.page, pages - 1))
+        start = self.page * self.page_size
+        page_rows = rows[start:start + self.page_size]
+        colors = []
+        for i, row in enumerate(page_rows):
+            if row[2] is None:
+                colors.append((i, "#800000"))
+            elif row[2] == 3:
+                colors.append((i, "#006600"))
+        if rows:
+            caption = f"Rows {start + 1}–{start + len(page_rows)} of {len(rows)} (page {self.page + 1}/{pages})"
+        else:
+            caption = "No matching rows"
+        return [r[1] for r in page_rows], colors, caption
+
+    def __len__(self):
+        return len(self._rows)
+
+
+def _results_table_layout(num_rows: int = 18):
+    return [
+        [
+            sg.Text("Ticker:"), sg.Input(key="table_query", size=(10, 1), enable_events=True),
+            sg.Combo(RESULT_STATUS_FILTERS, default_value=RESULT_STATUS_FILTERS[0], key="table_status",
+                     readonly=True, enable_events=True),
+            sg.Button("◀", key="table_prev"), sg.Text("", key="table_page", size=(32, 1)), sg.Button("▶", key="table_next"),
+        ],
+        [sg.Table(values=[], headings=RESULT_TABLE_HEADINGS, key="results_table", auto_size_columns=False,
+                  col_widths=RESULT_TABLE_WIDTHS, num_rows=num_rows, justification='left',
+                  enable_click_events=True, expand_x=True, expand_y=True,
+                  tooltip="Click a column heading to sort")],
+    ]
+
+
+def _refresh_results_table(window, table: ResultsTable):
+    rows, colors, caption = table.view()
+    window["results_table"].update(values=rows, row_colors=colors)
+    window["table_page"].update(caption)
+
+
+def _handle_table_event(window, table: ResultsTable, event, values) -> bool:
+    """Apply a sort/filter/page event to `table` and redraw it; False if `event` is not the table's."""
+    if isinstance(event, tuple) and event[0] == "results_table":
+        row, column = event[2]
+        if row != -1 or column is None:
+            return True  # clicks on rows do nothing; headings sort
+        table.sort_by(column)
+    elif event in ("table_query", "table_status"):
+        table.query = values.get("table_query") or ""
+        table.status = values.get("table_status") or RESULT_STATUS_FILTERS[0]
+        table.page = 0
+    elif event == "table_prev":
+        table.page -= 1
+    elif event == "table_next":
+        table.page += 1
+    else:
+        return False
+    _refresh_results_table(window, table)
+    return True
+
 
 def main_gui(theme_choice: str = 'Dark'):
     # Apply selected theme
@@ -561,8 +3352,12 @@ def main_gui(theme_choice: str = 'Dark'):
         [
             sg.Text("Top tickers to analyze:"),
             sg.Input(default_text="100", key="num_tickers", size=(6,1), enable_events=True, justification='right'),
-            sg.Text("(1–500)")
+            sg.Text("(1–500)"),
+            sg.Text("Workers:"),
+            sg.Input(default_text=str(DEFAULT_SCAN_WORKERS), key="num_workers", size=(3,1), enable_events=True, justification='right'),
+            sg.Text(f"(1–{MAX_SCAN_WORKERS})")
         ],
+        [sg.Checkbox("Resume an interrupted scan with the same settings", key="resume", default=False)],
         [sg.Text(_format_eta_text(100), key="eta", font=("Helvetica", 10), text_color="orange")],
         [sg.Button("🚀 Start Auto Analysis", size=(20, 2), button_color=("white", "#2E8B57")), sg.Button("❌ Exit")],
         [sg.Text("", key="status", size=(60, 2), text_color=status_color)],
@@ -587,13 +3382,13 @@ def main_gui(theme_choice: str = 'Dark'):
             main_gui('Dark')
             return
 
-        if event == 'num_tickers':
+        if event in ('num_tickers', 'num_workers'):
             try:
                 n = int(values.get('num_tickers') or 0)
             except Exception:
                 n = 100
             n = max(1, min(500, n))
-            window['eta'].update(_format_eta_text(n))
+            window['eta'].update(_format_eta_text(n, _parse_workers(values)))
 
         if event == "🚀 Start Auto Analysis":
             print("CLI: 🚀 Start Auto Analysis button pressed!")
@@ -626,20 +3421,41 @@ def main_gui(theme_choice: str = 'Dark'):
             # Removed in-window initializing text and progress bar per request
             window.refresh()
             
-            # Start analysis in background thread
+            # Scan in a background thread that pushes progress and results to the progress window
             result_holder = {}
-            
+            ranking = LiveRanking()
+            table = ResultsTable()
+            progress_layout = [
+                [sg.Text("🔄", font=("Arial", 24), key="spinner"),
+                 sg.Text("Analyzing...", key="status_text", size=(70, 2))],
+                [sg.ProgressBar(100, orientation='h', size=(60, 20), key='progress')],
+                [sg.Text("🏆 Results so far (updates live):", font=("Helvetica", 10))],
+                *_results_table_layout(),
+                [sg.Text("📱 Check your terminal/console for detailed CLI updates", font=("Helvetica", 9), text_color=accent_color)]
+            ]
+            progress_window = sg.Window("Analysis Progress", progress_layout, modal=True, finalize=True,
+                                        size=(900, 560), resizable=True)
+            _refresh_results_table(progress_window, table)
+            window_open = threading.Event()
+            window_open.set()
+
+            def post(key, value=None):
+                # The user may close the progress window while the scan keeps running
+                if window_open.is_set():
+                    try:
+                        progress_window.write_event_value(key, value)
+                    except Exception:
+                        pass
+
             def worker():
                 try:
                     def progress_callback(progress, status):
-                        result_holder['progress'] = progress
-                        result_holder['status'] = status
+                        post("scan_progress", (progress, status))
                         print(f"CLI Progress: {progress}% - {status}")  # CLI feedback
                     
                     print("CLI: Starting stock analysis...")
                     print("CLI: Fetching stock list...")
-                    result_holder['status'] = "Fetching stock list..."
-                    result_holder['progress'] = 0
+                    post("scan_progress", (0, "Fetching stock list..."))
                     
                     # Determine how many tickers to analyze
                     try:
@@ -647,51 +3463,60 @@ def main_gui(theme_choice: str = 'Dark'):
                     except Exception:
                         n = 100
                     n = max(1, min(500, n))
-                    results = auto_analyze_stocks(progress_callback, list_limit=n)
+                    for result in iter_analyze_stocks(progress_callback, list_limit=n, max_workers=_parse_workers(values),
+                                                      ranking=ranking, resume=bool(values.get('resume'))):
+                        post("scan_result", result)
+                    results = ranking.ranked()
                     result_holder['results'] = results
-                    result_holder['progress'] = 100
-                    result_holder['status'] = "Analysis complete!"
+                    post("scan_progress", (100, "Analysis complete!"))
                     print(f"CLI: Analysis complete! Found {len(results)} stocks")
                 except Exception as e:
                     result_holder['error'] = str(e)
                     print(f"CLI Error: {e}")
+                post("scan_done")
 
             thread = threading.Thread(target=worker, daemon=True)
             thread.start()
             
-            # Show progress window with visible progress bar
-            progress_layout = [
-                [sg.Text("🔄", font=("Arial", 24), key="spinner")],
-                [sg.Text("Analyzing...", key="status_text", size=(50, 2))],
-                [sg.ProgressBar(100, orientation='h', size=(40, 20), key='progress')],
-                [sg.Text("📱 Check your terminal/console for detailed CLI updates", font=("Helvetica", 9), text_color=accent_color)]
-            ]
-            progress_window = sg.Window("Analysis Progress", progress_layout, modal=True, finalize=True, size=(520, 220))
-            
-            # Animated status updates + progress bar
+            # Event loop: the timeout only animates the spinner and the elapsed time
             spinner_chars = ["🔄", "⚡", "📊", "💹", "📈", "🎯"]
             spinner_idx = 0
             start_time = time.time()
-            while thread.is_alive():
-                event_progress, _ = progress_window.read(timeout=150)
-                if event_progress == sg.WINDOW_CLOSED:
+            status_text = "Analyzing..."
+            dirty = False
+            last_refresh = 0.0
+            while True:
+                event_progress, values_progress = progress_window.read(timeout=1000)
+                if event_progress in (sg.WINDOW_CLOSED, "scan_done"):
                     break
-                progress_window['spinner'].update(spinner_chars[spinner_idx])
-                spinner_idx = (spinner_idx + 1) % len(spinner_chars)
-                if 'progress' in result_holder:
-                    progress_window['progress'].update(result_holder['progress'])
-                if 'status' in result_holder:
-                    elapsed = int(time.time() - start_time)
-                    progress_window['status_text'].update(f"{result_holder['status']} | Elapsed: {elapsed}s")
-            
-            # Wait for completion
-            thread.join(timeout=1)
+                if event_progress == "scan_progress":
+                    progress, status_text = values_progress[event_progress]
+                    progress_window['progress'].update(progress)
+                elif event_progress == "scan_result":
+                    dirty = True
+                elif _handle_table_event(progress_window, table, event_progress, values_progress):
+                    continue
+                else:
+                    progress_window['spinner'].update(spinner_chars[spinner_idx])
+                    spinner_idx = (spinner_idx + 1) % len(spinner_chars)
+                progress_window['status_text'].update(f"{status_text} | Analyzed: {len(ranking)} | "
+                                                      f"Elapsed: {int(time.time() - start_time)}s")
+                # Results can arrive faster than the table needs redrawing
+                if dirty and time.time() - last_refresh >= RESULTS_REFRESH_S:
+                    table.set_results(ranking.ranked())
+                    _refresh_results_table(progress_window, table)
+                    dirty, last_refresh = False, time.time()
+            window_open.clear()
             progress_window.close()
             
             # Re-enable the button
             window["🚀 Start Auto Analysis"].update(disabled=False)
             window["🚀 Start Auto Analysis"].update("🚀 Start Auto Analysis")
             
+            if 'results' not in result_holder and 'error' not in result_holder and len(ranking):
+                # Progress window closed early: show what has been found so far
+                result_holder['results'] = ranking.ranked()
+
             if 'error' in result_holder:
                 window["status"].update(f"❌ Error during analysis: {result_holder['error']}")
             elif 'results' in result_holder:
@@ -712,97 +3537,463 @@ def main_gui(theme_choice: str = 'Dark'):
     return
 
 def show_results_window(results):
-    """Display analysis results in a new scrollable window. Always shows something, including errors if no successes."""
+    """Display analysis results in a sortable, filterable, paged table. Always shows something, including errors if no successes."""
     if not results:
         results = []
 
-    # Build rows for a scrollable area
-    content_rows = [
-        [sg.Text("📊 Stock Analysis Results", font=("Helvetica", 16), justification="center")],
-        [sg.Text(f"🏆 Top {min(50, len(results))} Stocks by Score:", font=("Helvetica", 12))],
-        [sg.HorizontalSeparator()],
-    ]
+    title = "📊 Stock Analysis Results"
+    table = ResultsTable()
+    table.set_results(results)
+    layout = [[sg.Text(title, font=("Helvetica", 16), justification="center")]]
+    if not any(r.get('status') == 'success' for r in results):
+        table.status = 'Errors'
+        layout.append([sg.Text("ℹ️ No successful analyses. Showing error details below.", text_color="orange")])
+    layout += _results_table_layout(num_rows=24)
+    layout.append([sg.Button("Close")])
+
+    # Create and show results window (resizable)
+    results_window = sg.Window("Analysis Results", layout, size=(900, 620), modal=True, finalize=True, resizable=True)
+    results_window["table_status"].update(value=table.status)
+    _refresh_results_table(results_window, table)
 
-    # Add top results (include errors if present)
-    any_success = any(r.get('status') == 'success' for r in results)
-    for i, result in enumerate(results[:50]):
-        if result.get('status') == 'success':
-            ticker = result['ticker']
-            score = result['score']
-            data = result['result']
-            
-            # Determine recommendation with emojis
-            if score == 3:
-                rec = "🔥 STRONG BUY 🔥"
-                color = "#006600"
-                icon = "🚀"
-            elif score == 2:
-                rec = "✅ BUY ✅"
-                color = "#006600"
-                icon = "📈"
-            elif score == 1:
-                rec = "⚠️ CONSIDER ⚠️"
-                color = "#ff9900"
-                icon = "🤔"
-            else:
-                rec = "❌ AVOID ❌"
-                color = "#800000"
-                icon = "📉"
-            
-            content_rows.append([
-                sg.Text(f"{i+1}. {icon} {ticker} - {rec}", text_color=color, font=("Helvetica", 10, "bold")),
-                sg.Text(f"Score: {score}/3", text_color="blue")
-            ])
-            
-            # Add details
-            if isinstance(data, dict):
-                details = []
-                if 'avg_volume' in data:
-                    details.append(f"Volume: {'✓' if data['avg_volume'] else '✗'}")
-                if 'iv30_rv30' in data:
-                    details.append(f"IV/RV: {'✓' if data['iv30_rv30'] else '✗'}")
-                if 'ts_slope_0_45' in data:
-                    details.append(f"Slope: {'✓' if data['ts_slope_0_45'] else '✗'}")
-                if 'expected_move' in data and data['expected_move']:
-                    details.append(f"Move: {data['expected_move']}")
-                
-                content_rows.append([
-                    sg.Text(f"    {' | '.join(details)}", text_color="gray", font=("Helvetica", 8))
-                ])
-            
-            content_rows.append([sg.HorizontalSeparator()])
-        else:
-            # Show error entries when present
-            ticker = result.get('ticker', 'N/A')
-            error_message = result.get('result', 'Unknown error')
-            content_rows.append([
-                sg.Text(f"{i+1}. ❌ {ticker} - Error", text_color="#800000", font=("Helvetica", 10, "bold")),
-                sg.Text("Score: 0/3", text_color="blue")
-            ])
-            content_rows.append([
-                sg.Text(f"    {error_message}", text_color="gray", font=("Helvetica", 8))
-            ])
-            content_rows.append([sg.HorizontalSeparator()])
-
-    if not any_success:
-        # Add a small note if showing only errors
-        content_rows.insert(0, [sg.Text("ℹ️ No successful analyses. Showing error details below.", text_color="orange")])
-
-    scrollable = sg.Column(content_rows, scrollable=True, vertical_scroll_only=True, size=(600, 420))
-    layout = [[scrollable], [sg.Button("Close")]]
-
-    # Create and show results window (resizable and scrollable)
-    results_window = sg.Window("Analysis Results", layout, size=(640, 520), modal=True, finalize=True, resizable=True)
-    
     while True:
-        event_result, _ = results_window.read()
+        event_result, values_result = results_window.read()
         if event_result in (sg.WINDOW_CLOSED, "Close"):
             break
-    
+        _handle_table_event(results_window, table, event_result, values_result)
+
     results_window.close()
 
 def gui():
     main_gui()
 
+
+# Headless (CLI) mode
+RESULT_FIELDS = ['rank', 'ticker', 'status', 'score', 'avg_volume', 'iv30_rv30', 'ts_slope_0_45', 'expected_move', 'error']
+
+def _to_builtin(value):
+    """Convert numpy scalars (e.g. numpy.bool_) to plain Python values for JSON/CSV."""
+    if hasattr(value, 'item') and callable(value.item):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            return value
+    return value
+
+def flatten_result(result, rank: int | None = None) -> dict:
+    """One flat record per ticker, suitable for JSON lines or CSV."""
+    data = result.get('result')
+    row = {
+        'rank': rank,
+        'ticker': result.get('ticker'),
+        'status': result.get('status'),
+        'score': _to_builtin(result.get('score', 0)),
+    }
+    if isinstance(data, dict):
+        for key in ('avg_volume', 'iv30_rv30', 'ts_slope_0_45', 'expected_move'):
+            row[key] = _to_builtin(data.get(key))
+    else:
+        row['error'] = data
+    return row
+
+class ResultWriter:
+    """Streams flattened results to a JSON-lines or CSV file, flushing after every row."""
+
+    def __init__(self, stream, fmt: str = 'jsonl'):
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unsupported output format: {fmt}")
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = csv.DictWriter(stream, fieldnames=RESULT_FIELDS, extrasaction='ignore') if fmt == 'csv' else None
+        if self._csv:
+            self._csv.writeheader()
+        self._lock = threading.Lock()
+
+    def write(self, result, rank: int | None = None):
+        row = flatten_result(result, rank)
+        with self._lock:
+            if self._csv:
+                self._csv.writerow(row)
+            else:
+                self.stream.write(json.dumps(row) + "\n")
+            self.stream.flush()
+
+def _open_output(path: str | None, stdout):
+    if path in (None, '-'):
+        return stdout, False
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return open(path, 'w', encoding='utf-8', newline=''), True
+
+def _default_ranked_path(output_path: str | None, fmt: str) -> str | None:
+    if output_path in (None, '-'):
+        return None
+    stem, _ = os.path.splitext(output_path)
+    return f"{stem}.ranked.{fmt}"
+
+def watch_record(update) -> dict:
+    """One JSON-lines record per WatchScheduler update."""
+    result = update['result']
+    if result is None:
+        row = {'rank': None, 'ticker': update['ticker'], 'status': 'skipped'}
+    else:
+        row = flatten_result(result)
+        data = result.get('result')
+        if isinstance(data, dict) and data.get('metrics'):
+            row['metrics'] = _to_builtin_tree(data['metrics'])
+    row.update(
+        time=_market_now().isoformat(timespec='seconds'),
+        previous_score=_to_builtin(update['previous_score']),
+        changed=update['changed'],
+        next_scan_s=round(update['next_scan_s'], 1),
+    )
+    return row
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="calculator.py",
+        description="Automatic Fiat Stock Analyzer. Without a command the GUI is started.",
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    scan = subparsers.add_parser('scan', help="run a headless scan and stream results")
+    scan.add_argument('--limit', type=int, default=100, help="number of S&P 500 tickers to analyze (default: 100)")
+    scan.add_argument('--workers', type=int, default=DEFAULT_SCAN_WORKERS, help="concurrent scan workers")
+    scan.add_argument('--rps', type=float, default=None, help=f"initial global Yahoo requests per second, at most {MAX_REQUESTS_PER_SECOND:g} (adapts during the scan)")
+    scan.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="output format (default: jsonl)")
+    scan.add_argument('--output', '-o', default='-', help="streamed per-ticker output, '-' for stdout (default)")
+    scan.add_argument('--ranked-output', default=None,
+                      help="final ranked file (default: <output>.ranked.<format> when --output is a file)")
+    scan.add_argument('--sessions', type=int, default=YF_SESSION_POOL_SIZE, help="pooled Yahoo sessions")
+    scan.add_argument('--no-bulk-history', action='store_true', help="fetch price history per ticker")
+    scan.add_argument('--expiries', choices=('minimal', 'all'), default=EXPIRY_SELECTION_MODE,
+                      help="download only the option chains the metrics need, or every expiry up to 45 DTE")
+    scan.add_argument('--min-score', type=int, default=None, choices=(3,),
+                      help="pre-screen on price history and skip tickers that cannot reach this score; only the "
+                           "volume criterion is known before the option chains, so 3 (full score) is the only value")
+    scan.add_argument('--prescreen-policy', choices=('skip', 'defer'), default='skip',
+                      help="drop pre-screened tickers or analyze them last (default: skip)")
+    scan.add_argument('--offline', action='store_true', help="use only cached Yahoo data")
+    scan.add_argument('--resume', action='store_true',
+                      help="skip tickers already in today's checkpoint journal for these parameters")
+    scan.add_argument('--run-id', default=None, help="checkpoint journal name (default: derived from the parameters)")
+    scan.add_argument('--no-checkpoint', action='store_true', help="do not write a checkpoint journal")
+    scan.add_argument('--processes', type=int, default=1,
+                      help="split the scan across this many worker processes, each with --workers threads, "
+                           "its own sessions and --rps budget (default: 1)")
+    scan.add_argument('--queue', default=None, metavar='PATH',
+                      help="work queue for --processes (default: a new file under the cache directory; "
+                           "an existing queue is resumed)")
+    scan.add_argument('--iv-history', default=None, metavar='PATH',
+                      help="append today's iv30 / ts_slope_0_45 of every analyzed ticker to this CSV (input of backtest)")
+    scan.add_argument('--metrics', default=None, metavar='PATH',
+                      help="write stage timings and request counters to PATH when the scan ends")
+    scan.add_argument('--metrics-format', choices=('json', 'prometheus'), default=None,
+                      help="metrics file format (default: Prometheus text for .prom/.txt, else JSON)")
+
+    watch = subparsers.add_parser('watch', help="keep rescanning, near-threshold tickers most often, and stream updates")
+    watch.add_argument('--limit', type=int, default=100, help="number of S&P 500 tickers to watch (default: 100)")
+    watch.add_argument('--workers', type=int, default=DEFAULT_SCAN_WORKERS, help="concurrent scan workers")
+    watch.add_argument('--rps', type=float, default=None, help=f"initial global Yahoo requests per second, at most {MAX_REQUESTS_PER_SECOND:g} (the request budget)")
+    watch.add_argument('--min-interval', type=float, default=WATCH_MIN_INTERVAL_S,
+                       help=f"seconds between rescans of near-threshold or changed tickers (default: {WATCH_MIN_INTERVAL_S})")
+    watch.add_argument('--max-interval', type=float, default=WATCH_MAX_INTERVAL_S,
+                       help=f"seconds between rescans of stable tickers (default: {WATCH_MAX_INTERVAL_S})")
+    watch.add_argument('--max-scans', type=int, default=None, help="stop after this many ticker scans (default: run until interrupted)")
+    watch.add_argument('--output', '-o', default='-', help="JSON-lines update stream, '-' for stdout (default)")
+    watch.add_argument('--sessions', type=int, default=YF_SESSION_POOL_SIZE, help="pooled Yahoo sessions")
+    watch.add_argument('--expiries', choices=('minimal', 'all'), default=EXPIRY_SELECTION_MODE,
+                       help="download only the option chains the metrics need, or every expiry up to 45 DTE")
+    watch.add_argument('--offline', action='store_true', help="use only cached Yahoo data")
+    watch.add_argument('--metrics', default=None, metavar='PATH',
+                       help="write stage timings and request counters to PATH when the watch stops")
+    watch.add_argument('--metrics-format', choices=('json', 'prometheus'), default=None,
+                       help="metrics file format (default: Prometheus text for .prom/.txt, else JSON)")
+
+    screen = subparsers.add_parser('screen', help="re-rank the metrics of earlier scans under new rules, without the network")
+    screen.add_argument('--rules', default=None, metavar='PATH',
+                        help="JSON rules file (default: the built-in volume / IV-RV / slope screen)")
+    screen.add_argument('--where', default=None, metavar='EXPR',
+                        help="keep only rows matching this expression, e.g. 'expected_move < 8 and iv_rv_ok'")
+    screen.add_argument('--min-score', type=float, default=None, help="keep only rows with at least this score")
+    screen.add_argument('--table', default=None, metavar='PATH', help="metrics table (default: the one scans update in the cache)")
+    screen.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="output format (default: jsonl)")
+    screen.add_argument('--output', '-o', default='-', help="ranked output, '-' for stdout (default)")
+
+    backtest = subparsers.add_parser('backtest', help="score every day of stored history and report hit rates per score bucket")
+    backtest.add_argument('--limit', type=int, default=500, help="number of S&P 500 tickers (default: 500)")
+    backtest.add_argument('--period', default=BACKTEST_PERIOD, help=f"price history to use (default: {BACKTEST_PERIOD})")
+    backtest.add_argument('--iv-history', default=None, metavar='PATH',
+                          help="IV observations recorded by scan --iv-history (without it only the volume signal can pass)")
+    backtest.add_argument('--horizons', default=",".join(map(str, BACKTEST_HORIZONS)),
+                          help="forward-return horizons in trading days (default: %(default)s)")
+    backtest.add_argument('--volume-threshold', type=float, default=AVG_VOLUME_THRESHOLD)
+    backtest.add_argument('--iv-rv-threshold', type=float, default=IV30_RV30_THRESHOLD)
+    backtest.add_argument('--slope-threshold', type=float, default=TS_SLOPE_THRESHOLD)
+    backtest.add_argument('--sweep', action='append', default=[], metavar='METRIC=START:STOP:STEP',
+                          help="also report signal statistics for a range of thresholds, e.g. iv30_rv30=1.0:1.6:0.05")
+    backtest.add_argument('--output', '-o', default='-', help="JSON report, '-' for stdout (default)")
+    backtest.add_argument('--offline', action='store_true', help="use only cached Yahoo data")
+
+    queue = subparsers.add_parser('queue', help="sharded scans: a work queue shared by worker processes or hosts")
+    queue_commands = queue.add_subparsers(dest='queue_command', required=True)
+    queue_init = queue_commands.add_parser('init', help="create a queue holding the universe to scan")
+    queue_init.add_argument('path', help="queue file (SQLite)")
+    queue_init.add_argument('--limit', type=int, default=100, help="number of S&P 500 tickers to analyze (default: 100)")
+    queue_init.add_argument('--no-bulk-history', action='store_true', help="fetch price history per ticker")
+    queue_init.add_argument('--expiries', choices=('minimal', 'all'), default=EXPIRY_SELECTION_MODE,
+                            help="download only the option chains the metrics need, or every expiry up to 45 DTE")
+    queue_init.add_argument('--min-score', type=int, default=None, choices=(3,),
+                            help="pre-screen each leased batch on price history and skip tickers that cannot reach this "
+                                 "score; only the volume criterion is known up front, so 3 is the only value")
+    queue_work = queue_commands.add_parser('work', help="analyze tickers from a queue until it is drained")
+    queue_work.add_argument('path', help="queue file (SQLite)")
+    queue_work.add_argument('--workers', type=int, default=DEFAULT_SCAN_WORKERS, help="concurrent scan threads")
+    queue_work.add_argument('--rps', type=float, default=None, help=f"initial Yahoo requests per second of this worker, at most {MAX_REQUESTS_PER_SECOND:g}")
+    queue_work.add_argument('--sessions', type=int, default=YF_SESSION_POOL_SIZE, help="pooled Yahoo sessions")
+    queue_work.add_argument('--worker-id', default=None, help="name recorded with leased tickers (default: host:pid)")
+    queue_work.add_argument('--offline', action='store_true', help="use only cached Yahoo data")
+    queue_status = queue_commands.add_parser('status', help="print pending/leased/done counts as JSON")
+    queue_status.add_argument('path', help="queue file (SQLite)")
+    queue_results = queue_commands.add_parser('results', help="write the merged ranking of finished tickers")
+    queue_results.add_argument('path', help="queue file (SQLite)")
+    queue_results.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="output format (default: jsonl)")
+    queue_results.add_argument('--output', '-o', default='-', help="ranked output, '-' for stdout (default)")
+    return parser
+
+def run_headless_scan(args) -> int:
+    """Run a scan without a display, streaming each result as it completes."""
+    real_stdout = sys.stdout
+    if args.offline:
+        configure_cache(enabled=True, offline=True)
+    configure_session_pool(args.sessions)
+
+    stream, close_stream = _open_output(args.output, real_stdout)
+    writer = ResultWriter(stream, args.format)
+    try:
+        # Progress chatter goes to stderr so stdout can carry the result stream
+        scan_options = dict(
+            list_limit=max(1, args.limit),
+            max_workers=max(1, min(MAX_SCAN_WORKERS, args.workers)),
+            requests_per_second=args.rps,
+            bulk_history=not args.no_bulk_history,
+            prescreen_min_score=args.min_score,
+            prescreen_policy=args.prescreen_policy,
+            expiry_mode=args.expiries,
+            result_callback=writer.write,
+        )
+        if args.processes > 1:
+            # The shared queue is the checkpoint: rerunning with the same --queue resumes it
+            scan_options.update(processes=args.processes, sessions=args.sessions, queue_path=args.queue)
+        else:
+            scan_options.update(resume=args.resume, run_id=args.run_id, checkpoint=not args.no_checkpoint)
+        with contextlib.redirect_stdout(sys.stderr):
+            results = auto_analyze_stocks(**scan_options)
+    except ValueError as e:
+        print(f"CLI Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if close_stream:
+            stream.close()
+        if args.metrics:
+            METRICS.write(args.metrics, args.metrics_format)
+
+    if args.iv_history:
+        recorded = append_iv_history(args.iv_history, results)
+        print(f"CLI: Recorded IV of {recorded} tickers in {args.iv_history}", file=sys.stderr)
+
+    ranked_path = args.ranked_output or _default_ranked_path(args.output, args.format)
+    if ranked_path:
+        ranked_stream, close_ranked = _open_output(ranked_path, real_stdout)
+        try:
+            ranked_writer = ResultWriter(ranked_stream, args.format)
+            for rank, result in enumerate(results, start=1):
+                ranked_writer.write(result, rank)
+        finally:
+            if close_ranked:
+                ranked_stream.close()
+        print(f"CLI: Ranked results written to {ranked_path}", file=sys.stderr)
+    return 0
+
+def run_watch(args) -> int:
+    """Rescan the universe until interrupted, streaming one JSON line per finished ticker."""
+    real_stdout = sys.stdout
+    if args.offline:
+        configure_cache(enabled=True, offline=True)
+    configure_session_pool(args.sessions)
+    if args.rps:
+        YF_RATE_LIMITER.set_rate(args.rps)
+
+    stream, close_stream = _open_output(args.output, real_stdout)
+
+    def publish(update):
+        stream.write(json.dumps(watch_record(update)) + "\n")
+        stream.flush()
+
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            scheduler = WatchScheduler(
+                get_sp500_stocks(limit=max(1, args.limit)),
+                max_workers=max(1, min(MAX_SCAN_WORKERS, args.workers)),
+                on_update=publish,
+                expiry_mode=args.expiries,
+                min_interval_s=args.min_interval,
+                max_interval_s=args.max_interval,
+            )
+            print(f"CLI: Watching {len(scheduler.tickers)} tickers, rescans every "
+                  f"{args.min_interval:.0f}-{args.max_interval:.0f}s (Ctrl+C to stop)")
+            try:
+                scheduler.run(max_scans=args.max_scans)
+            except KeyboardInterrupt:
+                print("CLI: Watch stopped")
+            for line in METRICS.summary().splitlines():
+                print(f"CLI: Metrics: {line}")
+    finally:
+        if close_stream:
+            stream.close()
+        if args.metrics:
+            METRICS.write(args.metrics, args.metrics_format)
+    return 0
+
+def run_screen_command(args) -> int:
+    """Apply screening rules to the cached metrics table and write the ranked rows."""
+    real_stdout = sys.stdout
+    try:
+        spec = load_rules(args.rules) if args.rules else {'rules': DEFAULT_RULES, 'where': None, 'min_score': None}
+        table = load_metrics_table(args.table)
+        start = time.perf_counter()
+        screened = apply_rules(table, spec['rules'],
+                               where=args.where or spec['where'],
+                               min_score=args.min_score if args.min_score is not None else spec['min_score'])
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+    except (ValueError, OSError) as e:
+        print(f"CLI Error: {e}", file=sys.stderr)
+        return 2
+    if table.empty:
+        print("CLI: Warning: the metrics table is empty; run a scan first", file=sys.stderr)
+    columns = ['rank', 'ticker', 'score'] + [rule['name'] for rule in spec['rules']] + METRIC_COLUMNS + ['updated_at']
+    stream, close_stream = _open_output(args.output, real_stdout)
+    try:
+        writer = csv.DictWriter(stream, fieldnames=columns) if args.format == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for rank, (ticker, row) in enumerate(screened.iterrows(), start=1):
+            record = {'rank': rank, 'ticker': ticker}
+            record.update({c: _to_builtin(row[c]) for c in columns[2:]})
+            record = {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in record.items()}
+            if writer:
+                writer.writerow(record)
+            else:
+                stream.write(json.dumps(record) + "\n")
+    finally:
+        if close_stream:
+            stream.close()
+    print(f"CLI: Screened {len(table)} tickers with {len(spec['rules'])} rules in {elapsed_ms:.1f} ms; "
+          f"{len(screened)} rows", file=sys.stderr)
+    return 0
+
+def _parse_sweep(spec: str):
+    """'metric=start:stop:step' -> (metric, thresholds), stop inclusive."""
+    metric, _, bounds = spec.partition('=')
+    start, stop, step = (float(v) for v in bounds.split(':'))
+    if step <= 0:
+        raise ValueError(f"Sweep step must be positive: {spec}")
+    return metric, np.round(np.arange(start, stop + step / 2, step), 10)
+
+def run_backtest_command(args) -> int:
+    """Backtest the screen over stored history and write a JSON report."""
+    real_stdout = sys.stdout
+    if args.offline:
+        configure_cache(enabled=True, offline=True)
+    try:
+        horizons = tuple(int(h) for h in args.horizons.split(',') if h.strip())
+        sweeps = dict(_parse_sweep(spec) for spec in args.sweep)
+        iv_history = pd.read_csv(args.iv_history) if args.iv_history else None
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run_backtest(
+                get_sp500_stocks(limit=max(1, args.limit)),
+                period=args.period,
+                iv_history=iv_history,
+                horizons=horizons,
+                sweeps=sweeps,
+                volume_threshold=args.volume_threshold,
+                iv_rv_threshold=args.iv_rv_threshold,
+                slope_threshold=args.slope_threshold,
+            )
+    except (ValueError, OSError) as e:
+        print(f"CLI Error: {e}", file=sys.stderr)
+        return 2
+    stream, close_stream = _open_output(args.output, real_stdout)
+    try:
+        json.dump(report, stream, indent=2)
+        stream.write("\n")
+    finally:
+        if close_stream:
+            stream.close()
+    print(f"CLI: Backtested {report['tickers']} tickers x {report['days']} days in {report['compute_seconds']}s",
+          file=sys.stderr)
+    return 0
+
+def run_queue_command(args) -> int:
+    """Create, work on, inspect or merge a ScanQueue shared by several processes or hosts."""
+    real_stdout = sys.stdout
+    if args.queue_command == 'init':
+        params = {'expiry_mode': args.expiries, 'bulk_history': not args.no_bulk_history,
+                  'prescreen_min_score': args.min_score, 'prescreen_policy': 'skip'}
+        with contextlib.redirect_stdout(sys.stderr):
+            tickers = get_sp500_stocks(limit=max(1, args.limit))
+        try:
+            ScanQueue.create(args.path, tickers, params).close()
+        except FileExistsError as e:
+            print(f"CLI Error: {e}", file=sys.stderr)
+            return 2
+        print(f"CLI: Queued {len(tickers)} tickers in {args.path}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.path):
+        print(f"CLI Error: No scan queue at {args.path}", file=sys.stderr)
+        return 2
+    if args.queue_command == 'work':
+        if args.offline:
+            configure_cache(enabled=True, offline=True)
+        with contextlib.redirect_stdout(sys.stderr):
+            run_queue_worker(args.path, worker_id=args.worker_id,
+                             max_workers=max(1, min(MAX_SCAN_WORKERS, args.workers)),
+                             requests_per_second=args.rps, sessions=args.sessions)
+        return 0
+    queue = ScanQueue(args.path)
+    try:
+        if args.queue_command == 'status':
+            print(json.dumps(queue.progress()))
+            return 0
+        ranking = queue.ranking()
+        progress = queue.progress()
+    finally:
+        queue.close()
+    if progress['done'] < progress['total']:
+        print(f"CLI: Warning: {progress['total'] - progress['done']} tickers are not finished yet", file=sys.stderr)
+    stream, close_stream = _open_output(args.output, real_stdout)
+    try:
+        writer = ResultWriter(stream, args.format)
+        for rank, result in enumerate(ranking.ranked(), start=1):
+            writer.write(result, rank)
+    finally:
+        if close_stream:
+            stream.close()
+    return 0
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == 'scan':
+        return run_headless_scan(args)
+    if args.command == 'watch':
+        return run_watch(args)
+    if args.command == 'queue':
+        return run_queue_command(args)
+    if args.command == 'backtest':
+        return run_backtest_command(args)
+    if args.command == 'screen':
+        return run_screen_command(args)
+    gui()
+    return 0
+
 if __name__ == "__main__":
-    gui()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
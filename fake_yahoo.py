@@ -0,0 +1,591 @@
+"""
+Local stand-in for the Yahoo Finance and Wikipedia endpoints calculator.py uses.
+
+Serves synthetic (seeded, deterministic per ticker) or recorded responses for
+the options list, option chains, price history and the S&P 500 page, with
+configurable latency, server errors, 429 bursts and a rate-limit window, so
+whole scans can be load-tested repeatably on one machine.
+
+Usage:
+    python fake_yahoo.py serve --port 8765 --latency-ms 80 --jitter-ms 40 --burst-rate 0.01
+    FIAT_YAHOO_BASE_URL=http://127.0.0.1:8765 \\
+    FIAT_SP500_URL=http://127.0.0.1:8765/wiki/List_of_S%26P_500_companies \\
+    FIAT_CACHE_DIR=/tmp/fiat-fake python calculator.py scan --limit 100
+
+    python fake_yahoo.py loadtest --limit 100 --workers 8 --rps 10 --burst-rate 0.02
+
+Recorded responses: with --fixtures DIR a request is answered from
+DIR/<path>[@date=<date>].json (or .html) when that file exists, e.g.
+DIR/v7/finance/options/AAPL.json or DIR/v8/finance/chart/AAPL.json.
+"""
+
+import argparse
+import collections
+import contextlib
+import datetime
+import functools
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+SP500_PATH = "/wiki/List_of_S%26P_500_companies"
+EXCHANGE_TIMEZONE = "America/New_York"
+# Bars are stamped at the 9:30 ET open (13:30 UTC during daylight time), like Yahoo's daily chart
+BAR_TIME_UTC = datetime.time(13, 30)
+VALID_RANGES = ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"]
+RANGE_DAYS = {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}
+
+
+def _norm_cdf(x: float) -> float:
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def _black_scholes(spot: float, strike: float, years: float, iv: float, call: bool) -> float:
+    years = max(years, 1.0 / 365.0)
+    d1 = (math.log(spot / strike) + 0.5 * iv * iv * years) / (iv * math.sqrt(years))
+    d2 = d1 - iv * math.sqrt(years)
+    if call:
+        return spot * _norm_cdf(d1) - strike * _norm_cdf(d2)
+    return strike * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+
+
+class SyntheticMarket:
+    """Deterministic per-ticker price paths, expiries and option chains.
+
+    Each ticker gets a random profile (price level, realized volatility, volume,
+    IV premium and a front-month IV bump), drawn so that some tickers pass each
+    of the screen's checks and some do not.
+    """
+
+    def __init__(self, num_tickers: int = 500, seed: int = 0, no_options_rate: float = 0.03,
+                 history_days: int = 800):
+        self.seed = seed
+        self.tickers = [f"FK{i:03d}" for i in range(num_tickers)]
+        self.no_options_rate = no_options_rate
+        self.history_days = history_days
+        self.today = datetime.date.today()
+
+    def _rng(self, ticker: str, *salt: int):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), *salt])
+
+    def known(self, ticker: str) -> bool:
+        return ticker in self.tickers
+
+    @functools.lru_cache(maxsize=None)
+    def profile(self, ticker: str) -> dict:
+        rng = self._rng(ticker)
+        daily_vol = float(rng.uniform(0.008, 0.035))
+        return {
+            'price': float(np.exp(rng.uniform(np.log(15), np.log(600)))),
+            'daily_vol': daily_vol,
+            'volume': float(np.exp(rng.normal(np.log(2.0e6), 0.7))),
+            'iv_premium': float(rng.uniform(0.8, 1.8)),
+            'front_bump': float(rng.uniform(0.0, 0.6)) if rng.random() < 0.4 else 0.0,
+            'has_options': bool(rng.random() >= self.no_options_rate),
+        }
+
+    @functools.lru_cache(maxsize=4096)
+    def bars(self, ticker: str):
+        """(dates, open, high, low, close, volume) over the last `history_days` business days."""
+        p = self.profile(ticker)
+        dates = np.array([d.date() for d in _business_days(self.today - datetime.timedelta(days=self.history_days),
+                                                           self.today)])
+        n = len(dates)
+        rng = self._rng(ticker, 1)
+        returns = rng.normal(0.0, p['daily_vol'], n)
+        close = p['price'] * np.exp(returns - returns.sum())
+        open_ = close * np.exp(rng.normal(0.0, p['daily_vol'] / 3, n))
+        high = np.maximum(open_, close) * (1.0 + rng.uniform(0.0, p['daily_vol'], n))
+        low = np.minimum(open_, close) * (1.0 - rng.uniform(0.0, p['daily_vol'], n))
+        volume = np.round(p['volume'] * np.exp(rng.normal(0.0, 0.3, n)))
+        return dates, open_, high, low, close, volume
+
+    def spot(self, ticker: str) -> float:
+        return float(self.bars(ticker)[4][-1])
+
+    def expirations(self, ticker: str):
+        """Weekly Fridays for eight weeks plus monthly third Fridays out to six months, as dates."""
+        if not self.profile(ticker)['has_options']:
+            return []
+        fridays = [self.today + datetime.timedelta(days=d) for d in range(1, 190)
+                   if (self.today + datetime.timedelta(days=d)).weekday() == 4]
+        weekly = fridays[:8]
+        monthly = [d for d in fridays[8:] if 15 <= d.day <= 21]
+        return weekly + monthly
+
+    def implied_vol(self, ticker: str, dte: int, moneyness: float) -> float:
+        p = self.profile(ticker)
+        realized = p['daily_vol'] * math.sqrt(252)
+        term = realized * p['iv_premium'] + p['front_bump'] * math.exp(-dte / 10.0)
+        return max(0.05, term + 0.4 * math.log(moneyness) ** 2)
+
+    def chain(self, ticker: str, expiry: datetime.date):
+        spot = self.spot(ticker)
+        step = 1.0 if spot < 100 else 2.5 if spot < 250 else 5.0
+        lo, hi = math.floor(spot * 0.7 / step), math.ceil(spot * 1.3 / step)
+        dte = (expiry - self.today).days
+        years = max(dte, 1) / 365.0
+        rng = self._rng(ticker, 2, dte)
+        expiry_code = expiry.strftime("%y%m%d")
+        calls, puts = [], []
+        for k in range(lo, hi + 1):
+            strike = round(k * step, 2)
+            iv = self.implied_vol(ticker, dte, strike / spot)
+            for is_call, side in ((True, calls), (False, puts)):
+                fair = max(_black_scholes(spot, strike, years, iv, is_call), 0.01)
+                spread = max(0.01, fair * float(rng.uniform(0.01, 0.08)))
+                side.append({
+                    'contractSymbol': f"{ticker}{expiry_code}{'C' if is_call else 'P'}{int(strike * 1000):08d}",
+                    'strike': strike,
+                    'currency': 'USD',
+                    'lastPrice': round(fair, 2),
+                    'change': 0.0,
+                    'percentChange': 0.0,
+                    'volume': int(rng.integers(0, 5000)),
+                    'openInterest': int(rng.integers(0, 20000)),
+                    'bid': round(max(fair - spread / 2, 0.0), 2),
+                    'ask': round(fair + spread / 2, 2),
+                    'contractSize': 'REGULAR',
+                    'expiration': _epoch(expiry),
+                    'lastTradeDate': _epoch(self.today) - 3600,
+                    'impliedVolatility': iv,
+                    'inTheMoney': (strike < spot) if is_call else (strike > spot),
+                })
+        return calls, puts
+
+
+def _business_days(start: datetime.date, end: datetime.date):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield datetime.datetime.combine(day, BAR_TIME_UTC, tzinfo=datetime.timezone.utc)
+        day += datetime.timedelta(days=1)
+
+
+def _epoch(day: datetime.date) -> int:
+    return int(datetime.datetime.combine(day, datetime.time(0, 0), tzinfo=datetime.timezone.utc).timestamp())
+
+
+def _range_start(range_: str, today: datetime.date) -> datetime.date:
+    if range_ == 'max':
+        return datetime.date.min
+    if range_ == 'ytd':
+        return datetime.date(today.year, 1, 1)
+    for unit, days in RANGE_DAYS.items():
+        if range_.endswith(unit) and range_[:-len(unit)].isdigit():
+            return today - datetime.timedelta(days=int(range_[:-len(unit)]) * days)
+    raise ValueError(range_)
+
+
+class FaultInjector:
+    """Decides per request how long to stall and whether to fail it.
+
+    In order: a fixed-window rate limit (more than `rate_limit` requests per
+    `window_s` get 429 with Retry-After), 429 bursts (each request starts one
+    with probability `burst_rate`; the next `burst_length` requests then get
+    429 too), then server errors with probability `error_rate`.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 burst_rate: float = 0.0, burst_length: int = 20, rate_limit: int | None = None,
+                 window_s: float = 1.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.burst_rate = burst_rate
+        self.burst_length = burst_length
+        self.rate_limit = rate_limit
+        self.window_s = window_s
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_left = 0
+        self._window_start = 0.0
+        self._window_count = 0
+
+    def decide(self):
+        """(delay_s, status or None for a normal answer, extra headers)."""
+        with self._lock:
+            delay_s = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000.0
+            now = time.monotonic()
+            if self.rate_limit:
+                if now - self._window_start >= self.window_s:
+                    self._window_start, self._window_count = now, 0
+                self._window_count += 1
+                if self._window_count > self.rate_limit:
+                    retry_after = max(1, math.ceil(self._window_start + self.window_s - now))
+                    return delay_s, 429, {'Retry-After': str(retry_after)}
+            if self._burst_left > 0:
+                self._burst_left -= 1
+                return delay_s, 429, {}
+            if self.burst_rate and self._rng.random() < self.burst_rate:
+                self._burst_left = max(0, self.burst_length - 1)
+                return delay_s, 429, {}
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return delay_s, self._rng.choice((500, 502, 503)), {}
+            return delay_s, None, {}
+
+
+class ServerStats:
+    """Request counts and service times, plus when each ticker was first and last requested."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.by_status = collections.Counter()
+        self.by_endpoint = collections.Counter()
+        self.service_s = []
+        self.ticker_span = {}
+
+    def record(self, endpoint: str, ticker: str | None, status: int, service_s: float):
+        now = time.monotonic()
+        with self._lock:
+            self.by_status[status] += 1
+            self.by_endpoint[endpoint] += 1
+            self.service_s.append(service_s)
+            if ticker:
+                first, _ = self.ticker_span.get(ticker, (now, now))
+                self.ticker_span[ticker] = (first, now)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            service_ms = np.array(self.service_s) * 1000.0
+            spans = np.array([last - first for first, last in self.ticker_span.values()])
+            elapsed = time.monotonic() - self.started
+            return {
+                'requests': int(sum(self.by_status.values())),
+                'requests_per_s': sum(self.by_status.values()) / elapsed if elapsed else 0.0,
+                'by_status': {str(k): v for k, v in sorted(self.by_status.items())},
+                'by_endpoint': dict(self.by_endpoint),
+                'service_ms': _percentiles(service_ms),
+                # First to last request per ticker: server-side view of how long each ticker took
+                'ticker_span_s': _percentiles(spans),
+            }
+
+
+def _percentiles(values) -> dict:
+    if len(values) == 0:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'max': float(np.max(values))}
+
+
+class FakeYahooHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeYahoo/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        path = parts.path or "/"
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        endpoint, ticker = _classify(path)
+        server = self.server
+
+        status, headers = None, {}
+        # yfinance refetches the cookie before each request when it cannot cache it under a yahoo.com
+        # domain (as here), so like the Wikipedia page it is served without faults
+        if endpoint not in ('cookie', 'sp500'):
+            delay_s, status, headers = server.faults.decide()
+            if delay_s:
+                time.sleep(delay_s)
+        if status is not None:
+            body = b"Too Many Requests" if status == 429 else b"Server Error"
+            self._send(status, body, 'text/plain', headers)
+        else:
+            status = self._answer(endpoint, ticker, path, query)
+        server.stats.record(endpoint, ticker, status, time.perf_counter() - start)
+
+    def _answer(self, endpoint, ticker, path, query) -> int:
+        fixture = self.server.fixture(path, query)
+        if fixture is not None:
+            body, content_type = fixture
+            return self._send(200, body, content_type)
+
+        market = self.server.market
+        if endpoint == 'cookie':
+            expires = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=365))
+            cookie = f"A3=d=fake&S=fake; Expires={expires:%a, %d %b %Y %H:%M:%S GMT}; Path=/"
+            return self._send(200, b"", 'text/plain', {'Set-Cookie': cookie})
+        if endpoint == 'crumb':
+            return self._send(200, b"fakeCrumb0", 'text/plain')
+        if endpoint == 'options':
+            if not market.known(ticker):
+                return self._json(404, {'optionChain': {'result': [], 'error': {'code': 'Not Found'}}})
+            return self._json(200, _options_payload(market, ticker, query.get('date')))
+        if endpoint == 'chart':
+            if not market.known(ticker):
+                return self._json(404, {'chart': {'result': None, 'error': {
+                    'code': 'Not Found', 'description': 'No data found, symbol may be delisted'}}})
+            return self._json(200, _chart_payload(market, ticker, query))
+        if endpoint == 'sp500':
+            body = _sp500_html(market).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, b"", 'text/html', {'ETag': etag})
+            return self._send(200, body, 'text/html; charset=utf-8', {'ETag': etag})
+        return self._json(404, {'error': {'code': 'Not Found', 'description': path}})
+
+    def _json(self, status: int, payload) -> int:
+        return self._send(status, json.dumps(payload).encode(), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str, headers=None) -> int:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        return status
+
+    do_HEAD = do_GET
+
+
+def _classify(path: str):
+    """(endpoint, ticker) for a request path."""
+    if path in ("", "/"):
+        return 'cookie', None
+    if path.endswith("/getcrumb"):
+        return 'crumb', None
+    if path.startswith("/v7/finance/options/"):
+        return 'options', unquote(path.rsplit("/", 1)[-1]).upper()
+    if path.startswith("/v8/finance/chart/"):
+        return 'chart', unquote(path.rsplit("/", 1)[-1]).upper()
+    if "S%26P_500" in path or "S&P_500" in unquote(path):
+        return 'sp500', None
+    return 'other', None
+
+
+def _options_payload(market: SyntheticMarket, ticker: str, date: str | None) -> dict:
+    expirations = market.expirations(ticker)
+    spot = market.spot(ticker)
+    options = []
+    if expirations:
+        wanted = expirations[0] if date is None else next(
+            (d for d in expirations if _epoch(d) == int(date)), None)
+        if wanted is not None:
+            calls, puts = market.chain(ticker, wanted)
+            options.append({'expirationDate': _epoch(wanted), 'hasMiniOptions': False, 'calls': calls, 'puts': puts})
+    strikes = sorted({c['strike'] for o in options for c in o['calls']})
+    return {'optionChain': {'result': [{
+        'underlyingSymbol': ticker,
+        'expirationDates': [_epoch(d) for d in expirations],
+        'strikes': strikes,
+        'hasMiniOptions': False,
+        'quote': {'symbol': ticker, 'currency': 'USD', 'quoteType': 'EQUITY', 'regularMarketPrice': spot},
+        'options': options,
+    }], 'error': None}}
+
+
+def _chart_payload(market: SyntheticMarket, ticker: str, query: dict) -> dict:
+    dates, open_, high, low, close, volume = market.bars(ticker)
+    range_ = query.get('range')
+    if range_:
+        start = _range_start(range_, market.today)
+        end = market.today
+    else:
+        start = datetime.datetime.fromtimestamp(int(query.get('period1', 0)), datetime.timezone.utc).date()
+        end = datetime.datetime.fromtimestamp(int(query.get('period2', time.time())), datetime.timezone.utc).date()
+    keep = (dates > start) & (dates <= end) if range_ else (dates >= start) & (dates < end)
+    if range_ == '1d':
+        keep = np.zeros(len(dates), dtype=bool)
+        keep[-1] = True
+    stamps = [int(datetime.datetime.combine(d, BAR_TIME_UTC, tzinfo=datetime.timezone.utc).timestamp())
+              for d in dates[keep]]
+    now = int(time.time())
+    period = {'timezone': 'EDT', 'gmtoffset': -14400, 'start': now - 3600, 'end': now + 3600}
+    meta = {
+        'currency': 'USD', 'symbol': ticker, 'exchangeName': 'NMS', 'fullExchangeName': 'NasdaqGS',
+        'instrumentType': 'EQUITY', 'firstTradeDate': 946684800, 'regularMarketTime': now,
+        'hasPrePostMarketData': True, 'gmtoffset': -14400, 'timezone': 'EDT',
+        'exchangeTimezoneName': EXCHANGE_TIMEZONE, 'regularMarketPrice': float(close[-1]),
+        'chartPreviousClose': float(close[-2]), 'priceHint': 2,
+        'currentTradingPeriod': {'pre': period, 'regular': period, 'post': period},
+        'dataGranularity': query.get('interval', '1d'), 'range': range_ or '', 'validRanges': VALID_RANGES,
+    }
+    quote = {
+        'open': open_[keep].round(4).tolist(), 'high': high[keep].round(4).tolist(),
+        'low': low[keep].round(4).tolist(), 'close': close[keep].round(4).tolist(),
+        'volume': volume[keep].astype(int).tolist(),
+    }
+    return {'chart': {'result': [{
+        'meta': meta, 'timestamp': stamps,
+        'indicators': {'quote': [quote], 'adjclose': [{'adjclose': quote['close']}]},
+    }], 'error': None}}
+
+
+def _sp500_html(market: SyntheticMarket) -> str:
+    rows = "\n".join(f'<tr><td><a href="#">{t}</a></td><td>Fake {t} Inc.</td></tr>' for t in market.tickers)
+    return ('<html><body><table id="constituents"><thead><tr><th>Symbol</th><th>Security</th></tr></thead>'
+            f'<tbody>\n{rows}\n</tbody></table></body></html>')
+
+
+class FakeYahooServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering like Yahoo Finance / Wikipedia; usable as a context manager."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, market: SyntheticMarket | None = None,
+                 faults: FaultInjector | None = None, fixtures_dir: str | None = None):
+        super().__init__((host, port), FakeYahooHandler)
+        self.market = market or SyntheticMarket()
+        self.faults = faults or FaultInjector()
+        self.fixtures_dir = fixtures_dir
+        self.stats = ServerStats()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def sp500_url(self) -> str:
+        return self.url + SP500_PATH
+
+    def fixture(self, path: str, query: dict):
+        """(body, content type) of a recorded response for this request, or None."""
+        if not self.fixtures_dir:
+            return None
+        stem = os.path.join(self.fixtures_dir, *unquote(path).strip("/").split("/"))
+        if query.get('date'):
+            stem += f"@date={query['date']}"
+        for ext, content_type in (('.json', 'application/json'), ('.html', 'text/html; charset=utf-8')):
+            if os.path.isfile(stem + ext):
+                with open(stem + ext, 'rb') as f:
+                    return f.read(), content_type
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-yahoo", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _server_from_args(args, port: int) -> FakeYahooServer:
+    rate_limit = window_s = None
+    if args.rate_limit:
+        count, _, window = args.rate_limit.partition('/')
+        rate_limit, window_s = int(count), float(window or 1.0)
+    faults = FaultInjector(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        burst_rate=args.burst_rate, burst_length=args.burst_length,
+        rate_limit=rate_limit, window_s=window_s or 1.0, seed=args.seed,
+    )
+    market = SyntheticMarket(num_tickers=args.tickers, seed=args.seed)
+    return FakeYahooServer(args.host, port, market=market, faults=faults, fixtures_dir=args.fixtures)
+
+
+def run_serve(args) -> int:
+    server = _server_from_args(args, args.port)
+    print(f"Fake Yahoo listening on {server.url}\n"
+          f"  FIAT_YAHOO_BASE_URL={server.url}\n"
+          f"  FIAT_SP500_URL={server.sp500_url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats.snapshot(), indent=2))
+    return 0
+
+
+def run_loadtest(args) -> int:
+    """Start a fake server, run one full scan against it and print a JSON report."""
+    workdir = tempfile.mkdtemp(prefix="fiat-loadtest-")
+    with _server_from_args(args, 0) as server:
+        # Keep the stored S&P list and caches of the real installation out of it
+        os.environ['FIAT_CACHE_DIR'] = workdir
+        os.environ['FIAT_YAHOO_BASE_URL'] = server.url
+        os.environ['FIAT_SP500_URL'] = server.sp500_url
+        import calculator
+        calculator.configure_endpoints(yahoo_base_url=server.url, sp500_url=server.sp500_url)
+        calculator.configure_cache(enabled=False)
+        calculator.configure_session_pool(args.sessions)
+        calculator.yf.set_tz_cache_location(workdir)
+
+        with contextlib.redirect_stdout(sys.stderr):
+            calculator.refresh_sp500_constituents(force=True)
+            start = time.perf_counter()
+            ranking = calculator.LiveRanking()
+            for _ in calculator.iter_analyze_stocks(
+                    list_limit=args.limit, max_workers=args.workers, requests_per_second=args.rps,
+                    bulk_history=not args.no_bulk_history, ranking=ranking, checkpoint=False):
+                pass
+            elapsed_s = time.perf_counter() - start
+
+        report = {
+            'scan': {
+                'tickers': args.limit, 'workers': args.workers, 'results': len(ranking),
+                'elapsed_s': elapsed_s, 'tickers_per_s': args.limit / elapsed_s if elapsed_s else None,
+            },
+            'server': server.stats.snapshot(),
+            'rate_controller': calculator.YF_RATE_LIMITER.status(),
+            'session_pool': calculator.YF_SESSION_POOL.stats(),
+            'client_metrics': calculator.METRICS.snapshot(),
+        }
+    print(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Local Yahoo Finance / Wikipedia stand-in for offline load tests")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve = subparsers.add_parser('serve', help="run the fake server until interrupted")
+    loadtest = subparsers.add_parser('loadtest', help="scan against an in-process fake server and report")
+    for sub in (serve, loadtest):
+        sub.add_argument('--host', default="127.0.0.1")
+        sub.add_argument('--tickers', type=int, default=500, help="size of the synthetic S&P 500 list")
+        sub.add_argument('--seed', type=int, default=0, help="seed for market data and fault injection")
+        sub.add_argument('--latency-ms', type=float, default=0.0, help="mean added latency per request")
+        sub.add_argument('--jitter-ms', type=float, default=0.0, help="standard deviation of the added latency")
+        sub.add_argument('--error-rate', type=float, default=0.0, help="probability of a 5xx answer")
+        sub.add_argument('--burst-rate', type=float, default=0.0, help="probability that a request starts a 429 burst")
+        sub.add_argument('--burst-length', type=int, default=20, help="requests answered 429 per burst")
+        sub.add_argument('--rate-limit', default=None, metavar='N[/SECONDS]',
+                         help="answer 429 (with Retry-After) beyond N requests per window (default window 1s)")
+        sub.add_argument('--fixtures', default=None, metavar='DIR', help="serve recorded responses from DIR")
+    serve.add_argument('--port', type=int, default=8765)
+    loadtest.add_argument('--limit', type=int, default=50, help="tickers to scan")
+    loadtest.add_argument('--workers', type=int, default=4, help="concurrent scan workers")
+    loadtest.add_argument('--rps', type=float, default=10.0, help="initial requests per second of the rate controller")
+    loadtest.add_argument('--sessions', type=int, default=3, help="pooled sessions")
+    loadtest.add_argument('--no-bulk-history', action='store_true', help="fetch price history per ticker")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == 'serve':
+        return run_serve(args)
+    return run_loadtest(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""Shared fixtures: a throwaway cache directory and the fake Yahoo server from fake_yahoo.py."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calculator  # noqa: E402
+from fake_yahoo import FakeYahooServer, SyntheticMarket  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """CACHE_DIR pointed at a temporary directory, with the response cache off."""
+    monkeypatch.setattr(calculator, 'CACHE_DIR', str(tmp_path))
+    # Tests scan the fake server's universe, not the bundled snapshot
+    monkeypatch.setattr(calculator, 'SP500_SNAPSHOT_PATH', str(tmp_path / 'no_snapshot.json'))
+    calculator.configure_cache(enabled=False)
+    yield str(tmp_path)
+    calculator.configure_cache(enabled=False)
+
+
+@pytest.fixture(scope='session')
+def fake_yahoo(tmp_path_factory):
+    """A local Yahoo / Wikipedia stand-in with a small synthetic universe; every Yahoo request goes to it."""
+    sp500_url = calculator.SP500_URL
+    with FakeYahooServer(market=SyntheticMarket(num_tickers=8, seed=3)) as server:
+        calculator.configure_endpoints(yahoo_base_url=server.url, sp500_url=server.sp500_url)
+        calculator.yf.set_tz_cache_location(str(tmp_path_factory.mktemp('yf_tz')))
+        calculator.YF_RATE_LIMITER.set_rate(calculator.MAX_REQUESTS_PER_SECOND)
+        yield server
+    calculator.configure_endpoints(yahoo_base_url='', sp500_url=sp500_url)
@@ -0,0 +1,54 @@
+"""Scan checkpoint journal and resumed scans."""
+import json
+
+import pytest
+
+import calculator
+
+PARAMS = {'list_limit': 5, 'expiry_mode': 'minimal', 'bulk_history': True,
+          'prescreen_min_score': None, 'prescreen_policy': 'skip'}
+
+
+def test_journal_round_trip_ignores_torn_last_line(tmp_path):
+    journal = calculator.ScanJournal('run', PARAMS, str(tmp_path)).open(resume=False)
+    journal.record('AAA', {'ticker': 'AAA', 'score': 2})
+    journal.record('BBB', None)
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"ticker": "CCC", "res')
+
+    completed = calculator.ScanJournal('run', PARAMS, str(tmp_path)).load()
+    assert completed == {'AAA': {'ticker': 'AAA', 'score': 2}, 'BBB': None}
+
+
+def test_journal_rejects_other_parameters(tmp_path):
+    calculator.ScanJournal('run', PARAMS, str(tmp_path)).open(resume=False).close()
+    with pytest.raises(ValueError):
+        calculator.ScanJournal('run', {**PARAMS, 'bulk_history': False}, str(tmp_path)).load()
+
+
+def test_resume_rejects_other_bulk_history_setting(fake_yahoo, cache_dir):
+    scan = calculator.iter_analyze_stocks(list_limit=3, bulk_history=False, run_id='bulk-test')
+    next(scan)
+    scan.close()
+    with pytest.raises(ValueError):
+        next(calculator.iter_analyze_stocks(list_limit=3, bulk_history=True, run_id='bulk-test', resume=True))
+
+
+def test_resume_analyzes_only_unfinished_tickers(fake_yahoo, cache_dir):
+    options = {'list_limit': 5, 'bulk_history': False, 'run_id': 'resume-test'}
+    scan = calculator.iter_analyze_stocks(**options)
+    interrupted = [next(scan), next(scan)]
+    scan.close()
+    restored = [r['ticker'] for r in interrupted]
+    last_requested = {t: fake_yahoo.stats.ticker_span[t][1] for t in restored}
+
+    resumed = list(calculator.iter_analyze_stocks(resume=True, **options))
+
+    assert [r['ticker'] for r in resumed[:2]] == restored
+    assert resumed[:2] == json.loads(json.dumps(calculator._to_builtin_tree(interrupted)))
+    assert {t: fake_yahoo.stats.ticker_span[t][1] for t in restored} == last_requested
+    universe = calculator.get_sp500_stocks(limit=5)
+    with open(calculator.ScanJournal('resume-test', {}).path, encoding='utf-8') as f:
+        journaled = [json.loads(line)['ticker'] for line in f.read().splitlines()[1:]]
+    assert sorted(journaled) == sorted(universe)
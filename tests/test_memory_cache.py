@@ -0,0 +1,116 @@
+"""MemoryCache: single-flight fetches, LRU eviction and expiry."""
+import threading
+import time
+
+import pytest
+
+import calculator
+
+
+def wait_for(condition, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run_concurrently(n, target):
+    results, errors = [None] * n, [None] * n
+
+    def call(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_fetch():
+    cache = calculator.MemoryCache(4)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        # Hold the flight open until every other caller has joined it
+        wait_for(lambda: cache.coalesced == 7)
+        return ['2026-01-16']
+
+    results, errors = run_concurrently(8, lambda: cache.get_or_fetch(('AAA', 'options', ''), fetch, 'options'))
+    assert errors == [None] * 8
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.get_or_fetch(('AAA', 'options', ''), fetch, 'options') == ['2026-01-16']
+    assert cache.stats() == {'entries': 1, 'max_entries': 4, 'hits': 1, 'misses': 1, 'coalesced': 7,
+                             'evictions': 0}
+
+
+def test_fetch_error_reaches_every_waiter_and_is_not_cached():
+    cache = calculator.MemoryCache(4)
+
+    def fail():
+        wait_for(lambda: cache.coalesced == 3)
+        raise RuntimeError("boom")
+
+    _, errors = run_concurrently(4, lambda: cache.get_or_fetch('k', fail, 'options'))
+    assert [str(e) for e in errors] == ["boom"] * 4
+    assert cache.get_or_fetch('k', lambda: ['ok'], 'options') == ['ok']
+    assert cache.stats()['misses'] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = calculator.MemoryCache(2)
+    cache.get_or_fetch('a', lambda: ['a'], 'options')
+    cache.get_or_fetch('b', lambda: ['b'], 'options')
+    cache.get_or_fetch('a', pytest.fail, 'options')
+    cache.get_or_fetch('c', lambda: ['c'], 'options')
+    assert cache.stats()['evictions'] == 1
+    assert cache.get_or_fetch('a', pytest.fail, 'options') == ['a']
+    assert cache.get_or_fetch('b', lambda: ['b2'], 'options') == ['b2']
+
+
+def test_expired_and_empty_values_are_fetched_again(monkeypatch):
+    cache = calculator.MemoryCache(4)
+    cache.get_or_fetch('empty', lambda: [], 'options')
+    assert cache.get_or_fetch('empty', lambda: ['x'], 'options') == ['x']
+
+    monkeypatch.setattr(calculator, 'cache_expiry', lambda endpoint, fetched_at=None: time.time() - 1)
+    cache.get_or_fetch('old', lambda: ['v1'], 'option_chain')
+    assert cache.get_or_fetch('old', lambda: ['v2'], 'option_chain') == ['v2']
+
+
+def test_disabled_cache_still_coalesces():
+    cache = calculator.MemoryCache(0)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        wait_for(lambda: cache.coalesced == 3)
+        return ['v']
+
+    results, _ = run_concurrently(4, lambda: cache.get_or_fetch('k', fetch, 'options'))
+    assert results == [['v']] * 4 and len(calls) == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_concurrent_option_lists_make_one_request(fake_yahoo, cache_dir):
+    ticker = fake_yahoo.market.tickers[-1]
+    stock = calculator.yf.Ticker(ticker, session=calculator.get_yf_session())
+    before = fake_yahoo.stats.by_endpoint['options']
+    joined = calculator.MEMORY_CACHE.coalesced + 5
+
+    def fetch():
+        wait_for(lambda: calculator.MEMORY_CACHE.coalesced == joined)
+        return list(stock.options)
+
+    results, errors = run_concurrently(6, lambda: calculator.cached_fetch(ticker, 'options', fetch))
+    assert errors == [None] * 6
+    assert results[0] and all(result == results[0] for result in results)
+    # The server counts a request only after it has sent the answer
+    wait_for(lambda: fake_yahoo.stats.by_endpoint['options'] > before)
+    assert fake_yahoo.stats.by_endpoint['options'] - before == 1
@@ -0,0 +1,135 @@
+"""ScanMetrics: histogram buckets, JSON / Prometheus export, and the counters Yahoo requests feed."""
+import json
+import threading
+
+import pytest
+
+import calculator
+
+
+class FailFirst:
+    """Fault injector for FakeYahooServer: answer the next `times` requests with `status`."""
+
+    def __init__(self, status, times, headers=None):
+        self.status = status
+        self.left = times
+        self.headers = headers or {}
+        self._lock = threading.Lock()
+
+    def decide(self):
+        with self._lock:
+            if self.left:
+                self.left -= 1
+                return 0.0, self.status, self.headers
+        return 0.0, None, {}
+
+
+def checked(response):
+    response.raise_for_status()
+    return response
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = calculator.Histogram(bounds=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 2.0, 3.0):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {'0.1': 2, '1.0': 3, '+Inf': 5}
+    assert snapshot['count'] == 5 and snapshot['max_s'] == 3.0
+    assert snapshot['sum_s'] == pytest.approx(5.65)
+    assert snapshot['p50_s'] == 1.0 and snapshot['p99_s'] == 3.0
+
+
+def test_json_and_prometheus_export(tmp_path):
+    metrics = calculator.ScanMetrics()
+    metrics.inc('requests', 3)
+    metrics.inc('retries')
+    metrics.observe('ticker', 0.02)
+    metrics.observe('ticker', 7.0)
+
+    data = json.loads(metrics.to_json())
+    assert data['counters'] == {'requests': 3, 'retries': 1}
+    assert data['stages']['ticker']['count'] == 2
+
+    lines = metrics.to_prometheus().splitlines()
+    assert '# TYPE fiat_requests_total counter' in lines and 'fiat_requests_total 3' in lines
+    assert 'fiat_retries_total 1' in lines
+    buckets = [int(line.rsplit(' ', 1)[1]) for line in lines
+               if line.startswith('fiat_stage_seconds_bucket{stage="ticker"')]
+    assert len(buckets) == len(calculator.METRIC_BUCKETS_S) + 1
+    assert buckets == sorted(buckets) and buckets[0] == 0 and buckets[-1] == 2
+    assert 'fiat_stage_seconds_bucket{stage="ticker",le="+Inf"} 2' in lines
+    assert 'fiat_stage_seconds_count{stage="ticker"} 2' in lines
+    assert 'fiat_stage_seconds_sum{stage="ticker"} 7.02' in lines
+
+    metrics.write(str(tmp_path / 'm.prom'))
+    metrics.write(str(tmp_path / 'm.json'))
+    assert (tmp_path / 'm.prom').read_text().startswith('# TYPE fiat_requests_total counter')
+    assert json.loads((tmp_path / 'm.json').read_text())['counters']['requests'] == 3
+
+
+def test_merged_snapshots_equal_one_combined_run():
+    first, second, combined = calculator.ScanMetrics(), calculator.ScanMetrics(), calculator.ScanMetrics()
+    for metrics, values in ((first, (0.003, 0.2)), (second, (0.2, 45.0, 120.0))):
+        metrics.inc('requests', len(values))
+        for seconds in values:
+            metrics.observe('ticker', seconds)
+            combined.observe('ticker', seconds)
+    combined.inc('requests', 5)
+
+    merged = calculator.ScanMetrics()
+    merged.merge(first.snapshot())
+    merged.merge(second.snapshot())
+    assert merged.snapshot()['counters'] == combined.snapshot()['counters']
+    assert merged.snapshot()['stages'] == combined.snapshot()['stages']
+
+
+def test_throttled_request_counts_one_rate_limit_hit_and_retry(fake_yahoo, monkeypatch):
+    url = fake_yahoo.url + '/v8/finance/chart/' + fake_yahoo.market.tickers[6]
+    session = calculator.get_yf_session()
+    monkeypatch.setattr(fake_yahoo, 'faults', FailFirst(429, 1, {'Retry-After': '1'}))
+    throttles = calculator.YF_RATE_LIMITER.throttles
+    calculator.METRICS.reset()
+    try:
+        response = calculator.retry_with_backoff(lambda: checked(session.get(url)), description="chart")
+    finally:
+        calculator.YF_RATE_LIMITER.set_rate(calculator.MAX_REQUESTS_PER_SECOND)
+
+    assert response.status_code == 200
+    counters = calculator.METRICS.snapshot()['counters']
+    assert counters['requests'] == 2
+    assert counters['throttled_responses'] == 1
+    assert counters['rate_limit_hits'] == 1
+    assert counters['retries'] == 1
+    # Reported once, by the session router that saw the Retry-After header
+    assert calculator.YF_RATE_LIMITER.throttles == throttles + 1
+
+
+def test_consecutive_server_errors_reset_the_session(fake_yahoo, monkeypatch):
+    url = fake_yahoo.url + '/v8/finance/chart/' + fake_yahoo.market.tickers[6]
+    session = calculator.get_yf_session()
+    monkeypatch.setattr(fake_yahoo, 'faults', FailFirst(503, calculator.SESSION_EVICT_CONSECUTIVE_FAILURES))
+    calculator.configure_session_pool(1)
+    calculator.METRICS.reset()
+    try:
+        statuses = [session.get(url).status_code for _ in range(calculator.SESSION_EVICT_CONSECUTIVE_FAILURES + 1)]
+    finally:
+        calculator.configure_session_pool(calculator.YF_SESSION_POOL_SIZE)
+
+    assert statuses == [503] * calculator.SESSION_EVICT_CONSECUTIVE_FAILURES + [200]
+    counters = calculator.METRICS.snapshot()['counters']
+    assert counters['server_errors'] == calculator.SESSION_EVICT_CONSECUTIVE_FAILURES
+    assert counters['session_resets'] == 1
+
+
+def test_batched_history_credits_the_limiter_once_per_symbol(fake_yahoo):
+    limiter = calculator.YF_RATE_LIMITER
+    limiter.set_rate(1.0)
+    successes = limiter.successes
+    try:
+        frames = calculator._download_history_batch(fake_yahoo.market.tickers, period='1mo')
+        assert len(frames) == len(fake_yahoo.market.tickers)
+        assert limiter.successes - successes == len(frames)
+        assert limiter.rate == pytest.approx(1.0 + limiter.increase * len(frames))
+    finally:
+        limiter.set_rate(calculator.MAX_REQUESTS_PER_SECOND)
@@ -0,0 +1,97 @@
+"""OHLCVStore: append, rewrite and stale merges, generation files, and sync."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import calculator
+
+
+def bars_frame(start, n, bump=0.0):
+    index = pd.bdate_range(start, periods=n, name='Date')
+    close = np.arange(n, dtype=float) + 100.0 + bump
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': close * 1000}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return calculator.OHLCVStore(str(tmp_path / 'ohlcv'))
+
+
+def test_merge_appends_new_bars(store):
+    assert store.merge('AAA', calculator.ohlcv_records(bars_frame('2024-01-01', 20)), full=True) == 'rewrite'
+    generation = store.meta('AAA')['generation']
+    # Overlapping download: the shared bars match, three are new
+    update = calculator.ohlcv_records(bars_frame('2024-01-01', 23).iloc[15:])
+    assert store.merge('AAA', update) == 'append'
+    assert len(store.bars('AAA')) == 23
+    assert store.meta('AAA')['generation'] == generation
+    assert store.merge('AAA', update) == 'unchanged'
+
+
+def test_merge_rewrites_when_only_the_last_bar_moved(store):
+    store.merge('AAA', calculator.ohlcv_records(bars_frame('2024-01-01', 20)), full=True)
+    held = store.frame('AAA')
+    update = bars_frame('2024-01-01', 22).iloc[17:]
+    update.iloc[2, update.columns.get_loc('Close')] += 0.5  # the bar that was still forming
+    assert store.merge('AAA', calculator.ohlcv_records(update)) == 'rewrite'
+    assert len(store.bars('AAA')) == 22
+    assert store.frame('AAA')['Close'].iloc[19] == 119.5
+    # Readers holding the previous generation keep its data
+    assert held['Close'].iloc[19] == 119.0
+
+
+def test_merge_reports_stale_history_without_writing(store):
+    store.merge('AAA', calculator.ohlcv_records(bars_frame('2024-01-01', 20)), full=True)
+    before = np.array(store.bars('AAA'))
+    adjusted = calculator.ohlcv_records(bars_frame('2024-01-01', 21, bump=1.0).iloc[15:])
+    assert store.merge('AAA', adjusted) == 'stale'
+    assert np.array_equal(np.array(store.bars('AAA')), before)
+
+
+def test_rewrites_keep_only_the_previous_generation(store):
+    for bump in range(4):
+        store.merge('AAA', calculator.ohlcv_records(bars_frame('2024-01-01', 10, bump=bump)), full=True)
+    files = sorted(name for name in os.listdir(store.directory) if name.endswith('.bars'))
+    assert files == ['AAA.3.bars', 'AAA.4.bars']
+    assert store.frame('AAA')['Close'].iloc[0] == 103.0
+
+
+def test_sync_refetches_stale_ticker_from_its_first_bar(store, monkeypatch):
+    served = {'AAA': bars_frame('2020-01-01', 60)}
+    windows = []
+
+    def download(batch, **window):
+        windows.append(window)
+        return {t: served[t] for t in batch}
+
+    monkeypatch.setattr(calculator, '_download_history_batch', download)
+    store.sync(['AAA'], 'max')
+    assert windows == [{'period': 'max'}]
+    meta = store.meta('AAA')
+    assert meta['covered_from'] == '2020-01-01'
+    assert meta['since_inception']
+
+    # Re-adjusted history: the overlap check fails and the whole history is fetched again
+    served['AAA'] = bars_frame('2020-01-01', 61, bump=1.0)
+    store._write_meta('AAA', {**meta, 'synced_at': 0})
+    histories = store.sync(['AAA'], 'max')
+    assert windows[1:] == [{'start': '2020-03-21'}, {'start': '2020-01-01'}]
+    assert histories['AAA']['Close'].iloc[0] == 101.0
+    assert len(histories['AAA']) == 61
+    assert store.meta('AAA')['covered_from'] == '2020-01-01'
+
+
+def test_sync_downloads_only_what_is_missing(store, fake_yahoo):
+    tickers = fake_yahoo.market.tickers[:2]
+    first = store.sync(tickers, '3mo')
+    assert set(first) == set(tickers)
+    assert all(len(frame) > 40 for frame in first.values())
+
+    calculator.METRICS.reset()
+    again = store.sync(tickers, '3mo')
+    assert calculator.METRICS.snapshot()['counters'].get('history_store_hits') == 2
+    for t in tickers:
+        pd.testing.assert_frame_equal(again[t], first[t])
@@ -0,0 +1,106 @@
+"""Sharded scans: queue leases, requeueing of expired leases, workers draining the queue, and the merge."""
+import os
+import time
+
+import calculator
+
+PARAMS = {'expiry_mode': 'minimal', 'bulk_history': True, 'prescreen_min_score': None, 'prescreen_policy': 'skip'}
+
+
+def _expire_leases(queue):
+    queue._conn.execute("UPDATE tasks SET leased_at = leased_at - ? WHERE state='leased'",
+                        (calculator.QUEUE_LEASE_SECONDS + 1,))
+
+
+def test_leases_do_not_overlap(tmp_path):
+    queue = calculator.ScanQueue.create(str(tmp_path / 'q.sqlite'), ['A', 'B', 'C', 'D', 'E'], PARAMS)
+    assert queue.lease('w1', 2) == [(0, 'A'), (1, 'B')]
+    assert queue.lease('w2', 2) == [(2, 'C'), (3, 'D')]
+    assert queue.progress() == {'pending': 1, 'leased': 4, 'done': 0, 'total': 5}
+    assert queue.params == PARAMS
+    queue.close()
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    queue = calculator.ScanQueue.create(str(tmp_path / 'q.sqlite'), ['A', 'B', 'C'], PARAMS)
+    queue.lease('dead', 2)
+    queue.complete(0, {'ticker': 'A', 'score': 1}, 'dead')
+    assert queue.lease('w1', 5) == [(2, 'C')]
+
+    _expire_leases(queue)
+    # The finished task stays done; only the abandoned one comes back
+    assert queue.lease('w2', 5) == [(1, 'B'), (2, 'C')]
+    attempts = dict(queue._conn.execute("SELECT ticker, attempts FROM tasks").fetchall())
+    assert attempts == {'A': 1, 'B': 2, 'C': 2}
+    queue.close()
+
+
+def test_results_merge_in_universe_order(tmp_path):
+    queue = calculator.ScanQueue.create(str(tmp_path / 'q.sqlite'), ['A', 'B', 'C'], PARAMS)
+    queue.lease('w1', 3)
+    queue.complete(2, {'ticker': 'C', 'score': 3, 'status': 'success'}, 'w1')
+    queue.complete(1, None, 'w1')
+    queue.complete(0, {'ticker': 'A', 'score': 3, 'status': 'success'}, 'w1')
+    assert queue.results() == [(0, {'ticker': 'A', 'score': 3, 'status': 'success'}), (1, None),
+                               (2, {'ticker': 'C', 'score': 3, 'status': 'success'})]
+    assert [r['ticker'] for r in queue.ranking().ranked()] == ['A', 'C']
+    queue.close()
+
+
+def test_worker_takes_over_abandoned_tickers(fake_yahoo, cache_dir):
+    universe = calculator.get_sp500_stocks(limit=4)
+    path = os.path.join(cache_dir, 'queue.sqlite')
+    queue = calculator.ScanQueue.create(path, universe, PARAMS)
+    queue.lease('dead', 2)
+    _expire_leases(queue)
+
+    calculator.METRICS.reset()
+    assert calculator.run_queue_worker(path, 'w1', max_workers=2, lease_batch=2) == 4
+    assert queue.progress() == {'pending': 0, 'leased': 0, 'done': 4, 'total': 4}
+    workers = dict(queue._conn.execute("SELECT ticker, worker FROM tasks").fetchall())
+    assert set(workers.values()) == {'w1'}
+
+    snapshot = calculator.METRICS.snapshot()
+    counters = snapshot['counters']
+    assert counters['requests'] > 0
+    assert counters.get('tickers_analyzed', 0) + counters.get('tickers_skipped', 0) == 4
+    assert snapshot['stages']['ticker']['count'] == 4
+    assert 'fiat_requests_total' in calculator.METRICS.to_prometheus()
+
+    ranking = calculator.LiveRanking()
+    for _ in calculator.iter_analyze_stocks(list_limit=4, ranking=ranking, checkpoint=False):
+        pass
+    expected = [(r['ticker'], r['score']) for r in ranking.ranked()]
+    assert expected
+    assert [(r['ticker'], r['score']) for r in queue.ranking().ranked()] == expected
+    queue.close()
+
+
+def test_sharded_scan_matches_single_process_scan_and_resumes(fake_yahoo, cache_dir, monkeypatch):
+    # Spawned workers configure themselves from the environment
+    monkeypatch.setenv('FIAT_YAHOO_BASE_URL', fake_yahoo.url)
+    monkeypatch.setenv('FIAT_CACHE_DIR', cache_dir)
+    monkeypatch.setenv('FIAT_CACHE', '0')
+    queue_path = os.path.join(cache_dir, 'sharded.sqlite')
+    options = {'list_limit': 6, 'processes': 2, 'requests_per_second': 10, 'queue_path': queue_path}
+
+    sharded_ranking = calculator.LiveRanking()
+    sharded = list(calculator.iter_sharded_scan(ranking=sharded_ranking, **options))
+    assert sharded
+    counters = calculator.METRICS.snapshot()['counters']
+    assert counters['requests'] > 0
+    assert counters.get('tickers_analyzed', 0) + counters.get('tickers_skipped', 0) == 6
+
+    ranking = calculator.LiveRanking()
+    single = list(calculator.iter_analyze_stocks(list_limit=6, ranking=ranking, checkpoint=False))
+    assert sorted((r['ticker'], r['score']) for r in sharded) == sorted((r['ticker'], r['score']) for r in single)
+    assert ([(r['ticker'], r['score']) for r in sharded_ranking.ranked()]
+            == [(r['ticker'], r['score']) for r in ranking.ranked()])
+
+    # Rerunning with the same queue yields the stored results without scanning again
+    time.sleep(0.5)  # the fake server counts requests after answering them
+    requests = fake_yahoo.stats.snapshot()['requests']
+    rerun = list(calculator.iter_sharded_scan(**options))
+    assert sorted(r['ticker'] for r in rerun) == sorted(r['ticker'] for r in sharded)
+    time.sleep(0.5)
+    assert fake_yahoo.stats.snapshot()['requests'] == requests
@@ -0,0 +1,45 @@
+"""S&P 500 constituent list: stored record, bundled snapshot and background revalidation."""
+import json
+import os
+import time
+
+import calculator
+
+SNAPSHOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sp500_snapshot.json')
+
+
+def test_bundled_snapshot_is_a_valid_constituent_record():
+    record = calculator._load_constituents(SNAPSHOT)
+    assert record is not None and len(record['symbols']) > 490
+    assert record['symbols'] == calculator._dedupe_symbols(record['symbols'])
+    assert 'BRK-B' in record['symbols']
+
+
+def test_first_run_starts_from_snapshot_and_revalidates_in_background(fake_yahoo, cache_dir, monkeypatch):
+    # A snapshot taken from the fake server's list URL
+    record = calculator._load_constituents(SNAPSHOT)
+    snapshot = os.path.join(cache_dir, 'sp500_snapshot.json')
+    with open(snapshot, 'w', encoding='utf-8') as f:
+        json.dump(dict(record, source=fake_yahoo.sp500_url), f)
+    monkeypatch.setattr(calculator, 'SP500_SNAPSHOT_PATH', snapshot)
+    assert calculator.get_sp500_stocks(limit=3) == ['A', 'AAPL', 'ABBV']
+
+    store_path = calculator._sp500_store_path()
+    deadline = time.monotonic() + 10
+    while calculator._load_constituents(store_path) is None:
+        assert time.monotonic() < deadline, "background refresh did not store the list"
+        time.sleep(0.05)
+    assert calculator.get_sp500_stocks(limit=2) == fake_yahoo.market.tickers[:2]
+
+
+def test_snapshot_of_another_source_is_ignored(fake_yahoo, cache_dir, monkeypatch):
+    monkeypatch.setattr(calculator, 'SP500_SNAPSHOT_PATH', SNAPSHOT)
+    assert calculator.get_sp500_stocks(limit=2) == fake_yahoo.market.tickers[:2]
+
+
+def test_offline_first_run_uses_snapshot(cache_dir, monkeypatch):
+    monkeypatch.setattr(calculator, 'SP500_SNAPSHOT_PATH', SNAPSHOT)
+    monkeypatch.setattr(calculator, 'SP500_URL', calculator._load_constituents(SNAPSHOT)['source'])
+    monkeypatch.setattr(calculator, 'CACHE_OFFLINE', True)
+    assert len(calculator.get_sp500_stocks()) == len(calculator._load_constituents(SNAPSHOT)['symbols'])
+    assert not os.path.exists(calculator._sp500_store_path())